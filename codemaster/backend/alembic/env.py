@@ -17,6 +17,7 @@ from app.core.config import get_settings
 from app.db.database import Base
 # ВАЖНО: импорт моделей, чтобы они попали в metadata
 from app import models  # noqa: F401
+from app.models.attempt import partition_month
 
 from sqlalchemy import pool
 from sqlalchemy.engine import Connection
@@ -38,6 +39,13 @@ config.set_main_option("sqlalchemy.url", DATABASE_URL)
 target_metadata = Base.metadata
 
 
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    # помесячные таблицы попыток ведёт приложение, а не миграции
+    if type_ == "table" and partition_month(name) is not None:
+        return False
+    return True
+
+
 def run_migrations_offline() -> None:
     """Офлайн-режим (генерация SQL без подключения)."""
     url = config.get_main_option("sqlalchemy.url")
@@ -47,6 +55,7 @@ def run_migrations_offline() -> None:
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
         compare_type=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -59,6 +68,7 @@ def do_run_migrations(connection: Connection) -> None:
         connection=connection,
         target_metadata=target_metadata,
         compare_type=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
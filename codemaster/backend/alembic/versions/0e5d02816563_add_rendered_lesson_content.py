@@ -0,0 +1,52 @@
+"""add pre-rendered lesson content
+
+Revision ID: 0e5d02816563
+Revises: 558805fa8ac7
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.lesson_content import render_content
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0e5d02816563'
+down_revision: Union[str, None] = '558805fa8ac7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 500
+
+
+def upgrade() -> None:
+    op.add_column("lessons", sa.Column("content_html_gz", sa.LargeBinary(), nullable=True))
+    op.add_column("lessons", sa.Column("content_hash", sa.String(length=64), nullable=True))
+
+    # рендер существующих уроков пачками по id
+    bind = op.get_bind()
+    select_batch = sa.text(
+        "SELECT id, content FROM lessons WHERE id > :last ORDER BY id LIMIT :limit"
+    )
+    update_row = sa.text(
+        "UPDATE lessons SET content_html_gz = :html_gz, content_hash = :content_hash WHERE id = :id"
+    )
+    last = 0
+    while True:
+        rows = bind.execute(select_batch, {"last": last, "limit": BACKFILL_BATCH}).all()
+        if not rows:
+            break
+        params = []
+        for row in rows:
+            html_gz, content_hash = render_content(row.content)
+            params.append({"id": row.id, "html_gz": html_gz, "content_hash": content_hash})
+        bind.execute(update_row, params)
+        last = rows[-1].id
+
+
+def downgrade() -> None:
+    op.drop_column("lessons", "content_hash")
+    op.drop_column("lessons", "content_html_gz")
@@ -0,0 +1,39 @@
+"""add token_revocations
+
+Revision ID: 13b98a2dba31
+Revises: 4ebf917483f2
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '13b98a2dba31'
+down_revision: Union[str, None] = '4ebf917483f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "token_revocations",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("jti", sa.String(length=64), nullable=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("revoked_at", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_token_revocations_jti", "token_revocations", ["jti"], unique=True)
+    op.create_index("ix_token_revocations_user_id", "token_revocations", ["user_id"])
+    op.create_index("ix_token_revocations_expires_at", "token_revocations", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_token_revocations_expires_at", table_name="token_revocations")
+    op.drop_index("ix_token_revocations_user_id", table_name="token_revocations")
+    op.drop_index("ix_token_revocations_jti", table_name="token_revocations")
+    op.drop_table("token_revocations")
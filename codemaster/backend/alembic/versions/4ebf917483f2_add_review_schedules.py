@@ -0,0 +1,44 @@
+"""add review_schedules
+
+Revision ID: 4ebf917483f2
+Revises: add_selected_option_id
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4ebf917483f2'
+down_revision: Union[str, None] = 'add_selected_option_id'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "review_schedules",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("task_id", sa.Integer(), sa.ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("repetitions", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("interval_days", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("easiness", sa.Float(), nullable=False, server_default="2.5"),
+        sa.Column("due_at", sa.DateTime(), nullable=False),
+        sa.Column("last_reviewed_at", sa.DateTime(), nullable=True),
+        sa.Column("last_quality", sa.Integer(), nullable=True),
+        sa.UniqueConstraint("user_id", "task_id", name="uq_review_schedule"),
+    )
+    op.create_index(
+        "ix_review_schedules_user_due",
+        "review_schedules",
+        ["user_id", "due_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_review_schedules_user_due", table_name="review_schedules")
+    op.drop_table("review_schedules")
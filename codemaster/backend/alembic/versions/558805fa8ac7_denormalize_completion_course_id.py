@@ -0,0 +1,78 @@
+"""denormalize course_id onto lesson/task completions
+
+Revision ID: 558805fa8ac7
+Revises: 57f53bc4dbb8
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '558805fa8ac7'
+down_revision: Union[str, None] = '57f53bc4dbb8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Бэкфилл идёт диапазонами id в autocommit_block: миграция целиком
+# выполняется в одной транзакции (alembic/env.py), а так каждая пачка
+# коммитится сама и блокировки не держатся на всей таблице до конца.
+# Вход в autocommit_block коммитит добавление колонок, поэтому повтор после
+# сбоя их не создаёт заново (IF NOT EXISTS), а UPDATE трогает только
+# course_id IS NULL. Строки, вставленные старым кодом во время пачек,
+# дозаполняет последний проход под блокировкой записи, перед SET NOT NULL.
+BACKFILL_BATCH = 10_000
+
+COURSE_OF = {
+    "lesson_completions": """
+        SELECT lessons.course_id FROM lessons
+        WHERE lessons.id = lesson_completions.lesson_id
+    """,
+    "task_completions": """
+        SELECT lessons.course_id FROM tasks
+        JOIN lessons ON lessons.id = tasks.lesson_id
+        WHERE tasks.id = task_completions.task_id
+    """,
+}
+
+
+def _fill(table: str, condition: str = "") -> sa.TextClause:
+    return sa.text(f"UPDATE {table} SET course_id = ({COURSE_OF[table]}) WHERE course_id IS NULL {condition}")
+
+
+def _backfill(table: str) -> None:
+    # в --sql режиме соединения нет: всё заполнит последний проход
+    if context.is_offline_mode():
+        return
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        max_id = bind.execute(sa.text(f"SELECT MAX(id) FROM {table}")).scalar() or 0
+        statement = _fill(table, "AND id > :lo AND id <= :hi")
+        for lo in range(0, max_id, BACKFILL_BATCH):
+            bind.execute(statement, {"lo": lo, "hi": lo + BACKFILL_BATCH})
+
+
+def upgrade() -> None:
+    for table in COURSE_OF:
+        op.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS course_id INTEGER")
+
+    for table in COURSE_OF:
+        _backfill(table)
+
+    for table in COURSE_OF:
+        # новые вставки ждут конца миграции, чтения идут дальше
+        op.execute(f"LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE")
+        op.execute(_fill(table))
+        op.alter_column(table, "course_id", existing_type=sa.Integer(), nullable=False)
+        op.create_foreign_key(f"fk_{table}_course_id", table, "courses", ["course_id"], ["id"])
+        op.create_index(f"ix_{table}_user_course", table, ["user_id", "course_id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    for table in ("task_completions", "lesson_completions"):
+        op.drop_index(f"ix_{table}_user_course", table_name=table)
+        op.drop_constraint(f"fk_{table}_course_id", table, type_="foreignkey")
+        op.drop_column(table, "course_id")
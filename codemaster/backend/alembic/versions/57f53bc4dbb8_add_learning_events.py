@@ -0,0 +1,41 @@
+"""add learning_events
+
+Revision ID: 57f53bc4dbb8
+Revises: 13b98a2dba31
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '57f53bc4dbb8'
+down_revision: Union[str, None] = '13b98a2dba31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "learning_events",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("kind", sa.String(length=32), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("course_id", sa.Integer(), nullable=True),
+        sa.Column("lesson_id", sa.Integer(), nullable=True),
+        sa.Column("task_id", sa.Integer(), nullable=True),
+        sa.Column("option_id", sa.Integer(), nullable=True),
+        sa.Column("is_correct", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_learning_events_user_created", "learning_events", ["user_id", "created_at"])
+    op.create_index("ix_learning_events_course_created", "learning_events", ["course_id", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_learning_events_course_created", table_name="learning_events")
+    op.drop_index("ix_learning_events_user_created", table_name="learning_events")
+    op.drop_table("learning_events")
@@ -0,0 +1,42 @@
+"""add attempt summaries
+
+Revision ID: 6d2b9e0f4a17
+Revises: f3a81c5d92e4
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d2b9e0f4a17'
+down_revision: Union[str, None] = 'f3a81c5d92e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # помесячные таблицы attempts_YYYY_MM создаёт приложение при первой записи
+    op.create_table(
+        "attempt_summaries",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("course_id", sa.Integer(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("correct_attempts", sa.Integer(), nullable=False),
+        sa.Column("first_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("last_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("last_option_id", sa.Integer(), nullable=True),
+        sa.Column("last_is_correct", sa.Boolean(), nullable=True),
+        sa.UniqueConstraint("user_id", "task_id", name="uq_attempt_summary_user_task"),
+    )
+    op.create_index("ix_attempt_summaries_course_id", "attempt_summaries", ["course_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_attempt_summaries_course_id", table_name="attempt_summaries")
+    op.drop_table("attempt_summaries")
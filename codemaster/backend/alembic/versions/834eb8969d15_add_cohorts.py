@@ -0,0 +1,54 @@
+"""add cohorts and cohort_members
+
+Revision ID: 834eb8969d15
+Revises: 0e5d02816563
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '834eb8969d15'
+down_revision: Union[str, None] = '0e5d02816563'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cohorts",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column(
+            "course_id",
+            sa.Integer(),
+            sa.ForeignKey("courses.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("name", sa.String(length=200), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("course_id", "name", name="uq_cohort_course_name"),
+    )
+    op.create_table(
+        "cohort_members",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column(
+            "cohort_id",
+            sa.Integer(),
+            sa.ForeignKey("cohorts.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("added_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("cohort_id", "user_id", name="uq_cohort_member"),
+    )
+    op.create_index("ix_cohort_members_user_id", "cohort_members", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_cohort_members_user_id", table_name="cohort_members")
+    op.drop_table("cohort_members")
+    op.drop_table("cohorts")
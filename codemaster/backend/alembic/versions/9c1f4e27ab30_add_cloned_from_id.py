@@ -0,0 +1,34 @@
+"""add cloned_from_id to lessons and tasks
+
+Revision ID: 9c1f4e27ab30
+Revises: 834eb8969d15
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c1f4e27ab30'
+down_revision: Union[str, None] = '834eb8969d15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # id исходной строки при клонировании курса: по нему INSERT ... SELECT
+    # сопоставляет новые уроки/задачи со старыми
+    op.add_column("lessons", sa.Column("cloned_from_id", sa.Integer(), nullable=True))
+    op.add_column("tasks", sa.Column("cloned_from_id", sa.Integer(), nullable=True))
+    op.create_index("ix_lessons_cloned_from_id", "lessons", ["cloned_from_id"])
+    op.create_index("ix_tasks_cloned_from_id", "tasks", ["cloned_from_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_cloned_from_id", table_name="tasks")
+    op.drop_index("ix_lessons_cloned_from_id", table_name="lessons")
+    op.drop_column("tasks", "cloned_from_id")
+    op.drop_column("lessons", "cloned_from_id")
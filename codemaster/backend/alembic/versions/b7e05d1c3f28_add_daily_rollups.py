@@ -0,0 +1,45 @@
+"""add daily activity rollups
+
+Revision ID: b7e05d1c3f28
+Revises: 6d2b9e0f4a17
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e05d1c3f28'
+down_revision: Union[str, None] = '6d2b9e0f4a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_course_activity",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("course_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("active_students", sa.Integer(), nullable=False),
+        sa.Column("lessons_completed", sa.Integer(), nullable=False),
+        sa.Column("tasks_attempted", sa.Integer(), nullable=False),
+        sa.Column("tasks_correct", sa.Integer(), nullable=False),
+        sa.UniqueConstraint("course_id", "day", name="uq_daily_course_activity"),
+    )
+    op.create_table(
+        "daily_active_students",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("course_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.UniqueConstraint("course_id", "day", "user_id", name="uq_daily_active_student"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("daily_active_students")
+    op.drop_table("daily_course_activity")
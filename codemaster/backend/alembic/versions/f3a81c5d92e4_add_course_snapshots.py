@@ -0,0 +1,42 @@
+"""add course snapshots
+
+Revision ID: f3a81c5d92e4
+Revises: 9c1f4e27ab30
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a81c5d92e4'
+down_revision: Union[str, None] = '9c1f4e27ab30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "course_snapshots",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column(
+            "course_id",
+            sa.Integer(),
+            sa.ForeignKey("courses.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("content_gz", sa.LargeBinary(), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("size_bytes", sa.Integer(), nullable=False),
+        sa.Column("published_by", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("published_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("course_id", "version", name="uq_course_snapshot_version"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("course_snapshots")
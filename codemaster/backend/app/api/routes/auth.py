@@ -12,8 +12,12 @@ from app.core.security import (
     verify_password,
     get_password_hash,
     create_access_token,
+    decode_token,
     get_current_user,
+    oauth2_scheme,
 )
+from app.core.config import get_settings
+from app.core.revocation import revocations
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -61,6 +65,11 @@ async def login(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
         )
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Inactive user",
+        )
 
     token = create_access_token(
         {"sub": str(user.id), "is_teacher": user.is_teacher}
@@ -68,5 +77,38 @@ async def login(
     return Token(access_token=token)
 
 @router.get("/me", response_model=UserOut)
-async def read_me(current_user: User = Depends(get_current_user)):
-    return current_user
\ No newline at end of file
+async def read_me(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    if get_settings().AUTH_STATELESS:
+        # в stateless-режиме из токена известны только id и роль — профиль читаем из БД
+        res = await db.execute(select(User).where(User.id == current_user.id))
+        user = res.scalar_one_or_none()
+        if user is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        return user
+    return current_user
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    token: str = Depends(oauth2_scheme),
+    _user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Отзыв текущего токена.
+    """
+    await revocations.revoke_token(db, decode_token(token))
+
+
+@router.post("/logout-all", status_code=status.HTTP_204_NO_CONTENT)
+async def logout_all(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Отзыв всех выданных пользователю токенов (выход на всех устройствах).
+    """
+    await revocations.revoke_user(db, current_user.id)
\ No newline at end of file
@@ -1,6 +1,7 @@
 ﻿from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
@@ -8,21 +9,36 @@ from app.db.database import get_db
 from app.models.course import Course
 from app.models.progress import Progress
 from app.schemas.course import CourseCreate, CourseOut
-from app.core.security import get_current_teacher, get_current_user_optional
+from app.core.security import get_current_teacher, get_current_user, get_current_user_optional
 from app.models.user import User  # типизировать не обязательно, но можно
+from app.core.invalidation import KEY_CATALOG, bus
+from app.services.ownership import ownership
+from app.services.catalog_cache import catalog_cache, precompressed_response
+from app.services.course_snapshots import load_snapshot
+from app.schemas.snapshot import CourseContentOut
 
 router = APIRouter(prefix="/courses", tags=["courses"])
 
+_course_list = TypeAdapter(list[CourseOut])
+
 
 @router.get("/", response_model=list[CourseOut])
 async def list_courses(
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User | None = Depends(get_current_user_optional),
 ):
     """
     Список всех курсов.
     Для авторизованных студентов показывает, записан ли студент на курс.
+    Анонимный ответ одинаков для всех и берётся из кеша уже сжатым.
     """
+    if current_user is None:
+        cached = catalog_cache.get()
+        if cached is not None:
+            return precompressed_response(request, cached)
+        generation = catalog_cache.generation
+
     res = await db.execute(select(Course).order_by(Course.id))
     courses = res.scalars().all()
     
@@ -34,7 +50,7 @@ async def list_courses(
         )
         enrolled_course_ids = {row[0] for row in progress_res.all()}
     
-    return [
+    result = [
         CourseOut(
             id=course.id,
             title=course.title,
@@ -43,6 +59,38 @@ async def list_courses(
         )
         for course in courses
     ]
+    if current_user is None:
+        body = catalog_cache.put(generation, _course_list.dump_json(result))
+        return precompressed_response(request, body)
+    return result
+
+
+@router.get("/{course_id}/content", response_model=CourseContentOut)
+async def get_course_content(
+    course_id: int,
+    request: Request,
+    version: int | None = Query(None, ge=1),
+    db: AsyncSession = Depends(get_db),
+    _user: User = Depends(get_current_user),
+):
+    """
+    Опубликованный курс целиком (уроки, задачи, варианты) одним документом.
+    Отдаётся готовый снапшот из памяти, уже сжатый; отметки о выполнении —
+    отдельно, в /lessons и /tasks. С ?version=N ответ неизменяем и кешируется
+    надолго, без него — текущая версия с ревалидацией по ETag.
+    """
+    snapshot = await load_snapshot(db, course_id, version)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Курс не опубликован")
+    current_version, body = snapshot
+    cache_control = (
+        "private, max-age=31536000, immutable" if version is not None else "private, no-cache"
+    )
+    return precompressed_response(
+        request,
+        body,
+        headers={"Cache-Control": cache_control, "X-Course-Version": str(current_version)},
+    )
 
 
 @router.post("/", response_model=CourseOut, status_code=status.HTTP_201_CREATED)
@@ -68,4 +116,6 @@ async def create_course(
     db.add(course)
     await db.commit()
     await db.refresh(course)
+    ownership.add_course(course.id, course.owner_id)
+    bus.publish(KEY_CATALOG)
     return course
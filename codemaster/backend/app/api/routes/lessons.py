@@ -1,6 +1,8 @@
 ﻿from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import gzip
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
@@ -8,16 +10,21 @@ from app.db.database import get_db
 from app.core.security import get_current_teacher, get_current_user, get_current_user_optional
 from app.models.user import User
 from app.models.lesson import Lesson
-from app.models.course import Course
 from app.models.progress import LessonCompletion
-from app.schemas.lesson import LessonCreate, LessonOut  # поправь имена схем, если у тебя другие
+from app.core.invalidation import bus, course_key
+from app.services.shared_reads import View, load_lessons, published_lessons
+from app.services.ownership import ownership
+from app.services.lesson_content import apply_rendered, content_etag
+from app.core.encoding import accepts_encoding, etag_matches
+from app.schemas.lesson import LessonCreate, LessonOut, LessonSummaryOut  # поправь имена схем, если у тебя другие
 
 router = APIRouter(prefix="/lessons", tags=["lessons"])
 
 
-@router.get("/", response_model=list[LessonOut])
+@router.get("/", response_model=list[LessonOut] | list[LessonSummaryOut])
 async def list_lessons(
     course_id: int | None = None,
+    view: View = "full",
     db: AsyncSession = Depends(get_db),
     current_user: User | None = Depends(get_current_user_optional),
 ):
@@ -25,29 +32,50 @@ async def list_lessons(
     Список уроков.
     Если передан course_id — только для этого курса.
     Для авторизованных студентов показывает, завершен ли урок.
+    view=summary — без content (для оглавления), content из БД не читается.
+    Студентам уроки опубликованного курса отдаются из текущего снапшота,
+    черновик видят только преподаватели.
     """
-    stmt = select(Lesson)
-    if course_id is not None:
-        stmt = stmt.where(Lesson.course_id == course_id)
-    res = await db.execute(stmt.order_by(Lesson.id))
-    lessons = res.scalars().all()
+    lessons = None
+    if course_id is not None and not (current_user and current_user.is_teacher):
+        lessons = await published_lessons(db, course_id, view)
+    if lessons is None:
+        # одинаковые одновременные запросы курса склеиваются в один SELECT.
+        # Соединение сессии запроса (на нём уже читался пользователь) отпускаем до
+        # ожидания: иначе при наплыве каждый запрос держит соединение, а загрузке
+        # не достаётся свободного из пула
+        await db.commit()
+        lessons = await load_lessons(course_id, view)
     
     # Если пользователь авторизован, проверяем, какие уроки завершены
     completed_lesson_ids = set()
     if current_user:
-        completion_res = await db.execute(
-            select(LessonCompletion.lesson_id).where(
-                LessonCompletion.user_id == current_user.id
-            )
+        completion_stmt = select(LessonCompletion.lesson_id).where(
+            LessonCompletion.user_id == current_user.id
         )
+        if course_id is not None:
+            completion_stmt = completion_stmt.where(LessonCompletion.course_id == course_id)
+        completion_res = await db.execute(completion_stmt)
         completed_lesson_ids = {row[0] for row in completion_res.all()}
     
+    if view == "summary":
+        return [
+            LessonSummaryOut(
+                id=lesson.id,
+                course_id=lesson.course_id,
+                title=lesson.title,
+                content_hash=lesson.content_hash,
+                is_completed=lesson.id in completed_lesson_ids,
+            )
+            for lesson in lessons
+        ]
     return [
         LessonOut(
             id=lesson.id,
             course_id=lesson.course_id,
             title=lesson.title,
             content=lesson.content,
+            content_hash=lesson.content_hash,
             is_completed=lesson.id in completed_lesson_ids,
         )
         for lesson in lessons
@@ -70,6 +98,48 @@ async def get_lesson(
     return lesson
 
 
+@router.get("/{lesson_id}/html")
+async def get_lesson_html(
+    lesson_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    _user: User = Depends(get_current_user),
+):
+    """
+    Отрендеренный при записи HTML урока.
+    Хранится в gzip и отдаётся как есть (Content-Encoding: gzip),
+    если клиент его принимает; ETag — хеш HTML.
+    """
+    res = await db.execute(
+        select(Lesson.content_html_gz, Lesson.content_hash).where(Lesson.id == lesson_id)
+    )
+    row = res.one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    html_gz, content_hash = row.content_html_gz, row.content_hash
+    if html_gz is None or content_hash is None:
+        # урок записан до появления рендера — рендерим один раз и сохраняем
+        lesson = await db.get(Lesson, lesson_id)
+        apply_rendered(lesson)
+        html_gz, content_hash = lesson.content_html_gz, lesson.content_hash
+        await db.commit()
+
+    etag = content_etag(content_hash)
+    headers = {
+        "ETag": etag,
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "private, no-cache",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if accepts_encoding(request.headers.get("accept-encoding"), "gzip"):
+        headers["Content-Encoding"] = "gzip"
+        body = html_gz
+    else:
+        body = gzip.decompress(html_gz)
+    return Response(content=body, media_type="text/html; charset=utf-8", headers=headers)
+
+
 @router.post(
     "/",
     response_model=LessonOut,
@@ -84,9 +154,7 @@ async def create_lesson(
     Создание урока (только преподаватель).
     """
     # проверим, что курс существует
-    res = await db.execute(select(Course).where(Course.id == payload.course_id))
-    course = res.scalar_one_or_none()
-    if course is None:
+    if await ownership.course_owner(db, payload.course_id) is None:
         raise HTTPException(status_code=404, detail="Course not found")
 
     lesson = Lesson(
@@ -94,7 +162,10 @@ async def create_lesson(
         title=payload.title,
         content=payload.content,
     )
+    apply_rendered(lesson)
     db.add(lesson)
     await db.commit()
     await db.refresh(lesson)
+    ownership.add_lesson(lesson.id, lesson.course_id)
+    bus.publish(course_key(lesson.course_id))
     return lesson
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.compression import compression_stats
+from app.core.config import get_settings
+from app.core.encoding import AVAILABLE_ENCODINGS
+from app.core.security import get_current_teacher
+from app.db.database import get_db, slow_query_log
+from app.models.user import User
+from app.services.event_log import event_log
+from app.services.scheduler import scheduler
+from app.services.shared_reads import lessons_flight, tasks_flight
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/single-flight")
+async def single_flight_stats(_teacher: User = Depends(get_current_teacher)):
+    """
+    Сколько одинаковых чтений было склеено:
+    coalescing_ratio = вызовы / реальные запросы к БД.
+    """
+    return [lessons_flight.stats(), tasks_flight.stats()]
+
+
+@router.get("/event-log")
+async def event_log_stats(_teacher: User = Depends(get_current_teacher)):
+    """
+    Состояние буфера журнала событий (queue_depth — сколько ждёт записи).
+    """
+    return event_log.stats()
+
+
+@router.get("/compression")
+async def compression_metrics(_teacher: User = Depends(get_current_teacher)):
+    """
+    Сжатие ответов middleware: байты до/после и CPU на один сжатый ответ.
+    Заранее сжатые ответы кеша сюда не попадают — на них CPU не тратится.
+    """
+    return {"encodings": list(AVAILABLE_ENCODINGS), **compression_stats.as_dict()}
+
+
+@router.get("/slow-queries")
+async def slow_queries(
+    limit: int = Query(50, ge=1, le=500),
+    _teacher: User = Depends(get_current_teacher),
+):
+    """
+    Медленные запросы этого воркера, сведённые по нормализованному SQL:
+    число, суммарное/максимальное время, маршруты и план первого вхождения.
+    Раскрывает схему БД, поэтому доступна только с SLOW_QUERY_METRICS_ENABLED.
+    """
+    if not get_settings().SLOW_QUERY_METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return {**slow_query_log.stats(), "statements": slow_query_log.top(limit)}
+
+
+@router.get("/jobs")
+async def job_stats(
+    db: AsyncSession = Depends(get_db),
+    _teacher: User = Depends(get_current_teacher),
+):
+    """
+    Фоновые задачи: очередь по статусам (общая для всех воркеров)
+    и счётчики запусков этого воркера.
+    """
+    return await scheduler.stats(db)
@@ -1,6 +1,6 @@
 ﻿from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.course import Course
@@ -16,7 +16,17 @@ from app.schemas.progress import (
     CompleteLessonRequest,
     CompleteTaskRequest,
     CourseWithProgressOut, 
+    LeaderboardEntryOut,
+    LeaderboardOut,
+    ResumeCourseOut,
 )
+from app.core.invalidation import bus, course_progress_key
+from app.services.leaderboard import leaderboard, progress_update
+from app.services.funnel import funnel
+from app.services.resume import resume_points
+from app.services.ownership import ownership
+from app.services.event_log import event_log
+from app.models.event import EVENT_ENROLL, EVENT_LESSON_COMPLETE
 
 router = APIRouter(prefix="/progress", tags=["progress"])
 
@@ -69,17 +79,21 @@ async def complete_lesson(
         )
     )
     completion = res.scalar_one_or_none()
+    created = completion is None
     if completion is None:
-        completion = LessonCompletion(user_id=student.id, lesson_id=lesson_id)
+        completion = LessonCompletion(
+            user_id=student.id,
+            lesson_id=lesson_id,
+            course_id=lesson.course_id,
+        )
         db.add(completion)
 
     # 3) пересчитаем количество завершённых уроков по курсу
     res = await db.execute(
         select(func.count(LessonCompletion.id))
-        .join(Lesson, Lesson.id == LessonCompletion.lesson_id)
         .where(
             LessonCompletion.user_id == student.id,
-            Lesson.course_id == lesson.course_id,
+            LessonCompletion.course_id == lesson.course_id,
         )
     )
     lessons_completed = res.scalar_one() or 0
@@ -87,11 +101,9 @@ async def complete_lesson(
     # 4) узнаем, сколько задач выполнено по этому курсу (для целостности)
     res = await db.execute(
         select(func.count(TaskCompletion.id))
-        .join(Task, Task.id == TaskCompletion.task_id)
-        .join(Lesson, Lesson.id == Task.lesson_id)
         .where(
             TaskCompletion.user_id == student.id,
-            Lesson.course_id == lesson.course_id,
+            TaskCompletion.course_id == lesson.course_id,
         )
     )
     tasks_completed = res.scalar_one() or 0
@@ -99,11 +111,9 @@ async def complete_lesson(
     # 5) и средний балл по задачам
     res = await db.execute(
         select(func.avg(TaskCompletion.score))
-        .join(Task, Task.id == TaskCompletion.task_id)
-        .join(Lesson, Lesson.id == Task.lesson_id)
         .where(
             TaskCompletion.user_id == student.id,
-            Lesson.course_id == lesson.course_id,
+            TaskCompletion.course_id == lesson.course_id,
             TaskCompletion.score.isnot(None),
         )
     )
@@ -117,6 +127,17 @@ async def complete_lesson(
 
     await db.commit()
     await db.refresh(progress)
+    leaderboard.record(progress)
+    if created:
+        funnel.record_lesson(lesson.course_id, lesson_id)
+        # повторная отметка урока не должна попасть в дневную статистику второй раз
+        event_log.emit(
+            EVENT_LESSON_COMPLETE,
+            student.id,
+            course_id=lesson.course_id,
+            lesson_id=lesson_id,
+        )
+    bus.publish(course_progress_key(progress.course_id), progress_update(progress))
     return progress
 
 
@@ -152,10 +173,12 @@ async def complete_task(
         )
     )
     completion = res.scalar_one_or_none()
+    created = completion is None
     if completion is None:
         completion = TaskCompletion(
             user_id=student.id,
             task_id=task_id,
+            course_id=lesson.course_id,
             score=body.score,
         )
         db.add(completion)
@@ -167,32 +190,27 @@ async def complete_task(
     # 3) пересчёты аналогично complete_lesson
     res = await db.execute(
         select(func.count(LessonCompletion.id))
-        .join(Lesson, Lesson.id == LessonCompletion.lesson_id)
         .where(
             LessonCompletion.user_id == student.id,
-            Lesson.course_id == lesson.course_id,
+            LessonCompletion.course_id == lesson.course_id,
         )
     )
     lessons_completed = res.scalar_one() or 0
 
     res = await db.execute(
         select(func.count(TaskCompletion.id))
-        .join(Task, Task.id == TaskCompletion.task_id)
-        .join(Lesson, Lesson.id == Task.lesson_id)
         .where(
             TaskCompletion.user_id == student.id,
-            Lesson.course_id == lesson.course_id,
+            TaskCompletion.course_id == lesson.course_id,
         )
     )
     tasks_completed = res.scalar_one() or 0
 
     res = await db.execute(
         select(func.avg(TaskCompletion.score))
-        .join(Task, Task.id == TaskCompletion.task_id)
-        .join(Lesson, Lesson.id == Task.lesson_id)
         .where(
             TaskCompletion.user_id == student.id,
-            Lesson.course_id == lesson.course_id,
+            TaskCompletion.course_id == lesson.course_id,
             TaskCompletion.score.isnot(None),
         )
     )
@@ -206,6 +224,10 @@ async def complete_task(
 
     await db.commit()
     await db.refresh(progress)
+    leaderboard.record(progress)
+    if created:
+        funnel.record_task(lesson.course_id, task_id)
+    bus.publish(course_progress_key(progress.course_id), progress_update(progress))
     return progress
 
 
@@ -234,6 +256,8 @@ async def get_my_progress(
         db.add(progress)
         await db.commit()
         await db.refresh(progress)
+        leaderboard.record(progress)
+        bus.publish(course_progress_key(progress.course_id), progress_update(progress))
     return progress
 
 @router.get(
@@ -247,14 +271,7 @@ async def get_user_course_progress(
     teacher: User = Depends(get_current_teacher),
 ):
     # 1) проверяем, что курс вообще существует и принадлежит этому преподу
-    res = await db.execute(
-        select(Course).where(
-            Course.id == course_id,
-            Course.owner_id == teacher.id,
-        )
-    )
-    course = res.scalar_one_or_none()
-    if course is None:
+    if not await ownership.owns_course(db, teacher.id, course_id):
         # либо курса нет, либо он не этого препода
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -281,6 +298,8 @@ async def get_user_course_progress(
         db.add(progress)
         await db.commit()
         await db.refresh(progress)
+        leaderboard.record(progress)
+        bus.publish(course_progress_key(progress.course_id), progress_update(progress))
 
     return progress
 
@@ -352,6 +371,9 @@ async def enroll_in_course(
     db.add(progress)
     await db.commit()
     await db.refresh(progress)
+    leaderboard.record(progress)
+    bus.publish(course_progress_key(progress.course_id), progress_update(progress))
+    event_log.emit(EVENT_ENROLL, student.id, course_id=course_id)
     return progress
 
 
@@ -373,22 +395,28 @@ async def get_my_courses_with_progress(
     )
     rows = res.all()
 
-    result: list[CourseWithProgressOut] = []
-    for progress, course in rows:
-        # Подсчитываем общее количество уроков в курсе
+    # количество уроков и заданий — по всем курсам студента сразу, а не запросом на курс
+    course_ids = [course.id for _, course in rows]
+    total_lessons: dict[int, int] = {}
+    total_tasks: dict[int, int] = {}
+    if course_ids:
         lessons_res = await db.execute(
-            select(func.count(Lesson.id)).where(Lesson.course_id == course.id)
+            select(Lesson.course_id, func.count(Lesson.id))
+            .where(Lesson.course_id.in_(course_ids))
+            .group_by(Lesson.course_id)
         )
-        total_lessons = lessons_res.scalar_one() or 0
-        
-        # Подсчитываем общее количество заданий в курсе
+        total_lessons = dict(lessons_res.all())
+
         tasks_res = await db.execute(
-            select(func.count(Task.id))
+            select(Lesson.course_id, func.count(Task.id))
             .join(Lesson, Lesson.id == Task.lesson_id)
-            .where(Lesson.course_id == course.id)
+            .where(Lesson.course_id.in_(course_ids))
+            .group_by(Lesson.course_id)
         )
-        total_tasks = tasks_res.scalar_one() or 0
-        
+        total_tasks = dict(tasks_res.all())
+
+    result: list[CourseWithProgressOut] = []
+    for progress, course in rows:
         result.append(
             CourseWithProgressOut(
                 course_id=course.id,
@@ -397,10 +425,67 @@ async def get_my_courses_with_progress(
                 lessons_completed=progress.lessons_completed,
                 tasks_completed=progress.tasks_completed,
                 score_avg=progress.score_avg,
-                total_lessons=total_lessons,
-                total_tasks=total_tasks,
+                total_lessons=total_lessons.get(course.id, 0),
+                total_tasks=total_tasks.get(course.id, 0),
             )
         )
 
     return result
 
+
+@router.get(
+    "/resume",
+    response_model=list[ResumeCourseOut],
+)
+async def get_resume_points(
+    db: AsyncSession = Depends(get_db),
+    student: User = Depends(get_current_student),
+):
+    """Для главной студента: с какого урока и задачи продолжить каждый курс."""
+    return await resume_points(db, student.id)
+
+
+
+@router.get(
+    "/courses/{course_id}/leaderboard",
+    response_model=LeaderboardOut,
+)
+async def get_course_leaderboard(
+    course_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    around: int = Query(2, ge=0, le=50),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Рейтинг студентов курса: первые limit мест,
+    место текущего пользователя и по around соседей сверху и снизу.
+    Рейтинг держится в памяти, поэтому запрос не сортирует progress.
+    """
+    if not leaderboard.is_loaded(course_id):
+        # курс проверяем только на холодном старте, дальше рейтинг уже в памяти
+        res = await db.execute(select(Course.id).where(Course.id == course_id))
+        if res.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Course not found")
+
+    board = await leaderboard.get(db, course_id)
+
+    def to_out(rank: int, entry) -> LeaderboardEntryOut:
+        return LeaderboardEntryOut(
+            rank=rank,
+            user_id=entry.user_id,
+            lessons_completed=entry.lessons_completed,
+            tasks_completed=entry.tasks_completed,
+            score_avg=entry.score_avg,
+        )
+
+    neighbours = [to_out(rank, entry) for rank, entry in board.around(user.id, around)]
+    me = next((item for item in neighbours if item.user_id == user.id), None)
+
+    return LeaderboardOut(
+        course_id=course_id,
+        total=len(board),
+        top=[to_out(rank, entry) for rank, entry in board.top(limit)],
+        me=me,
+        neighbours=neighbours,
+    )
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from app.db.database import get_db
+from app.core.security import get_current_student
+from app.models.user import User
+from app.models.task import Task
+from app.models.review import ReviewSchedule
+from app.schemas.review import DueReviewOut
+from app.schemas.task import TaskOut
+
+router = APIRouter(prefix="/reviews", tags=["reviews"])
+
+
+@router.get("/due", response_model=list[DueReviewOut])
+async def list_due_reviews(
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    student: User = Depends(get_current_student),
+):
+    """
+    Ближайшие limit задач, которые студенту пора повторить.
+    Задачи и варианты ответов приходят одним запросом
+    (индекс (user_id, due_at) отдаёт их уже упорядоченными).
+    """
+    stmt = (
+        select(Task, ReviewSchedule)
+        .join(ReviewSchedule, ReviewSchedule.task_id == Task.id)
+        .where(
+            ReviewSchedule.user_id == student.id,
+            ReviewSchedule.due_at <= datetime.utcnow(),
+        )
+        .order_by(ReviewSchedule.due_at, ReviewSchedule.task_id)
+        .limit(limit)
+        .options(joinedload(Task.options))
+    )
+    res = await db.execute(stmt)
+
+    return [
+        DueReviewOut(
+            task=TaskOut(
+                id=task.id,
+                lesson_id=task.lesson_id,
+                title=task.title,
+                body=task.body,
+                has_autocheck=task.has_autocheck,
+                options=task.options,
+                # при повторении ответ выбирается заново
+                selected_option_id=None,
+                is_completed=True,
+            ),
+            due_at=schedule.due_at,
+            repetitions=schedule.repetitions,
+            interval_days=schedule.interval_days,
+        )
+        for task, schedule in res.unique().all()
+    ]
@@ -1,8 +1,8 @@
 ﻿from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.orm import selectinload
 
 from app.db.database import get_db
@@ -11,15 +11,24 @@ from app.models.user import User
 from app.models.task import Task, TaskOption
 from app.models.lesson import Lesson
 from app.models.progress import TaskCompletion, Progress, LessonCompletion
-from app.schemas.task import TaskCreate, TaskOut, SubmitAnswerRequest, SubmitAnswerResponse
-from sqlalchemy import func
+from app.schemas.task import TaskCreate, TaskOut, TaskSummaryOut, TaskOptionOut, SubmitAnswerRequest, SubmitAnswerResponse
+from app.schemas.task import AttemptHistoryOut, AttemptOut, AttemptSummaryOut
+from app.core.invalidation import bus, course_key, course_progress_key
+from app.services.leaderboard import leaderboard, progress_update
+from app.services.review_scheduler import record_review
+from app.services.shared_reads import View, load_tasks, published_tasks
+from app.services.event_log import event_log
+from app.services.attempt_history import attempt_summary, recent_attempts
+from app.services.funnel import funnel
+from app.models.event import EVENT_ATTEMPT
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
 
-@router.get("/", response_model=list[TaskOut])
+@router.get("/", response_model=list[TaskOut] | list[TaskSummaryOut])
 async def list_tasks(
     lesson_id: int | None = None,
+    view: View = "full",
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -27,26 +36,46 @@ async def list_tasks(
     Список задач.
     Если передан lesson_id — только для этого урока.
     Возвращает задачи с информацией о выполнении для текущего пользователя.
+    view=summary — без body и вариантов ответа, они не читаются из БД.
+    Студентам задачи опубликованного курса отдаются из текущего снапшота.
     """
-    stmt = select(Task).options(selectinload(Task.options))
-    if lesson_id is not None:
-        stmt = stmt.where(Task.lesson_id == lesson_id)
-    res = await db.execute(stmt.order_by(Task.id))
-    tasks = res.scalars().all()
+    tasks = None
+    if lesson_id is not None and not current_user.is_teacher:
+        tasks = await published_tasks(db, lesson_id, view)
+    if tasks is None:
+        # задачи с вариантами общие для всех: одновременные запросы урока склеиваются.
+        # Соединение сессии запроса отпускаем до ожидания — как в list_lessons
+        await db.commit()
+        tasks = await load_tasks(lesson_id, view)
     
     # Получаем информацию о выполненных задачах для текущего пользователя
     task_ids = [task.id for task in tasks]
     completions = {}
     if task_ids:
         res = await db.execute(
-            select(TaskCompletion).where(
+            select(TaskCompletion.task_id, TaskCompletion.selected_option_id).where(
                 TaskCompletion.user_id == current_user.id,
                 TaskCompletion.task_id.in_(task_ids)
             )
         )
-        for completion in res.scalars().all():
+        for completion in res.all():
             completions[completion.task_id] = completion
     
+    if view == "summary":
+        return [
+            TaskSummaryOut(
+                id=task.id,
+                lesson_id=task.lesson_id,
+                title=task.title,
+                has_autocheck=task.has_autocheck,
+                selected_option_id=(
+                    completions[task.id].selected_option_id if task.id in completions else None
+                ),
+                is_completed=task.id in completions,
+            )
+            for task in tasks
+        ]
+
     # Формируем ответ с информацией о выполнении
     result = []
     for task in tasks:
@@ -57,7 +86,10 @@ async def list_tasks(
             "title": task.title,
             "body": task.body,
             "has_autocheck": task.has_autocheck,
-            "options": task.options,
+            "options": [
+                TaskOptionOut(id=o.id, text=o.text, is_correct=o.is_correct)
+                for o in task.options
+            ],
             "selected_option_id": completion.selected_option_id if completion else None,
             "is_completed": completion is not None,
         }
@@ -75,9 +107,21 @@ async def get_task(
     """
     Одна задача по id.
     Возвращает задачу с информацией о выполнении для текущего пользователя.
+    Студентам задача опубликованного курса отдаётся из текущего снапшота.
     """
-    res = await db.execute(select(Task).where(Task.id == task_id).options(selectinload(Task.options)))
-    task = res.scalar_one_or_none()
+    task = None
+    published = None
+    if not current_user.is_teacher:
+        res = await db.execute(select(Task.lesson_id).where(Task.id == task_id))
+        lesson_id = res.scalar_one_or_none()
+        if lesson_id is not None:
+            published = await published_tasks(db, lesson_id)
+    if published is not None:
+        # задача, добавленная после публикации, студенту ещё не видна
+        task = next((t for t in published if t.id == task_id), None)
+    else:
+        res = await db.execute(select(Task).where(Task.id == task_id).options(selectinload(Task.options)))
+        task = res.scalar_one_or_none()
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
@@ -96,13 +140,40 @@ async def get_task(
         "title": task.title,
         "body": task.body,
         "has_autocheck": task.has_autocheck,
-        "options": task.options,
+        "options": [
+            TaskOptionOut(id=o.id, text=o.text, is_correct=o.is_correct) for o in task.options
+        ],
         "selected_option_id": completion.selected_option_id if completion else None,
         "is_completed": completion is not None,
     }
     return TaskOut(**task_dict)
 
 
+@router.get("/{task_id}/attempts", response_model=AttemptHistoryOut)
+async def get_task_attempts(
+    task_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    История попыток текущего пользователя по задаче.
+    recent — подробно за последние ATTEMPT_HISTORY_MONTHS месяцев,
+    older — итоги более старых попыток, уже свёрнутых.
+    Попытки пишутся в историю фоном, пачками — последняя появляется с задержкой до секунды.
+    """
+    recent = await recent_attempts(db, current_user.id, task_id=task_id, limit=limit)
+    summary = await attempt_summary(db, current_user.id, task_id)
+    return AttemptHistoryOut(
+        task_id=task_id,
+        recent=[
+            AttemptOut(option_id=a.option_id, is_correct=a.is_correct, created_at=a.created_at)
+            for a in recent
+        ],
+        older=AttemptSummaryOut.model_validate(summary) if summary is not None else None,
+    )
+
+
 @router.post(
     "/",
     response_model=TaskOut,
@@ -131,6 +202,7 @@ async def create_task(
     db.add(task)
     await db.commit()
     await db.refresh(task)
+    bus.publish(course_key(lesson.course_id))
     return task
 
 
@@ -196,10 +268,12 @@ async def submit_answer(
         )
     )
     completion = res.scalar_one_or_none()
+    created = completion is None
     if completion is None:
         completion = TaskCompletion(
             user_id=student.id,
             task_id=task_id,
+            course_id=lesson.course_id,
             score=1.0 if is_correct else 0.0,  # Правильный ответ = 1.0, неправильный = 0.0
             selected_option_id=body.option_id,  # Сохраняем выбранный вариант ответа
         )
@@ -215,8 +289,24 @@ async def submit_answer(
             if completion.score is None or completion.score < 1.0:
                 completion.score = 0.0
     
+    # Сдвигаем срок повторения задачи (SM-2) по результату ответа
+    await record_review(db, student.id, task_id, is_correct)
+    
     # Сохраняем изменения в БД
     await db.commit()
+    if created:
+        funnel.record_task(lesson.course_id, task_id)
+    
+    # Каждую попытку — в журнал событий (запишется в фоне пачкой)
+    event_log.emit(
+        EVENT_ATTEMPT,
+        student.id,
+        course_id=lesson.course_id,
+        lesson_id=lesson.id,
+        task_id=task_id,
+        option_id=body.option_id,
+        is_correct=is_correct,
+    )
     
     # 6) Если ответ правильный, пересчитаем прогресс по курсу
     if is_correct:
@@ -224,32 +314,27 @@ async def submit_answer(
         # Пересчитаем прогресс по курсу
         res = await db.execute(
             select(func.count(LessonCompletion.id))
-            .join(Lesson, Lesson.id == LessonCompletion.lesson_id)
             .where(
                 LessonCompletion.user_id == student.id,
-                Lesson.course_id == lesson.course_id,
+                LessonCompletion.course_id == lesson.course_id,
             )
         )
         lessons_completed = res.scalar_one() or 0
         
         res = await db.execute(
             select(func.count(TaskCompletion.id))
-            .join(Task, Task.id == TaskCompletion.task_id)
-            .join(Lesson, Lesson.id == Task.lesson_id)
             .where(
                 TaskCompletion.user_id == student.id,
-                Lesson.course_id == lesson.course_id,
+                TaskCompletion.course_id == lesson.course_id,
             )
         )
         tasks_completed = res.scalar_one() or 0
         
         res = await db.execute(
             select(func.avg(TaskCompletion.score))
-            .join(Task, Task.id == TaskCompletion.task_id)
-            .join(Lesson, Lesson.id == Task.lesson_id)
             .where(
                 TaskCompletion.user_id == student.id,
-                Lesson.course_id == lesson.course_id,
+                TaskCompletion.course_id == lesson.course_id,
                 TaskCompletion.score.isnot(None),
             )
         )
@@ -279,6 +364,8 @@ async def submit_answer(
             progress.score_avg = score_avg
         
         await db.commit()
+        leaderboard.record(progress)
+        bus.publish(course_progress_key(progress.course_id), progress_update(progress))
         return SubmitAnswerResponse(
             is_correct=True,
             message="Правильный ответ! Задача отмечена как выполненная."
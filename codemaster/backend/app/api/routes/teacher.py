@@ -1,14 +1,29 @@
 # app/api/routes/teacher.py
-from typing import List
+from datetime import date, timedelta
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from pydantic import ValidationError
 from sqlalchemy import select, func
 from sqlalchemy.orm import selectinload
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.database import get_db
 from app.models import User, Course, Lesson, Task, TaskOption, Progress
 from app.core.security import get_current_user  # см. ниже комментарий
+from app.core.invalidation import KEY_CATALOG, bus, course_key, course_progress_key
+from app.services.ownership import ownership
+from app.services.lesson_content import apply_rendered
+from app.services.bulk_enroll import ENROLLED, MAX_BULK_ROWS, enroll_bulk, parse_csv
+from app.services.course_clone import clone_course
+from app.services.funnel import funnel
+from app.services.rollups import course_activity, utc_today
+from app.services.course_snapshots import publish_course, snapshot_published
+from app.schemas.snapshot import CourseSnapshotOut
+from app.services.leaderboard import leaderboard
+from app.services.event_log import event_log
+from app.models.event import EVENT_ENROLL
 from app.schemas.teacher import (
     TeacherCourseCreate,
     TeacherCourseOut,
@@ -18,6 +33,12 @@ from app.schemas.teacher import (
     TeacherTaskOut,
     StudentProgressOut,
     TaskOptionOut,
+    BulkEnrollRequest,
+    BulkEnrollOut,
+    CourseCloneRequest,
+    CourseCloneOut,
+    CourseFunnelOut,
+    DailyActivityOut,
 )
 
 router = APIRouter(prefix="/teacher", tags=["teacher"])
@@ -139,6 +160,8 @@ async def create_course(
     db.add(course)
     await db.commit()
     await db.refresh(course)
+    ownership.add_course(course.id, course.owner_id)
+    bus.publish(KEY_CATALOG)
     return course
 
 
@@ -162,6 +185,116 @@ async def get_course(
     return course
 
 
+@router.post(
+    "/courses/{course_id}/clone",
+    response_model=CourseCloneOut,
+    status_code=status.HTTP_201_CREATED,
+)
+async def clone_teacher_course(
+    course_id: int,
+    payload: Optional[CourseCloneRequest] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_teacher),
+):
+    """
+    Копия своего курса (уроки, задачи, варианты ответов) для нового потока.
+    Копируется в одной транзакции; записи студентов и прогресс не переносятся.
+    """
+    if not await ownership.owns_course(db, current_user.id, course_id):
+        raise HTTPException(status_code=404, detail="Курс не найден")
+    try:
+        result = await clone_course(db, course_id, current_user.id, payload.title if payload else None)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Курс с таким названием уже существует")
+    if result is None:
+        raise HTTPException(status_code=404, detail="Курс не найден")
+    ownership.add_course(result.id, current_user.id)
+    bus.publish(KEY_CATALOG)
+    return result
+
+
+@router.post(
+    "/courses/{course_id}/publish",
+    response_model=CourseSnapshotOut,
+)
+async def publish_teacher_course(
+    course_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_teacher),
+):
+    """
+    Опубликовать черновик курса: уроки, задачи и варианты сохраняются
+    неизменяемым снапшотом, который студенты получают через
+    GET /courses/{id}/content. Правки после публикации студенты увидят
+    только после следующей публикации.
+    """
+    if not await ownership.owns_course(db, current_user.id, course_id):
+        raise HTTPException(status_code=404, detail="Курс не найден")
+    try:
+        result = await publish_course(db, course_id, current_user.id)
+        await db.commit()
+    except IntegrityError:
+        # ту же версию только что опубликовал параллельный запрос
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Курс уже публикуется, повторите запрос")
+    if result is None:
+        raise HTTPException(status_code=404, detail="Курс не найден")
+    if result.created:
+        snapshot_published(course_id, result.version)
+    return result
+
+
+@router.get(
+    "/courses/{course_id}/funnel",
+    response_model=CourseFunnelOut,
+)
+async def get_course_funnel(
+    course_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_teacher),
+):
+    """
+    Воронка курса: по каждому уроку по порядку — сколько записанных студентов
+    его завершили и решали его задачи, и сколько отсеялось с прошлого шага.
+    """
+    if not await ownership.owns_course(db, current_user.id, course_id):
+        raise HTTPException(status_code=404, detail="Курс не найден")
+    return await funnel.get(db, course_id)
+
+
+ACTIVITY_DEFAULT_DAYS = 90
+ACTIVITY_MAX_DAYS = 366
+
+
+@router.get(
+    "/courses/{course_id}/activity",
+    response_model=List[DailyActivityOut],
+)
+async def get_course_activity(
+    course_id: int,
+    since: Optional[date] = Query(None),
+    until: Optional[date] = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_teacher),
+):
+    """
+    Активность курса по дням (UTC) для графиков: по умолчанию последние 90 дней UTC.
+    Читается из дневных свёрток — не больше строки на день.
+    """
+    if not await ownership.owns_course(db, current_user.id, course_id):
+        raise HTTPException(status_code=404, detail="Курс не найден")
+    until = until or utc_today()
+    since = since or until - timedelta(days=ACTIVITY_DEFAULT_DAYS - 1)
+    if since > until or (until - since).days >= ACTIVITY_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Период должен быть от 1 до {ACTIVITY_MAX_DAYS} дней",
+        )
+    return await course_activity(db, course_id, since, until)
+
+
 # ---------- 3. Уроки курса ----------
 
 @router.get(
@@ -174,13 +307,7 @@ async def get_course_lessons(
     current_user: User = Depends(require_teacher),
 ):
     # проверяем, что курс принадлежит преподавателю
-    stmt_course = select(Course).where(
-        Course.id == course_id,
-        Course.owner_id == current_user.id,
-    )
-    res_course = await db.execute(stmt_course)
-    course = res_course.scalar_one_or_none()
-    if not course:
+    if not await ownership.owns_course(db, current_user.id, course_id):
         raise HTTPException(status_code=404, detail="Курс не найден")
 
     stmt = select(Lesson).where(Lesson.course_id == course_id)
@@ -201,13 +328,7 @@ async def create_lesson(
     current_user: User = Depends(require_teacher),
 ):
     # проверяем, что курс принадлежит преподавателю
-    stmt_course = select(Course).where(
-        Course.id == course_id,
-        Course.owner_id == current_user.id,
-    )
-    res_course = await db.execute(stmt_course)
-    course = res_course.scalar_one_or_none()
-    if not course:
+    if not await ownership.owns_course(db, current_user.id, course_id):
         raise HTTPException(status_code=404, detail="Курс не найден")
 
     lesson = Lesson(
@@ -215,9 +336,12 @@ async def create_lesson(
         title=payload.title,
         content=payload.content,
     )
+    apply_rendered(lesson)
     db.add(lesson)
     await db.commit()
     await db.refresh(lesson)
+    ownership.add_lesson(lesson.id, course_id)
+    bus.publish(course_key(course_id))
     return lesson
 
 
@@ -233,17 +357,8 @@ async def get_lesson_tasks(
     current_user: User = Depends(require_teacher),
 ):
     # проверяем, что урок принадлежит курсу преподавателя
-    stmt_lesson = (
-        select(Lesson)
-        .join(Course, Lesson.course_id == Course.id)
-        .where(
-            Lesson.id == lesson_id,
-            Course.owner_id == current_user.id,
-        )
-    )
-    res_lesson = await db.execute(stmt_lesson)
-    lesson = res_lesson.scalar_one_or_none()
-    if not lesson:
+    course_id = await ownership.owned_lesson_course(db, current_user.id, lesson_id)
+    if course_id is None:
         raise HTTPException(status_code=404, detail="Урок не найден")
 
     stmt = select(Task).where(Task.lesson_id == lesson_id).options(selectinload(Task.options))
@@ -264,17 +379,8 @@ async def create_task(
     current_user: User = Depends(require_teacher),
 ):
     # проверяем, что урок принадлежит курсу преподавателя
-    stmt_lesson = (
-        select(Lesson)
-        .join(Course, Lesson.course_id == Course.id)
-        .where(
-            Lesson.id == lesson_id,
-            Course.owner_id == current_user.id,
-        )
-    )
-    res_lesson = await db.execute(stmt_lesson)
-    lesson = res_lesson.scalar_one_or_none()
-    if not lesson:
+    course_id = await ownership.owned_lesson_course(db, current_user.id, lesson_id)
+    if course_id is None:
         raise HTTPException(status_code=404, detail="Урок не найден")
 
     # Если есть варианты ответов, автоматически включаем автопроверку
@@ -303,4 +409,72 @@ async def create_task(
     
     # Загружаем options для возврата
     await db.refresh(task, ["options"])
+    bus.publish(course_key(course_id))
     return task
+
+
+# ---------- 5. Массовая запись студентов на курс ----------
+
+@router.post(
+    "/courses/{course_id}/enroll-bulk",
+    response_model=BulkEnrollOut,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {"schema": BulkEnrollRequest.model_json_schema()},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+            "required": True,
+        }
+    },
+)
+async def enroll_students_bulk(
+    course_id: int,
+    request: Request,
+    cohort: Optional[str] = Query(None, description="Группа; для JSON можно передать в теле"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_teacher),
+):
+    """
+    Записать на курс сразу много студентов: JSON {"emails": [...], "cohort": ...}
+    или CSV (text/csv, колонка email или первая колонка).
+    Возвращает результат по каждой строке; уже записанные не считаются ошибкой.
+    """
+    if not await ownership.owns_course(db, current_user.id, course_id):
+        raise HTTPException(status_code=404, detail="Курс не найден")
+
+    raw = await request.body()
+    if request.headers.get("content-type", "").startswith("text/csv"):
+        emails = parse_csv(raw.decode("utf-8-sig", errors="replace"))
+    else:
+        try:
+            payload = BulkEnrollRequest.model_validate_json(raw)
+        except ValidationError as exc:
+            raise HTTPException(status_code=422, detail=exc.errors(include_url=False))
+        emails, cohort = payload.emails, payload.cohort or cohort
+
+    if len(emails) > MAX_BULK_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Не больше {MAX_BULK_ROWS} строк за один запрос",
+        )
+
+    report = await enroll_bulk(db, course_id, emails, cohort)
+    await db.commit()
+
+    enrolled = [row.user_id for row in report.rows if row.status == ENROLLED]
+    for user_id in enrolled:
+        leaderboard.record(
+            Progress(
+                user_id=user_id,
+                course_id=course_id,
+                lessons_completed=0,
+                tasks_completed=0,
+                score_avg=0.0,
+            )
+        )
+        event_log.emit(EVENT_ENROLL, user_id, course_id=course_id)
+    if enrolled:
+        bus.publish(course_progress_key(course_id))
+    return report
+
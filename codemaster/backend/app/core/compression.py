@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.encoding import choose_encoding, compress
+
+_COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def _is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return (
+        media_type.startswith("text/")
+        or media_type in _COMPRESSIBLE_TYPES
+        or media_type.endswith("+json")
+    )
+
+
+@dataclass
+class CompressionStats:
+    responses: int = 0  # ответы, которые пробовали сжать
+    compressed: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    cpu_seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "responses": self.responses,
+            "compressed": self.compressed,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else 1.0,
+            "cpu_ms_per_compressed": (
+                round(self.cpu_seconds * 1000 / self.compressed, 4) if self.compressed else 0.0
+            ),
+        }
+
+
+compression_stats = CompressionStats()
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+class CompressionMiddleware:
+    """
+    ASGI-middleware: сжимает ответы gzip/brotli по Accept-Encoding клиента.
+    Не трогает ответы меньше порога, не текстовые, потоковые и уже сжатые
+    (например, заранее сжатые записи кеша с Content-Encoding).
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: Optional[int] = None,
+        gzip_level: Optional[int] = None,
+        brotli_quality: Optional[int] = None,
+    ) -> None:
+        settings = get_settings()
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.levels = {
+            "gzip": settings.COMPRESSION_GZIP_LEVEL if gzip_level is None else gzip_level,
+            "br": settings.COMPRESSION_BROTLI_QUALITY if brotli_quality is None else brotli_quality,
+        }
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = _header(scope["headers"], b"accept-encoding")
+        coding = choose_encoding(accept.decode("latin-1") if accept else None)
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[dict] = None
+
+        async def send_wrapper(message) -> None:
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not self._should_compress(start, body):
+                await send(start)
+                await send(message)
+                return
+
+            cpu_started = time.process_time()
+            compressed = compress(body, coding, self.levels[coding])
+            cpu = time.process_time() - cpu_started
+
+            compression_stats.responses += 1
+            if len(compressed) >= len(body):
+                await send(start)
+                await send(message)
+                return
+            compression_stats.compressed += 1
+            compression_stats.bytes_in += len(body)
+            compression_stats.bytes_out += len(compressed)
+            compression_stats.cpu_seconds += cpu
+
+            headers = [
+                (key, value)
+                for key, value in start["headers"]
+                if key.lower() not in (b"content-length", b"vary")
+            ]
+            vary = _header(start["headers"], b"vary")
+            if not vary:
+                vary = b"Accept-Encoding"
+            elif b"accept-encoding" not in vary.lower():
+                vary += b", Accept-Encoding"
+            headers += [
+                (b"content-encoding", coding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", vary),
+            ]
+            await send({**start, "headers": headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _should_compress(self, start: dict, body: bytes) -> bool:
+        if not 200 <= start["status"] < 300 or len(body) < self.minimum_size:
+            return False
+        headers = start.get("headers", [])
+        if _header(headers, b"content-encoding") is not None:
+            return False
+        content_type = _header(headers, b"content-type")
+        return content_type is not None and _is_compressible(content_type.decode("latin-1"))
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+try:
+    import brotli  # необязательная зависимость: без неё отдаём только gzip
+except ImportError:  # pragma: no cover - зависит от окружения
+    brotli = None
+
+# в порядке предпочтения при равных q
+AVAILABLE_ENCODINGS: Tuple[str, ...] = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# уровни для того, что сжимается один раз и раздаётся многократно
+MAX_GZIP_LEVEL = 9
+MAX_BROTLI_QUALITY = 11
+
+
+def gzip_bytes(data: bytes, level: int = MAX_GZIP_LEVEL) -> bytes:
+    """gzip без времени в заголовке: одинаковый вход — одинаковые байты."""
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compress(data: bytes, coding: str, level: Optional[int] = None) -> bytes:
+    if coding == "gzip":
+        return gzip_bytes(data, MAX_GZIP_LEVEL if level is None else level)
+    if coding == "br" and brotli is not None:
+        return brotli.compress(data, quality=MAX_BROTLI_QUALITY if level is None else level)
+    raise ValueError(f"Unsupported content coding: {coding}")
+
+
+def parse_accept_encoding(header: str | None) -> Dict[str, float]:
+    """'gzip;q=0.8, br' -> {'gzip': 0.8, 'br': 1.0}."""
+    accepted: Dict[str, float] = {}
+    for part in (header or "").split(","):
+        coding, *params = [p.strip() for p in part.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.lower()] = q
+    return accepted
+
+
+def accepts_encoding(header: str | None, coding: str) -> bool:
+    accepted = parse_accept_encoding(header)
+    return accepted.get(coding, accepted.get("*", 0.0)) > 0
+
+
+def choose_encoding(
+    header: str | None, available: Sequence[str] = AVAILABLE_ENCODINGS
+) -> Optional[str]:
+    """Лучшее из доступных сжатий по q-значениям клиента; None — отдавать как есть."""
+    accepted = parse_accept_encoding(header)
+    best: Optional[str] = None
+    best_q = 0.0
+    for coding in available:
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Проверка If-None-Match (слабые валидаторы сравниваются как сильные)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+@dataclass(frozen=True)
+class PrecompressedBody:
+    """Тело ответа, заранее сжатое всеми доступными способами."""
+
+    identity: bytes
+    encoded: Dict[str, bytes]
+    etag: str
+
+    @classmethod
+    def build(cls, body: bytes) -> "PrecompressedBody":
+        return cls(
+            identity=body,
+            encoded={coding: compress(body, coding) for coding in AVAILABLE_ENCODINGS},
+            etag=f'"{hashlib.sha256(body).hexdigest()}"',
+        )
+
+    def select(self, accept_encoding: str | None) -> Tuple[bytes, Optional[str]]:
+        coding = choose_encoding(accept_encoding, tuple(self.encoded))
+        if coding is None:
+            return self.identity, None
+        return self.encoded[coding], coding
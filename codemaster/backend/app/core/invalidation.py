@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Соглашение об именах ключей:
+#   catalog                 — список курсов
+#   course:{id}             — структура курса (уроки, задачи, варианты)
+#   progress:course:{id}    — прогресс/статистика студентов по курсу
+#   user:{id}               — данные пользователя
+#   snapshot:course:{id}    — опубликованная версия курса
+#   attempts:partitions     — набор месячных таблиц истории попыток
+KEY_CATALOG = "catalog"
+KEY_ATTEMPT_PARTITIONS = "attempts:partitions"
+
+
+def course_key(course_id: int) -> str:
+    return f"course:{course_id}"
+
+
+def course_progress_key(course_id: int) -> str:
+    return f"progress:course:{course_id}"
+
+
+def course_snapshot_key(course_id: int) -> str:
+    return f"snapshot:course:{course_id}"
+
+
+def user_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def key_id(key: str) -> int:
+    """Числовой id из ключа вида prefix:...:{id}."""
+    return int(key.rsplit(":", 1)[1])
+
+
+@dataclass(frozen=True)
+class Invalidation:
+    key: str
+    version: int
+    origin: str  # id воркера, опубликовавшего сообщение
+    is_local: bool = False  # опубликовано этим же воркером
+    # изменённые данные, если подписчик может применить их вместо сброса (JSON, < 4 КБ)
+    payload: Optional[Dict[str, Any]] = None
+
+
+Handler = Callable[[Invalidation], None]
+
+
+class InvalidationBus:
+    """
+    Шина инвалидации кешей с версионированными ключами.
+    Подписчики получают сообщения по префиксу ключа — и свои, и от других воркеров
+    (свои отличаются по Invalidation.is_local). Сообщения со старой версией
+    ключа отбрасываются — кроме сообщений с payload: это отдельные изменения,
+    а не сброс ключа, и их порядок проверяет подписчик.
+
+    Базовый класс доставляет сообщения только внутри процесса.
+    """
+
+    def __init__(self) -> None:
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._subscribers: List[Tuple[str, Handler]] = []
+        self._versions: Dict[str, int] = {}
+        self._last_version = 0
+
+    def subscribe(self, prefix: str, handler: Handler) -> None:
+        self._subscribers.append((prefix, handler))
+
+    def _next_version(self) -> int:
+        # наносекунды общие для воркеров одного хоста; внутри процесса — строго растут
+        self._last_version = max(time.time_ns(), self._last_version + 1)
+        return self._last_version
+
+    def publish(self, key: str, payload: Optional[Dict[str, Any]] = None) -> Invalidation:
+        """Опубликовать инвалидацию ключа. Вызывать после commit."""
+        message = Invalidation(
+            key=key,
+            version=self._next_version(),
+            origin=self.worker_id,
+            is_local=True,
+            payload=payload,
+        )
+        self._deliver(message)
+        self._send(message)
+        return message
+
+    def _deliver(self, message: Invalidation) -> None:
+        latest = self._versions.get(message.key, 0)
+        if message.version <= latest and message.payload is None:
+            return
+        self._versions[message.key] = max(latest, message.version)
+        for prefix, handler in self._subscribers:
+            if message.key.startswith(prefix):
+                try:
+                    handler(message)
+                except Exception:
+                    logger.exception("Invalidation handler failed for %s", message.key)
+
+    def _send(self, message: Invalidation) -> None:
+        pass
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class UnixSocketBus(InvalidationBus):
+    """
+    Шина для нескольких воркеров на одном хосте.
+    Каждый воркер слушает свой датаграммный Unix-сокет в общем каталоге
+    и рассылает сообщения во все остальные сокеты этого каталога.
+    """
+
+    def __init__(self, directory: str) -> None:
+        super().__init__()
+        self.directory = Path(directory)
+        self.path = self.directory / f"{self.worker_id}.sock"
+        self.sent = 0
+        self.received = 0
+        self.dropped = 0
+        self._sock: socket.socket | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def start(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        sock.bind(str(self.path))
+        self._sock = sock
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(sock.fileno(), self._on_readable)
+
+    async def stop(self) -> None:
+        if self._sock is None:
+            return
+        if self._loop is not None:
+            self._loop.remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        self.path.unlink(missing_ok=True)
+
+    def _on_readable(self) -> None:
+        while self._sock is not None:
+            try:
+                data = self._sock.recv(4096)
+            except (BlockingIOError, InterruptedError):
+                return
+            try:
+                raw = json.loads(data)
+                message = Invalidation(
+                    key=raw["k"], version=int(raw["v"]), origin=raw["o"], payload=raw.get("p")
+                )
+            except (ValueError, KeyError, TypeError):
+                logger.warning("Malformed invalidation datagram dropped")
+                continue
+            self.received += 1
+            self._deliver(message)
+
+    def _send(self, message: Invalidation) -> None:
+        if self._sock is None:
+            return
+        raw = {"k": message.key, "v": message.version, "o": message.origin}
+        if message.payload is not None:
+            raw["p"] = message.payload
+        data = json.dumps(raw).encode()
+        for peer in self.directory.glob("*.sock"):
+            if peer == self.path:
+                continue
+            try:
+                self._sock.sendto(data, str(peer))
+                self.sent += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                # воркер умер и не убрал за собой сокет
+                peer.unlink(missing_ok=True)
+            except (BlockingIOError, OSError):
+                self.dropped += 1
+                logger.warning("Invalidation for %s not delivered to %s", message.key, peer.name)
+
+
+def create_bus() -> InvalidationBus:
+    settings = get_settings()
+    if settings.INVALIDATION_BACKEND == "unix":
+        return UnixSocketBus(settings.INVALIDATION_SOCKET_DIR)
+    return InvalidationBus()
+
+
+bus = create_bus()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import html
+import re
+from typing import List
+
+# Небольшое подмножество markdown для текстов уроков: заголовки, абзацы,
+# списки, цитаты, блоки кода, горизонтальная черта; внутри строки — `код`,
+# **жирный**, *курсив* и ссылки. Сырой HTML не пропускается: весь текст
+# экранируется до разметки, поэтому результат безопасно вставлять как есть.
+
+_FENCE = re.compile(r"^\s*```\s*([\w+#.-]*)\s*$")
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_HR = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+_UL = re.compile(r"^\s*[-*+]\s+(.*)$")
+_OL = re.compile(r"^\s*\d+[.)]\s+(.*)$")
+_QUOTE = re.compile(r"^\s*&gt;\s?(.*)$")
+
+_CODE_SPAN = re.compile(r"(`+)(.+?)\1")
+_LINK = re.compile(r"\[([^\]]+)\]\(([^)\s]+)\)")
+_BOLD = re.compile(r"\*\*(?=\S)(.+?)(?<=\S)\*\*|__(?=\S)(.+?)(?<=\S)__")
+_ITALIC = re.compile(r"(?<![\w*])\*(?=\S)(.+?)(?<=\S)\*(?![\w*])|(?<!\w)_(?=\S)(.+?)(?<=\S)_(?!\w)")
+_PLACEHOLDER = re.compile("\x00(\\d+)\x00")
+
+_SAFE_SCHEMES = ("http", "https", "mailto")
+
+
+def _safe_url(url: str) -> bool:
+    scheme, sep, _ = url.partition(":")
+    # относительные ссылки и якоря — можно; схема — только из белого списка
+    if not sep or "/" in scheme or "?" in scheme or "#" in scheme:
+        return True
+    return scheme.lower() in _SAFE_SCHEMES
+
+
+def _inline(text: str) -> str:
+    """Разметка внутри строки; text уже экранирован."""
+    spans: List[str] = []
+
+    def stash(value: str) -> str:
+        spans.append(value)
+        return f"\x00{len(spans) - 1}\x00"
+
+    text = _CODE_SPAN.sub(lambda m: stash(f"<code>{m.group(2).strip()}</code>"), text)
+
+    def link(m: re.Match) -> str:
+        label, url = m.group(1), m.group(2)
+        if not _safe_url(html.unescape(url)):
+            return label
+        return stash(f'<a href="{url}" rel="nofollow noopener">') + label + stash("</a>")
+
+    text = _LINK.sub(link, text)
+    text = _BOLD.sub(lambda m: f"<strong>{m.group(1) or m.group(2)}</strong>", text)
+    text = _ITALIC.sub(lambda m: f"<em>{m.group(1) or m.group(2)}</em>", text)
+    return _PLACEHOLDER.sub(lambda m: spans[int(m.group(1))], text)
+
+
+def render_markdown(source: str | None) -> str:
+    """Markdown урока -> безопасный HTML."""
+    out: List[str] = []
+    paragraph: List[str] = []
+    list_tag: str | None = None
+    list_items: List[str] = []
+    quote: List[str] = []
+    code: List[str] | None = None
+    code_lang = ""
+
+    def flush() -> None:
+        nonlocal list_tag
+        if paragraph:
+            out.append("<p>" + _inline(" ".join(paragraph)) + "</p>")
+            paragraph.clear()
+        if list_tag is not None:
+            items = "".join(f"<li>{_inline(item)}</li>" for item in list_items)
+            out.append(f"<{list_tag}>{items}</{list_tag}>")
+            list_tag = None
+            list_items.clear()
+        if quote:
+            out.append("<blockquote><p>" + _inline(" ".join(quote)) + "</p></blockquote>")
+            quote.clear()
+
+    def close_code() -> None:
+        lang = f' class="language-{code_lang}"' if code_lang else ""
+        out.append(f"<pre><code{lang}>" + "\n".join(code or []) + "</code></pre>")
+
+    text = (source or "").replace("\x00", "").replace("\r\n", "\n")
+    for raw in text.split("\n"):
+        if code is not None:
+            closing = _FENCE.match(raw)
+            if closing and not closing.group(1):
+                close_code()
+                code = None
+            else:
+                code.append(html.escape(raw))
+            continue
+
+        fence = _FENCE.match(raw)
+        if fence:
+            flush()
+            code, code_lang = [], html.escape(fence.group(1))
+            continue
+
+        line = html.escape(raw.rstrip())
+        if not line.strip():
+            flush()
+            continue
+
+        heading = _HEADING.match(line)
+        if heading:
+            flush()
+            level = len(heading.group(1))
+            out.append(f"<h{level}>{_inline(heading.group(2))}</h{level}>")
+            continue
+        if _HR.match(line):
+            flush()
+            out.append("<hr>")
+            continue
+
+        for tag, pattern in (("ul", _UL), ("ol", _OL)):
+            item = pattern.match(line)
+            if item:
+                if list_tag != tag:
+                    flush()
+                    list_tag = tag
+                list_items.append(item.group(1))
+                break
+        else:
+            quoted = _QUOTE.match(line)
+            if quoted:
+                if not quote:
+                    flush()
+                quote.append(quoted.group(1))
+            elif list_tag is not None and raw[:1].isspace():
+                # продолжение пункта списка с отступом
+                list_items[-1] += " " + line.strip()
+            else:
+                if list_tag is not None or quote:
+                    flush()
+                paragraph.append(line.strip())
+
+    if code is not None:
+        # незакрытый блок кода — закрываем в конце текста
+        close_code()
+    flush()
+    return "\n".join(out)
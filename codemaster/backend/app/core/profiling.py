@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import cProfile
+import os
+import pstats
+import re
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.security import bearer_payload
+
+PROFILE_HEADER = b"x-profile"
+
+_SLUG = re.compile(r"[^A-Za-z0-9]+")
+
+
+def top_frames(stats: pstats.Stats, limit: int) -> List[str]:
+    """Самые горячие функции по собственному времени: 'func (file:line) 12.3ms'."""
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+    frames = []
+    for (filename, line, func), (_cc, _nc, tottime, _ct, _callers) in rows:
+        if filename == "~" or "cProfile" in filename:
+            continue  # встроенные функции без файла и сам профайлер
+        frames.append(f"{func} ({Path(filename).name}:{line}) {tottime * 1000:.1f}ms")
+        if len(frames) >= limit:
+            break
+    return frames
+
+
+class ProfilingMiddleware:
+    """
+    ASGI-middleware: запрос с заголовком X-Profile: 1 от преподавателя
+    выполняется под cProfile. Профиль пишется в PROFILE_DIR (.prof, открывается
+    snakeviz или pstats), горячие функции — в заголовки X-Profile-*.
+    Подключается только при PROFILING_ENABLED — иначе его нет в цепочке вовсе.
+
+    cProfile видит весь поток, поэтому одновременно профилируется один запрос,
+    а в профиль попадают и конкурентные корутины этого воркера.
+    """
+
+    def __init__(self, app, directory: Optional[str] = None, top: Optional[int] = None) -> None:
+        settings = get_settings()
+        self.app = app
+        self.directory = Path(directory or settings.PROFILE_DIR)
+        self.top = settings.PROFILE_TOP_FRAMES if top is None else top
+        self._busy = False
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not self._requested(scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+        if self._busy:
+            await self.app(scope, receive, self._with_headers(send, [(b"x-profile-status", b"busy")]))
+            return
+
+        messages: List[dict] = []
+
+        async def buffer(message) -> None:
+            messages.append(message)
+
+        self._busy = True
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            profile.enable()
+            try:
+                await self.app(scope, receive, buffer)
+            finally:
+                profile.disable()
+        finally:
+            self._busy = False
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        path = self._dump(profile, scope)
+        stats = pstats.Stats(profile)
+        headers = [
+            (b"x-profile-status", b"ok"),
+            (b"x-profile-file", path.name.encode("latin-1", "replace")),
+            (b"x-profile-total-ms", f"{elapsed_ms:.1f}".encode()),
+            (b"x-profile-top", "; ".join(top_frames(stats, self.top)).encode("latin-1", "replace")),
+        ]
+        send_with_headers = self._with_headers(send, headers)
+        for message in messages:
+            await send_with_headers(message)
+
+    def _requested(self, headers: List[Tuple[bytes, bytes]]) -> bool:
+        if not any(name == PROFILE_HEADER and value.strip() not in (b"", b"0") for name, value in headers):
+            return False
+        payload = bearer_payload(headers)
+        return bool(payload and payload.get("is_teacher"))
+
+    def _dump(self, profile: cProfile.Profile, scope) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        slug = _SLUG.sub("-", scope["path"]).strip("-") or "root"
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{scope['method']}-{slug}.prof"
+        path = self.directory / name
+        profile.dump_stats(path)
+        return path
+
+    @staticmethod
+    def _with_headers(send, extra: List[Tuple[bytes, bytes]]):
+        async def wrapped(message) -> None:
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + extra}
+            await send(message)
+
+        return wrapped
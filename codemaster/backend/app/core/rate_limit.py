@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import json
+import math
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.security import bearer_payload
+
+settings = get_settings()
+
+_PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0}
+
+
+@dataclass
+class TokenBucket:
+    capacity: float
+    refill_per_second: float
+    tokens: float
+    updated_at: float
+
+    def take(self, now: float) -> float:
+        """
+        Забрать один токен. Возвращает 0, если токен есть,
+        иначе — через сколько секунд он появится.
+        """
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated_at = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.refill_per_second
+
+
+@dataclass(frozen=True)
+class RateRule:
+    """Лимит запросов: rate токенов в секунду, запас burst, ключ — пользователь или IP."""
+
+    name: str
+    method: Optional[str]
+    path: str  # регулярное выражение по пути
+    rate: float
+    burst: int
+    per: str = "user"  # user | ip (для анонимных запросов user == ip)
+    pattern: re.Pattern = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "pattern", re.compile(self.path))
+
+    def matches(self, method: str, path: str) -> bool:
+        return (self.method is None or self.method == method) and bool(self.pattern.match(path))
+
+
+@dataclass(frozen=True)
+class ConcurrencyRule:
+    """Не больше limit одновременных запросов класса (без ожидания — сразу 503)."""
+
+    name: str
+    method: Optional[str]
+    path: str
+    limit: int
+    pattern: re.Pattern = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "pattern", re.compile(self.path))
+
+    def matches(self, method: str, path: str) -> bool:
+        return (self.method is None or self.method == method) and bool(self.pattern.match(path))
+
+
+# сводки преподавателя: прогресс студентов, список курсов, воронка и активность курса
+_TEACHER_AGGREGATES = r"^/teacher/(students-progress|courses|courses/\d+/(funnel|activity))$"
+
+DEFAULT_RATE_RULES: List[RateRule] = [
+    # argon2 на каждый вход — ограничиваем по IP, подбор пароля тоже упирается сюда
+    RateRule("login", "POST", r"^/auth/login$", rate=10 / 60, burst=10, per="ip"),
+    RateRule("register", "POST", r"^/auth/register$", rate=5 / 60, burst=5, per="ip"),
+    RateRule("submit-answer", "POST", r"^/tasks/\d+/submit-answer$", rate=1.0, burst=10),
+    RateRule("teacher-aggregates", "GET", _TEACHER_AGGREGATES, rate=0.5, burst=10),
+    RateRule("api", None, r"^/(?!health)", rate=20.0, burst=60),
+]
+
+DEFAULT_CONCURRENCY_RULES: List[ConcurrencyRule] = [
+    ConcurrencyRule("password-hashing", "POST", r"^/auth/(login|register)$", limit=4),
+    ConcurrencyRule("teacher-aggregates", "GET", _TEACHER_AGGREGATES, limit=2),
+]
+
+
+def parse_rate(value: str) -> Tuple[float, int]:
+    """'10/minute' -> (10/60 токенов в секунду, burst=10)."""
+    count, _, period = value.partition("/")
+    amount = float(count)
+    seconds = _PERIODS[period.strip() or "second"]
+    return amount / seconds, max(1, math.ceil(amount))
+
+
+def configured_rate_rules() -> List[RateRule]:
+    rules = []
+    for rule in DEFAULT_RATE_RULES:
+        override = settings.RATE_LIMITS.get(rule.name)
+        if override:
+            rate, burst = parse_rate(override)
+            rule = replace(rule, rate=rate, burst=burst)
+        rules.append(rule)
+    return rules
+
+
+def configured_concurrency_rules() -> List[ConcurrencyRule]:
+    return [
+        replace(rule, limit=settings.CONCURRENCY_LIMITS.get(rule.name, rule.limit))
+        for rule in DEFAULT_CONCURRENCY_RULES
+    ]
+
+
+def _user_id_from_headers(headers: List[Tuple[bytes, bytes]]) -> Optional[str]:
+    """sub из bearer-токена."""
+    payload = bearer_payload(headers)
+    if payload is None:
+        return None
+    sub = payload.get("sub")
+    return str(sub) if sub is not None else None
+
+
+def client_ip(scope, trusted_proxies: FrozenSet[str]) -> str:
+    """
+    IP клиента. Если соединение пришло от доверенного прокси, берётся самый
+    правый адрес X-Forwarded-For, не принадлежащий доверенным прокси: левее
+    него цепочку мог дописать сам клиент. От остальных заголовок игнорируется.
+    """
+    client = scope.get("client")
+    ip = client[0] if client else "unknown"
+    if ip not in trusted_proxies:
+        return ip
+    hops = [
+        hop.strip()
+        for name, value in scope["headers"]
+        if name == b"x-forwarded-for"
+        for hop in value.decode("latin-1").split(",")
+        if hop.strip()
+    ]
+    for hop in reversed(hops):
+        if hop not in trusted_proxies:
+            return hop
+    return hops[0] if hops else ip
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI-middleware: token bucket по пользователю/IP для каждого правила
+    и ограничение одновременных запросов для дорогих классов эндпоинтов.
+    Отказы (429/503) формируются здесь же и не доходят до БД.
+    """
+
+    def __init__(
+        self,
+        app,
+        rate_rules: Optional[List[RateRule]] = None,
+        concurrency_rules: Optional[List[ConcurrencyRule]] = None,
+        max_buckets: int = 100_000,
+        trusted_proxies: Optional[Iterable[str]] = None,
+    ) -> None:
+        self.app = app
+        self.rate_rules = configured_rate_rules() if rate_rules is None else rate_rules
+        self.concurrency_rules = (
+            configured_concurrency_rules() if concurrency_rules is None else concurrency_rules
+        )
+        self.max_buckets = max_buckets
+        self.trusted_proxies = frozenset(
+            settings.RATE_LIMIT_TRUSTED_PROXIES if trusted_proxies is None else trusted_proxies
+        )
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self._in_flight: Dict[str, int] = {}
+        self.rejected: Dict[str, int] = {}
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], scope["path"]
+        ip = client_ip(scope, self.trusted_proxies)
+        user_id: Optional[str] = None
+        user_resolved = False
+
+        now = time.monotonic()
+        for rule in self.rate_rules:
+            if not rule.matches(method, path):
+                continue
+            if rule.per == "user" and not user_resolved:
+                user_id = _user_id_from_headers(scope["headers"])
+                user_resolved = True
+            identity = f"user:{user_id}" if rule.per == "user" and user_id else f"ip:{ip}"
+            retry_after = self._bucket(rule, identity, now).take(now)
+            if retry_after > 0:
+                await self._reject(send, rule.name, 429, "Too many requests", retry_after)
+                return
+
+        rule = next((r for r in self.concurrency_rules if r.matches(method, path)), None)
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        if self._in_flight.get(rule.name, 0) >= rule.limit:
+            await self._reject(send, rule.name, 503, "Server is busy, retry later", 1.0)
+            return
+        self._in_flight[rule.name] = self._in_flight.get(rule.name, 0) + 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._in_flight[rule.name] -= 1
+
+    def _bucket(self, rule: RateRule, identity: str, now: float) -> TokenBucket:
+        key = (rule.name, identity)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(
+                capacity=rule.burst,
+                refill_per_second=rule.rate,
+                tokens=rule.burst,
+                updated_at=now,
+            )
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_buckets:
+                # вытесняем самый давно использованный; полный бакет ничего не теряет
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    async def _reject(self, send, rule_name: str, status_code: int, detail: str, retry_after: float) -> None:
+        self.rejected[rule_name] = self.rejected.get(rule_name, 0) + 1
+        body = json.dumps({"detail": detail}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status_code,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.invalidation import Invalidation, bus, key_id
+from app.models.revocation import TokenRevocation
+
+settings = get_settings()
+
+REFRESH_SECONDS = 3600  # раз в час фильтр пересобирается, чтобы выкинуть истёкшие записи
+
+
+def jti_key(jti: str) -> str:
+    return f"auth:jti:{jti}"
+
+
+def revoked_user_key(user_id: int) -> str:
+    return f"auth:user:{user_id}"
+
+
+class BloomFilter:
+    """Фильтр Блума: 'точно нет' или 'возможно да' при фиксированном объёме памяти."""
+
+    def __init__(self, size_bits: int = 1 << 20, hashes: int = 7) -> None:
+        self.size_bits = size_bits
+        self.hashes = hashes
+        self._bits = bytearray(size_bits // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size_bits
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+def _timestamp(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class RevocationList:
+    """
+    Отозванные токены в памяти воркера.
+    Отзыв одного токена (по jti) — фильтр Блума, положительный ответ
+    подтверждается по таблице token_revocations (это редкость).
+    Отзыв всех токенов пользователя — точный словарь user_id -> момент отзыва.
+    """
+
+    def __init__(self) -> None:
+        self._bloom = BloomFilter()
+        self._users: Dict[int, float] = {}
+        self._recent_jtis: set[str] = set()  # добавленные с последней загрузки
+        self._loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < REFRESH_SECONDS:
+            return
+        async with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < REFRESH_SECONDS:
+                return
+            res = await db.execute(
+                select(TokenRevocation.jti, TokenRevocation.user_id, TokenRevocation.revoked_at).where(
+                    TokenRevocation.expires_at > datetime.utcnow()
+                )
+            )
+            bloom = BloomFilter()
+            users: Dict[int, float] = {}
+            for row in res.all():
+                if row.jti is not None:
+                    bloom.add(row.jti)
+                elif row.user_id is not None:
+                    users[row.user_id] = max(users.get(row.user_id, 0.0), _timestamp(row.revoked_at))
+            # отзывы, пришедшие во время загрузки, не теряем
+            for jti in self._recent_jtis:
+                bloom.add(jti)
+            horizon = time.time() - settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+            for user_id, before in self._users.items():
+                if before > horizon:
+                    users[user_id] = max(users.get(user_id, 0.0), before)
+            self._bloom, self._users = bloom, users
+            self._recent_jtis = set()
+            self._loaded_at = time.monotonic()
+
+    def add_jti(self, jti: str) -> None:
+        self._bloom.add(jti)
+        self._recent_jtis.add(jti)
+
+    def add_user(self, user_id: int, before: float) -> None:
+        self._users[user_id] = max(self._users.get(user_id, 0.0), before)
+
+    async def is_revoked(self, db: AsyncSession, payload: Dict[str, Any]) -> bool:
+        await self.ensure_loaded(db)
+
+        before = self._users.get(int(payload["sub"]))
+        if before is not None and float(payload.get("iat", 0)) <= before:
+            return True
+
+        jti = payload.get("jti")
+        if jti is None or jti not in self._bloom:
+            return False
+        res = await db.execute(select(TokenRevocation.id).where(TokenRevocation.jti == jti))
+        return res.scalar_one_or_none() is not None
+
+    async def revoke_token(self, db: AsyncSession, payload: Dict[str, Any]) -> None:
+        """Отозвать один токен (logout)."""
+        jti = payload.get("jti")
+        user_id = int(payload["sub"])
+        if jti is None:
+            # токены, выданные до появления jti, можно отозвать только все сразу
+            await self.revoke_user(db, user_id)
+            return
+        res = await db.execute(select(TokenRevocation.id).where(TokenRevocation.jti == jti))
+        if res.scalar_one_or_none() is None:
+            db.add(
+                TokenRevocation(
+                    jti=jti,
+                    user_id=user_id,
+                    expires_at=datetime.fromtimestamp(payload["exp"], timezone.utc).replace(tzinfo=None),
+                )
+            )
+            await db.commit()
+        self.add_jti(jti)
+        bus.publish(jti_key(jti))
+
+    async def revoke_user(self, db: AsyncSession, user_id: int) -> None:
+        """Отозвать все токены пользователя, выданные до этого момента (logout-all, деактивация)."""
+        now = datetime.utcnow()
+        db.add(
+            TokenRevocation(
+                user_id=user_id,
+                revoked_at=now,
+                expires_at=now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+            )
+        )
+        await db.commit()
+        self.add_user(user_id, _timestamp(now))
+        bus.publish(revoked_user_key(user_id))
+
+
+revocations = RevocationList()
+
+
+def _on_jti_revoked(message: Invalidation) -> None:
+    if not message.is_local:
+        revocations.add_jti(message.key.rsplit(":", 1)[1])
+
+
+def _on_user_revoked(message: Invalidation) -> None:
+    if not message.is_local:
+        # версия сообщения — время публикации (нс), оно не раньше момента отзыва
+        revocations.add_user(key_id(message.key), message.version / 1e9)
+
+
+bus.subscribe("auth:jti:", _on_jti_revoked)
+bus.subscribe("auth:user:", _on_user_revoked)
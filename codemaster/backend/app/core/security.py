@@ -1,7 +1,10 @@
 ﻿from __future__ import annotations
 
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 
 import jwt
 from fastapi import Depends, HTTPException, status
@@ -13,6 +16,7 @@ from sqlalchemy import select
 from app.core.config import get_settings
 from app.db.database import get_db
 from app.models.user import User
+from app.core.revocation import revocations
 
 settings = get_settings()
 
@@ -26,6 +30,10 @@ ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
 
+# Проверенные токены: повторный jwt.decode для того же токена не нужен до его exp
+TOKEN_CACHE_SIZE = 10_000
+_verified_tokens: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -40,19 +48,65 @@ def create_access_token(data: Dict[str, Any], expires_minutes: int | None = None
     expire = datetime.now(timezone.utc) + timedelta(
         minutes=expires_minutes or ACCESS_TOKEN_EXPIRE_MINUTES
     )
-    to_encode.update({"exp": expire})
+    # jti — для отзыва конкретного токена, iat (с долями секунды) — для отзыва
+    # всех токенов пользователя, выданных до момента logout-all
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def decode_token(token: str) -> Dict[str, Any]:
+def verify_token(token: str) -> Dict[str, Any] | None:
+    """
+    Payload проверенного токена или None.
+    Результат запоминается до exp, возвращаемый dict менять нельзя.
+    """
+    payload = _verified_tokens.get(token)
+    if payload is not None:
+        if payload["exp"] > time.time():
+            _verified_tokens.move_to_end(token)
+            return payload
+        del _verified_tokens[token]
+        return None
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except jwt.PyJWTError:
+        return None
+    _verified_tokens[token] = payload
+    if len(_verified_tokens) > TOKEN_CACHE_SIZE:
+        _verified_tokens.popitem(last=False)
+    return payload
+
+
+def bearer_payload(headers: List[Tuple[bytes, bytes]]) -> Optional[Dict[str, Any]]:
+    """
+    Payload bearer-токена из сырых ASGI-заголовков: только проверка подписи,
+    без обращения к БД (для middleware, которым нужен пользователь до маршрута).
+    """
+    for name, value in headers:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            return verify_token(token)
+    return None
+
+
+def decode_token(token: str) -> Dict[str, Any]:
+    payload = verify_token(token)
+    if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         )
+    return payload
+
+
+def user_from_claims(user_id: int, payload: Dict[str, Any]) -> User:
+    """
+    Пользователь по claims токена, без запроса к БД (stateless-режим).
+    Объект не привязан к сессии: в нём есть только id и роль.
+    """
+    return User(id=user_id, is_teacher=bool(payload.get("is_teacher")), is_active=True)
 
 
 async def get_current_user(
@@ -76,6 +130,18 @@ async def get_current_user(
             detail="Invalid token subject",
         )
 
+    # logout / деактивация: проверка в памяти, в БД идём только при срабатывании фильтра
+    if await revocations.is_revoked(db, payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+        )
+
+    if settings.AUTH_STATELESS:
+        # роль берём из claims; is_active обеспечивается отзывом всех токенов
+        # при деактивации (app/services/accounts.py: deactivate_user)
+        return user_from_claims(user_id, payload)
+
     res = await db.execute(select(User).where(User.id == user_id))
     user = res.scalar_one_or_none()
     if not user:
@@ -127,6 +193,10 @@ async def get_current_user_optional(
             user_id = int(sub)
         except ValueError:
             return None
+        if await revocations.is_revoked(db, payload):
+            return None
+        if settings.AUTH_STATELESS:
+            return user_from_claims(user_id, payload)
         res = await db.execute(select(User).where(User.id == user_id))
         user = res.scalar_one_or_none()
         if not user or not user.is_active:
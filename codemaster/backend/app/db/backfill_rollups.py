@@ -0,0 +1,39 @@
+"""
+Пересчёт дневных свёрток активности по курсам за прошлые дни.
+
+    python -m app.db.backfill_rollups --since 2026-01-01
+    python -m app.db.backfill_rollups --since 2026-01-01 --until 2026-03-31
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import date
+from typing import Optional
+
+from app.db.database import AsyncSessionLocal
+# ВАЖНО: импортируем модели, чтобы связи между ними были настроены
+from app import models  # noqa: F401
+from app.services.rollups import backfill
+
+
+async def run(since: date, until: Optional[date]) -> int:
+    async with AsyncSessionLocal() as db:
+        rows = await backfill(db, since, until)
+        await db.commit()
+    print(f"{rows} course-days rebuilt")
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--since", type=date.fromisoformat, required=True, help="первый день, YYYY-MM-DD")
+    parser.add_argument(
+        "--until", type=date.fromisoformat, default=None, help="последний день включительно (по умолчанию вчера)"
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args.since, args.until))
+
+
+if __name__ == "__main__":
+    main()
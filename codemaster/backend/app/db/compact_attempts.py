@@ -0,0 +1,47 @@
+"""
+Свёртка старых месяцев истории попыток в attempt_summaries.
+
+    python -m app.db.compact_attempts --dry-run      # только показать, что будет свёрнуто
+    python -m app.db.compact_attempts --keep-months 3
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from typing import Optional
+
+from app.core.invalidation import bus
+from app.db.database import AsyncSessionLocal
+# ВАЖНО: импортируем модели, чтобы связи между ними были настроены
+from app import models  # noqa: F401
+from app.services.attempt_history import compact
+
+
+async def run(dry_run: bool, keep_months: Optional[int]) -> int:
+    # об удалённых таблицах работающие воркеры узнают по шине
+    await bus.start()
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await compact(db, keep_months=keep_months, dry_run=dry_run)
+    finally:
+        await bus.stop()
+    for name, attempts in result.items():
+        print(f"{name}: {attempts} attempts{' (dry run)' if dry_run else ' compacted'}")
+    print(f"{len(result)} partitions {'to compact' if dry_run else 'compacted'}")
+    return len(result)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="только отчёт, без записи")
+    parser.add_argument(
+        "--keep-months", type=int, default=None, help="месяцев подробной истории (по умолчанию ATTEMPT_HISTORY_MONTHS)"
+    )
+    args = parser.parse_args()
+    if args.keep_months is not None and args.keep_months < 1:
+        parser.error("--keep-months must be at least 1: the current month is still being written")
+    asyncio.run(run(args.dry_run, args.keep_months))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,20 +4,36 @@ from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessi
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy import text
 from app.core.config import get_settings
+from app.db.slow_queries import SlowQueryLog
 
 settings = get_settings()
 
 class Base(DeclarativeBase):
     pass
 
+# размеры пула — только для серверных БД: SQLite (тесты) работает без QueuePool
+_pool_args = (
+    {}
+    if settings.DATABASE_URL.startswith("sqlite")
+    else {"pool_size": 5, "max_overflow": 10}
+)
+
 engine: AsyncEngine = create_async_engine(
     settings.DATABASE_URL,
     echo=False,
     future=True,
-    pool_size=5,
-    max_overflow=10,
     pool_pre_ping=True,  # проверяем соединение перед использованием
+    **_pool_args,
+)
+
+# всё дольше SLOW_QUERY_MS — в лог и в сводку по отпечаткам SQL
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_MS,
+    explain=settings.SLOW_QUERY_EXPLAIN,
+    max_fingerprints=settings.SLOW_QUERY_MAX_FINGERPRINTS,
 )
+if settings.SLOW_QUERY_LOG_ENABLED:
+    slow_query_log.install(engine.sync_engine)
 
 AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
@@ -0,0 +1,44 @@
+"""
+Деактивация пользователя: вход запрещается, выданные токены отзываются.
+
+    python -m app.db.deactivate_user --email student@example.com
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from sqlalchemy import select
+
+from app.core.invalidation import bus
+from app.db.database import AsyncSessionLocal
+# ВАЖНО: импортируем модели, чтобы связи между ними были настроены
+from app import models  # noqa: F401
+from app.models.user import User
+from app.services.accounts import deactivate_user
+
+
+async def run(email: str) -> bool:
+    # отзыв рассылается работающим воркерам по шине
+    await bus.start()
+    try:
+        async with AsyncSessionLocal() as db:
+            user_id = (await db.execute(select(User.id).where(User.email == email))).scalar_one_or_none()
+            if user_id is None or not await deactivate_user(db, user_id):
+                print(f"user {email} not found")
+                return False
+    finally:
+        await bus.stop()
+    print(f"user {email} (id={user_id}) deactivated, tokens revoked")
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--email", required=True, help="email пользователя")
+    args = parser.parse_args()
+    asyncio.run(run(args.email))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Пересчёт таблицы progress из lesson_completions и task_completions.
+
+    python -m app.db.rebuild_progress --dry-run      # только показать расхождения
+    python -m app.db.rebuild_progress --batch-size 200
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from app.core.invalidation import bus, course_progress_key
+from app.db.database import AsyncSessionLocal
+# ВАЖНО: импортируем модели, чтобы связи между ними были настроены
+from app import models  # noqa: F401
+from app.services.progress_rebuild import Drift, apply_fixes, find_drift
+
+
+def _format(drift: Drift) -> str:
+    want = drift.expected
+    if drift.stored is None:
+        return (
+            f"user={drift.user_id} course={drift.course_id}: missing row -> "
+            f"lessons={want.lessons_completed} tasks={want.tasks_completed} score={want.score_avg:.3f}"
+        )
+    have = drift.stored
+    return (
+        f"user={drift.user_id} course={drift.course_id}: "
+        f"lessons {have.lessons_completed}->{want.lessons_completed}, "
+        f"tasks {have.tasks_completed}->{want.tasks_completed}, "
+        f"score {have.score_avg:.3f}->{want.score_avg:.3f}"
+    )
+
+
+async def rebuild(dry_run: bool, batch_size: int) -> int:
+    async with AsyncSessionLocal() as db:
+        drifts = await find_drift(db)
+        for drift in drifts:
+            print(_format(drift))
+        print(f"{len(drifts)} drifted progress rows")
+        if dry_run or not drifts:
+            return len(drifts)
+
+        fixed = await apply_fixes(db, drifts, batch_size=batch_size)
+        print(f"{len(fixed)} progress rows rewritten")
+
+    # сообщаем работающим воркерам, что рейтинги этих курсов устарели
+    await bus.start()
+    try:
+        for course_id in sorted({d.course_id for d in fixed}):
+            bus.publish(course_progress_key(course_id))
+    finally:
+        await bus.stop()
+    return len(drifts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="только отчёт, без записи")
+    parser.add_argument("--batch-size", type=int, default=500, help="пользователей на одну транзакцию")
+    args = parser.parse_args()
+    asyncio.run(rebuild(args.dry_run, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import time
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# ASGI scope текущего запроса: шаблон маршрута Starlette кладёт в scope
+# уже после роутинга, поэтому храним сам scope и читаем route при записи
+current_scope: ContextVar[Optional[dict]] = ContextVar("current_scope", default=None)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.$])-?\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"\$\d+|%\(\w+\)s|(?<![:\w]):\w+\b|\?")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_ROWS = re.compile(r"(\(\?\.\.\.\))(?:\s*,\s*\(\?\.\.\.\))+")
+_SPACES = re.compile(r"\s+")
+
+_STARTED = "slow_query_started"
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Текст запроса без значений: литералы и параметры -> ?,
+    списки IN (...) и строки VALUES любой длины — в одну форму.
+    """
+    sql = _STRING.sub("?", statement)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PARAM.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(?...)", sql)
+    sql = _VALUES_ROWS.sub(r"\1, ...", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def _shape(value: Any) -> str:
+    return "null" if value is None else type(value).__name__
+
+
+def param_shape(parameters: Any, executemany: bool) -> str:
+    """Типы параметров без значений: 'int, str' или '50 x (int, str)'."""
+    if executemany:
+        rows = list(parameters or [])
+        return f"{len(rows)} x ({param_shape(rows[0], False)})" if rows else "0 x ()"
+    if isinstance(parameters, dict):
+        return ", ".join(f"{key}: {_shape(value)}" for key, value in parameters.items())
+    if isinstance(parameters, (list, tuple)):
+        shapes = [_shape(value) for value in parameters]
+        # длинные списки параметров (IN по сотне id) сворачиваем в счётчики
+        if len(shapes) > 8:
+            return ", ".join(f"{name} x {count}" for name, count in Counter(shapes).items())
+        return ", ".join(shapes)
+    return _shape(parameters)
+
+
+def _route(scope: Optional[dict]) -> str:
+    if scope is None:
+        return "-"
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path", "?")
+    return f"{scope.get('method', '')} {path}".strip()
+
+
+@dataclass
+class SlowStatement:
+    fingerprint: str
+    statement: str
+    params: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_ms: float = 0.0
+    first_seen: float = 0.0
+    last_seen: float = 0.0
+    routes: Counter = field(default_factory=Counter)
+    plan: Optional[List[str]] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "statement": self.statement,
+            "params": self.params,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 2),
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "last_ms": round(self.last_ms, 2),
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "routes": dict(self.routes.most_common(5)),
+            "plan": self.plan,
+        }
+
+
+class SlowQueryLog:
+    """
+    Журнал медленных запросов воркера: всё дольше threshold_ms пишется в лог
+    и сводится по отпечатку нормализованного SQL. Для первого медленного
+    SELECT с новым отпечатком снимается план (EXPLAIN / EXPLAIN QUERY PLAN)
+    на том же соединении — это стоит один лишний запрос на отпечаток.
+    """
+
+    def __init__(self, threshold_ms: float, explain: bool = True, max_fingerprints: int = 500) -> None:
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.max_fingerprints = max_fingerprints
+        self._statements: "OrderedDict[str, SlowStatement]" = OrderedDict()
+        self.slow = 0
+
+    def install(self, engine: Engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+        event.listen(engine, "handle_error", self._failed)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault(_STARTED, []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        started = conn.info[_STARTED].pop()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms >= self.threshold_ms:
+            self.record(conn, statement, parameters, executemany, elapsed_ms)
+
+    def _failed(self, context) -> None:
+        # упавший запрос не доходит до after_cursor_execute — снимаем его отметку
+        conn = context.connection
+        if conn is not None and conn.info.get(_STARTED):
+            conn.info[_STARTED].pop()
+
+    def record(self, conn, statement: str, parameters: Any, executemany: bool, elapsed_ms: float) -> None:
+        normalized = normalize_sql(statement)
+        key = fingerprint(normalized)
+        route = _route(current_scope.get())
+        params = param_shape(parameters, executemany)
+        logger.warning(
+            "Slow query %.1f ms [%s] %s: %s (params: %s)", elapsed_ms, key, route, normalized, params
+        )
+
+        now = time.time()
+        self.slow += 1
+        entry = self._statements.get(key)
+        if entry is None:
+            entry = SlowStatement(key, normalized, params, first_seen=now)
+            self._statements[key] = entry
+            if len(self._statements) > self.max_fingerprints:
+                self._statements.popitem(last=False)
+            if self.explain and not executemany and _is_select(normalized):
+                entry.plan = _explain(conn, statement, parameters)
+        else:
+            self._statements.move_to_end(key)
+        entry.count += 1
+        entry.total_ms += elapsed_ms
+        entry.max_ms = max(entry.max_ms, elapsed_ms)
+        entry.last_ms = elapsed_ms
+        entry.last_seen = now
+        entry.routes[route] += 1
+
+    def top(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Отпечатки по суммарному времени."""
+        entries = sorted(self._statements.values(), key=lambda e: e.total_ms, reverse=True)
+        return [entry.as_dict() for entry in entries[:limit]]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threshold_ms": self.threshold_ms,
+            "slow_statements": self.slow,
+            "fingerprints": len(self._statements),
+        }
+
+    def reset(self) -> None:
+        self._statements.clear()
+        self.slow = 0
+
+
+def _is_select(normalized: str) -> bool:
+    head = normalized[:6].upper()
+    return head.startswith("SELECT") or head.startswith("WITH")
+
+
+def _explain(conn, statement: str, parameters: Any) -> Optional[List[str]]:
+    """
+    План запроса тем же DBAPI-курсором в обход событий SQLAlchemy.
+    В PostgreSQL ошибка обрывает транзакцию, поэтому там EXPLAIN идёт
+    под SAVEPOINT; сбой снятия плана запрос не ломает.
+    """
+    sqlite = conn.dialect.name == "sqlite"
+    prefix = "EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN "
+    cursor = conn.connection.cursor()
+    try:
+        if not sqlite:
+            cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        except Exception:
+            if not sqlite:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            raise
+        finally:
+            if not sqlite:
+                cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    except Exception:
+        logger.exception("EXPLAIN failed for slow query")
+        return None
+    finally:
+        cursor.close()
+    # SQLite: (id, parent, notused, detail); PostgreSQL: одна колонка с текстом строки плана
+    return [str(row[-1]) for row in rows]
+
+
+class QueryRouteMiddleware:
+    """ASGI-middleware: делает scope запроса видимым журналу медленных запросов."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_scope.reset(token)
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from functools import lru_cache
+from pathlib import Path
+
+from sqlalchemy import text
+
+from app.db.database import engine
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]  # .../backend
+
+
+@lru_cache
+def get_alembic_heads() -> tuple[str, ...]:
+    """
+    Head-ревизии из каталога миграций.
+    alembic импортируем лениво: в режиме create_all он на старте не нужен.
+    """
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    cfg = Config(str(BACKEND_DIR / "alembic.ini"))
+    cfg.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    return tuple(sorted(ScriptDirectory.from_config(cfg).get_heads()))
+
+
+async def get_db_revisions() -> tuple[str, ...]:
+    async with engine.connect() as conn:
+        res = await conn.execute(text("SELECT version_num FROM alembic_version"))
+        return tuple(sorted(row[0] for row in res.all()))
+
+
+class Readiness:
+    """
+    Состояние готовности приложения (отдельно от liveness).
+    В режиме check_migrations приложение начинает принимать трафик сразу,
+    а готовым считается только когда ревизия БД совпала с head миграций.
+    """
+
+    def __init__(self) -> None:
+        self.ready = False
+        self.reason: str | None = "starting"
+        self.revision: str | None = None
+        self._task: asyncio.Task | None = None
+
+    def mark_ready(self, revision: str | None = None) -> None:
+        self.ready = True
+        self.reason = None
+        self.revision = revision
+
+    def mark_not_ready(self, reason: str) -> None:
+        self.ready = False
+        self.reason = reason
+
+    async def check_migrations(self) -> bool:
+        heads = get_alembic_heads()
+        try:
+            current = await get_db_revisions()
+        except Exception as e:
+            self.mark_not_ready(f"database unavailable or not migrated: {e.__class__.__name__}")
+            return False
+        if current != heads:
+            self.mark_not_ready(
+                f"database revision {','.join(current) or '-'} != head {','.join(heads)}"
+            )
+            return False
+        self.mark_ready(",".join(current))
+        return True
+
+    def start_watch(self, interval: float = 2.0) -> None:
+        """Проверять ревизию в фоне, пока она не совпадёт с head (не блокируя старт)."""
+
+        async def watch() -> None:
+            while not await self.check_migrations():
+                logger.warning("Not ready: %s", self.reason)
+                await asyncio.sleep(interval)
+
+        self._task = asyncio.create_task(watch())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    async def ping(self, timeout: float = 1.0) -> bool:
+        try:
+            async with asyncio.timeout(timeout):
+                async with engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+
+
+readiness = Readiness()
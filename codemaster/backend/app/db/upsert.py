@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+from sqlalchemy import Table
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.dml import Insert
+
+
+def dialect_insert(db: AsyncSession, table: Table) -> Insert:
+    """INSERT с поддержкой ON CONFLICT (on_conflict_do_nothing/do_update) для диалекта сессии."""
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"ON CONFLICT is not supported for {dialect}")
+    return insert(table)
+
+
+def insert_ignore(db: AsyncSession, table: Table, conflict_columns: Sequence[str]) -> Insert:
+    """
+    INSERT ... ON CONFLICT (conflict_columns) DO NOTHING для диалекта сессии.
+    Вставленные строки можно получить через .returning(...).
+    """
+    return dialect_insert(db, table).on_conflict_do_nothing(index_elements=list(conflict_columns))
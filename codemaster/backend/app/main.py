@@ -2,12 +2,21 @@
 from fastapi.middleware.cors import CORSMiddleware
 
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 
 from app.core.config import get_settings
-from app.api.routes import auth, courses, lessons, tasks, progress, teacher
+from app.api.routes import auth, courses, lessons, tasks, progress, teacher, reviews, metrics
 
-from app.db.init_db import init_models
 from app.db.database import wait_for_db  # если делали ожидание БД
+from app.db.startup import readiness
+from app.core.invalidation import bus
+from app.core.rate_limit import AdmissionControlMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.db.slow_queries import QueryRouteMiddleware
+from app.services.event_log import event_log
+from app.services.scheduler import scheduler
+from app.services import jobs  # noqa: F401  регистрирует обработчики фоновых задач
 from app.core.security import get_current_user
 app = FastAPI(title=get_settings().APP_NAME)
 
@@ -16,6 +25,22 @@ origins = [
     "http://127.0.0.1:5173",
 ]
 
+# профилировщик — только само приложение, без сжатия и лимитов
+if get_settings().PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# сжатие — ближе к приложению: лимиты и CORS видят уже готовый ответ
+if get_settings().COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# маршрут запроса для журнала медленных запросов
+if get_settings().SLOW_QUERY_LOG_ENABLED:
+    app.add_middleware(QueryRouteMiddleware)
+
+# лимиты добавляем до CORS, чтобы ответы 429/503 тоже получали CORS-заголовки
+if get_settings().RATE_LIMIT_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -26,20 +51,64 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def on_startup():
-    # опционально, если есть wait_for_db
-    await wait_for_db()
-    await init_models()
+    await bus.start()
+    await event_log.start()
+
+    mode = get_settings().DB_STARTUP_MODE
+    if mode == "check_migrations":
+        # схемой управляет Alembic: не ждём БД и не вызываем create_all,
+        # готовность выставится в фоне, когда ревизия совпадёт с head
+        readiness.start_watch()
+    elif mode == "skip":
+        readiness.mark_ready()
+    else:
+        from app.db.init_db import init_models
+
+        await wait_for_db()
+        await init_models()
+        readiness.mark_ready()
+
+    if get_settings().JOBS_ENABLED:
+        await scheduler.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    # сначала дописываем журнал событий и отпускаем фоновые задачи, пока БД и шина ещё доступны
+    await scheduler.stop()
+    await event_log.stop()
+    await readiness.stop()
+    await bus.stop()
 
 
 @app.get("/health")
 async def health():
+    """Liveness: процесс жив и обслуживает запросы, БД не трогаем."""
     return {"status": "ok"}
 
 
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness: схема БД актуальна и БД отвечает."""
+    if not readiness.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "not_ready", "reason": readiness.reason},
+        )
+    if not await readiness.ping():
+        return JSONResponse(
+            status_code=503,
+            content={"status": "not_ready", "reason": "database unavailable"},
+        )
+    return {"status": "ready", "revision": readiness.revision}
+
+
 app.include_router(auth.router)
 app.include_router(courses.router)
 app.include_router(lessons.router)
 app.include_router(tasks.router)
 app.include_router(progress.router)
 app.include_router(teacher.router)  # НОВОЕ
+app.include_router(reviews.router)
+app.include_router(metrics.router)
 
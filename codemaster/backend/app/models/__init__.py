@@ -6,4 +6,12 @@ from .lesson import Lesson
 from .task import Task, TaskOption
 
 from .progress import Progress, LessonCompletion, TaskCompletion
+from .review import ReviewSchedule
+from .revocation import TokenRevocation
+from .event import LearningEvent
+from .cohort import Cohort, CohortMember
 
+from .snapshot import CourseSnapshot
+from .attempt import AttemptSummary
+from .rollup import DailyCourseActivity, DailyActiveStudent
+from .job import BackgroundJob
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import re
+from datetime import date, datetime
+from typing import Dict, Optional
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    MetaData,
+    Table,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.database import Base
+
+# Подробная история попыток лежит в помесячных таблицах attempts_YYYY_MM.
+# Их нет в Base.metadata: таблица создаётся при первой записи за месяц
+# и удаляется целиком после свёртки в attempt_summaries.
+PARTITION_PREFIX = "attempts_"
+_PARTITION_NAME = re.compile(r"^attempts_(\d{4})_(\d{2})$")
+
+partition_metadata = MetaData()
+_partitions: Dict[str, Table] = {}
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month.year:04d}_{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Месяц таблицы-партиции по имени; None — это не партиция попыток."""
+    match = _PARTITION_NAME.match(name)
+    if match is None:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def attempt_partition(month: date) -> Table:
+    """Core-таблица попыток за месяц (одна на имя, без внешних ключей — как в learning_events)."""
+    name = partition_name(month)
+    table = _partitions.get(name)
+    if table is None:
+        table = Table(
+            name,
+            partition_metadata,
+            Column("id", Integer, primary_key=True, autoincrement=True),
+            Column("user_id", Integer, nullable=False),
+            Column("course_id", Integer, nullable=True),
+            Column("lesson_id", Integer, nullable=True),
+            Column("task_id", Integer, nullable=False),
+            Column("option_id", Integer, nullable=True),
+            Column("is_correct", Boolean, nullable=True),
+            Column("created_at", DateTime, nullable=False),
+            Index(f"ix_{name}_user_task", "user_id", "task_id", "created_at"),
+        )
+        _partitions[name] = table
+    return table
+
+
+class AttemptSummary(Base):
+    """
+    Свёртка старых попыток: одна строка на (студент, задача).
+    Пополняется задачей свёртки, когда месячная партиция уходит из окна
+    хранения; более свежие попытки — в самих партициях.
+    """
+
+    __tablename__ = "attempt_summaries"
+    __table_args__ = (
+        UniqueConstraint("user_id", "task_id", name="uq_attempt_summary_user_task"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    task_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    course_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, index=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    correct_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    first_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    last_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    last_option_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    last_is_correct: Mapped[Optional[bool]] = mapped_column(Boolean, nullable=True)
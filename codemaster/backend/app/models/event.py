@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Index, Integer, String, Boolean, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.database import Base
+
+EVENT_ATTEMPT = "attempt"
+EVENT_LESSON_COMPLETE = "lesson_complete"
+EVENT_ENROLL = "enroll"
+
+
+class LearningEvent(Base):
+    """
+    Журнал учебных событий (только добавление).
+    Внешних ключей нет намеренно: вставки пачками дешевле,
+    а история переживает удаление курсов и задач.
+    """
+
+    __tablename__ = "learning_events"
+    __table_args__ = (
+        Index("ix_learning_events_user_created", "user_id", "created_at"),
+        Index("ix_learning_events_course_created", "course_id", "created_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String(32), nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    course_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    lesson_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    task_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    option_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    is_correct: Mapped[Optional[bool]] = mapped_column(Boolean, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
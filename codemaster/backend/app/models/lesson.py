@@ -2,7 +2,7 @@
 
 from typing import List, Optional
 
-from sqlalchemy import Integer, String, Text, ForeignKey
+from sqlalchemy import Integer, String, Text, ForeignKey, LargeBinary
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.database import Base
@@ -15,6 +15,12 @@ class Lesson(Base):
     course_id: Mapped[int] = mapped_column(ForeignKey("courses.id"), nullable=False)
     title: Mapped[str] = mapped_column(String, nullable=False)
     content: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # content, отрендеренный в HTML при записи и сжатый gzip; в списках не грузится
+    content_html_gz: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True, deferred=True)
+    # sha256 HTML — ETag для кеширования на клиенте
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    # урок-источник, если курс получен клонированием (app/services/course_clone.py)
+    cloned_from_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, index=True)
 
     course: Mapped["Course"] = relationship(
         "Course",
@@ -6,6 +6,7 @@ from typing import Optional, List
 from sqlalchemy import (
     ForeignKey,
     UniqueConstraint,
+    Index,
     Integer,
     Float,
     DateTime,
@@ -37,11 +38,14 @@ class LessonCompletion(Base):
     __tablename__ = "lesson_completions"
     __table_args__ = (
         UniqueConstraint("user_id", "lesson_id", name="uq_lesson_completion"),
+        Index("ix_lesson_completions_user_course", "user_id", "course_id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     lesson_id: Mapped[int] = mapped_column(ForeignKey("lessons.id"), nullable=False)
+    # денормализовано из lessons.course_id: агрегаты по курсу без join'ов
+    course_id: Mapped[int] = mapped_column(ForeignKey("courses.id"), nullable=False)
     completed_at: Mapped[datetime] = mapped_column(
         DateTime,
         default=datetime.utcnow,
@@ -61,11 +65,14 @@ class TaskCompletion(Base):
     __tablename__ = "task_completions"
     __table_args__ = (
         UniqueConstraint("user_id", "task_id", name="uq_task_completion"),
+        Index("ix_task_completions_user_course", "user_id", "course_id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id"), nullable=False)
+    # денормализовано из tasks -> lessons.course_id
+    course_id: Mapped[int] = mapped_column(ForeignKey("courses.id"), nullable=False)
     completed_at: Mapped[datetime] = mapped_column(
         DateTime,
         default=datetime.utcnow,
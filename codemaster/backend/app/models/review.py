@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import (
+    ForeignKey,
+    UniqueConstraint,
+    Index,
+    Integer,
+    Float,
+    DateTime,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.database import Base
+
+
+class ReviewSchedule(Base):
+    """
+    Расписание повторения задачи студентом (алгоритм SM-2).
+    Одна строка на пару (студент, задача).
+    """
+
+    __tablename__ = "review_schedules"
+    __table_args__ = (
+        UniqueConstraint("user_id", "task_id", name="uq_review_schedule"),
+        # выборка "что пора повторить" — диапазон по due_at внутри студента
+        Index("ix_review_schedules_user_due", "user_id", "due_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    task_id: Mapped[int] = mapped_column(
+        ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False
+    )
+
+    repetitions: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    interval_days: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    easiness: Mapped[float] = mapped_column(Float, default=2.5, nullable=False)
+
+    due_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    last_reviewed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_quality: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
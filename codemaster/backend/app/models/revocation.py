@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import ForeignKey, String, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.database import Base
+
+
+class TokenRevocation(Base):
+    """
+    Отозванные токены (stateless-режим авторизации).
+    jti — отзыв одного токена (logout); user_id без jti — отзыв всех токенов
+    пользователя, выданных до revoked_at (logout-all, деактивация).
+    """
+
+    __tablename__ = "token_revocations"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    jti: Mapped[Optional[str]] = mapped_column(String(64), unique=True, index=True, nullable=True)
+    user_id: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"), index=True, nullable=True)
+    revoked_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    # после этого момента все затронутые токены истекли сами, запись можно удалять
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True, nullable=False)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from datetime import date
+
+from sqlalchemy import Date, Integer, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.database import Base
+
+
+class DailyCourseActivity(Base):
+    """
+    Активность по курсу за день (UTC): строка на (день, курс).
+    Счётчики прибавляются при сбросе журнала событий, прошлые дни
+    пересчитываются python -m app.db.backfill_rollups.
+    """
+
+    __tablename__ = "daily_course_activity"
+    __table_args__ = (
+        UniqueConstraint("course_id", "day", name="uq_daily_course_activity"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    course_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    active_students: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    lessons_completed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    tasks_attempted: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    tasks_correct: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class DailyActiveStudent(Base):
+    """Кто был активен в курсе в этот день — для счёта уникальных студентов без пересчёта."""
+
+    __tablename__ = "daily_active_students"
+    __table_args__ = (
+        UniqueConstraint("course_id", "day", "user_id", name="uq_daily_active_student"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    course_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
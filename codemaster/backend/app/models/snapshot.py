@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import (
+    ForeignKey,
+    UniqueConstraint,
+    Integer,
+    String,
+    DateTime,
+    LargeBinary,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.database import Base
+
+
+class CourseSnapshot(Base):
+    """
+    Опубликованная версия курса: уроки, задачи и варианты одним JSON (gzip).
+    Строка не меняется после вставки; студентам отдаётся последняя версия,
+    черновик остаётся в обычных таблицах и правится через /teacher.
+    """
+
+    __tablename__ = "course_snapshots"
+    __table_args__ = (
+        UniqueConstraint("course_id", "version", name="uq_course_snapshot_version"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    course_id: Mapped[int] = mapped_column(
+        ForeignKey("courses.id", ondelete="CASCADE"), nullable=False
+    )
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    content_gz: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    # sha256 несжатого JSON — ETag и проверка "ничего не изменилось"
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    published_by: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"), nullable=True)
+    published_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
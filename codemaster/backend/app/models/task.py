@@ -12,6 +12,8 @@ class Task(Base):
     body = Column(Text, nullable=True)
 
     has_autocheck = Column(Boolean, default=False)
+    # задача-источник, если курс получен клонированием
+    cloned_from_id = Column(Integer, nullable=True, index=True)
 
     lesson = relationship("Lesson", back_populates="tasks")
 
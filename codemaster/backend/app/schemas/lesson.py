@@ -10,6 +10,15 @@ class LessonOut(BaseModel):
     course_id: int
     title: str
     content: str | None = None
+    content_hash: str | None = None  # ETag для GET /lessons/{id}/html
     is_completed: bool = False  # Завершен ли урок студентом
     class Config:
         from_attributes = True
+
+class LessonSummaryOut(BaseModel):
+    """Урок для оглавления (view=summary): без content."""
+    id: int
+    course_id: int
+    title: str
+    content_hash: str | None = None
+    is_completed: bool = False
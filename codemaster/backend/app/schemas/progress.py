@@ -33,4 +33,33 @@ class CourseWithProgressOut(BaseModel):
     total_tasks: int = 0  # Общее количество заданий в курсе
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ResumeCourseOut(BaseModel):
+    course_id: int
+    course_title: str
+    # первый незавершённый урок курса
+    next_lesson_id: int | None = None
+    next_lesson_title: str | None = None
+    # первая нерешённая задача (может быть и в уже завершённом уроке)
+    next_task_id: int | None = None
+    next_task_title: str | None = None
+    next_task_lesson_id: int | None = None
+    completed: bool = False  # всё пройдено и решено
+
+
+class LeaderboardEntryOut(BaseModel):
+    rank: int
+    user_id: int
+    lessons_completed: int
+    tasks_completed: int
+    score_avg: float
+
+
+class LeaderboardOut(BaseModel):
+    course_id: int
+    total: int  # Сколько студентов в рейтинге курса
+    top: list[LeaderboardEntryOut] = []
+    me: LeaderboardEntryOut | None = None  # Место текущего пользователя
+    neighbours: list[LeaderboardEntryOut] = []  # Соседи по рейтингу (включая себя)
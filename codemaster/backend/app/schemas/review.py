@@ -0,0 +1,12 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+from app.schemas.task import TaskOut
+
+
+class DueReviewOut(BaseModel):
+    task: TaskOut
+    due_at: datetime
+    repetitions: int
+    interval_days: int
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class SnapshotOptionOut(BaseModel):
+    id: int
+    text: str
+    is_correct: bool
+
+
+class SnapshotTaskOut(BaseModel):
+    id: int
+    title: str
+    body: Optional[str] = None
+    has_autocheck: bool
+    options: List[SnapshotOptionOut] = []
+
+
+class SnapshotLessonOut(BaseModel):
+    id: int
+    title: str
+    content: Optional[str] = None
+    content_hash: Optional[str] = None  # ETag для GET /lessons/{id}/html
+    tasks: List[SnapshotTaskOut] = []
+
+
+class CourseContentOut(BaseModel):
+    """Тело снапшота: курс целиком, как его видит студент (без отметок о выполнении)."""
+
+    course_id: int
+    version: int
+    title: str
+    description: Optional[str] = None
+    published_at: datetime
+    lessons: List[SnapshotLessonOut] = []
+
+
+class CourseSnapshotOut(BaseModel):
+    """Результат публикации (без тела снапшота)."""
+
+    course_id: int
+    version: int
+    content_hash: str
+    size_bytes: int
+    compressed_bytes: int
+    published_at: datetime
+    created: bool  # False — содержимое не менялось, осталась прежняя версия
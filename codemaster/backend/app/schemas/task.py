@@ -1,4 +1,5 @@
 ﻿from pydantic import BaseModel
+from datetime import datetime
 from typing import List, Optional
 
 class TaskOptionOut(BaseModel):
@@ -26,9 +27,37 @@ class TaskOut(BaseModel):
     class Config:
         from_attributes = True
 
+class TaskSummaryOut(BaseModel):
+    """Задача для оглавления (view=summary): без body и вариантов ответа."""
+    id: int
+    lesson_id: int
+    title: str
+    has_autocheck: bool
+    selected_option_id: Optional[int] = None
+    is_completed: bool = False
+
 class SubmitAnswerRequest(BaseModel):
     option_id: int
 
 class SubmitAnswerResponse(BaseModel):
     is_correct: bool
     message: str
+
+class AttemptOut(BaseModel):
+    option_id: Optional[int] = None
+    is_correct: Optional[bool] = None
+    created_at: datetime
+
+class AttemptSummaryOut(BaseModel):
+    """Свёрнутые попытки старше окна подробной истории."""
+    attempts: int
+    correct_attempts: int
+    first_attempt_at: datetime
+    last_attempt_at: datetime
+    class Config:
+        from_attributes = True
+
+class AttemptHistoryOut(BaseModel):
+    task_id: int
+    recent: List[AttemptOut] = []  # новые сверху
+    older: Optional[AttemptSummaryOut] = None
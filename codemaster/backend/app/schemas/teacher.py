@@ -1,4 +1,5 @@
 # app/schemas/teacher.py
+from datetime import date
 from typing import Optional, List
 from pydantic import BaseModel, field_validator
 
@@ -102,3 +103,76 @@ class StudentProgressOut(BaseModel):
     lessons_completed: int
     tasks_completed: int
     score_avg: Optional[float]
+
+
+# ---------- Массовая запись на курс ----------
+
+class BulkEnrollRequest(BaseModel):
+    emails: List[str]
+    cohort: Optional[str] = None  # имя группы; создаётся, если её ещё нет
+
+
+class BulkEnrollRowOut(BaseModel):
+    row: int  # номер строки во входных данных, с 1
+    email: str
+    # enrolled | already_enrolled | not_found | not_student | invalid | duplicate
+    status: str
+    user_id: Optional[int] = None
+
+
+class BulkEnrollOut(BaseModel):
+    course_id: int
+    cohort_id: Optional[int] = None
+    enrolled: int = 0
+    already_enrolled: int = 0
+    failed: int = 0
+    rows: List[BulkEnrollRowOut] = []
+
+
+# ---------- Клонирование курса ----------
+
+class CourseCloneRequest(BaseModel):
+    title: Optional[str] = None  # по умолчанию "<название> (копия)"
+
+
+class CourseCloneOut(BaseModel):
+    id: int
+    title: str
+    source_course_id: int
+    lessons: int = 0
+    tasks: int = 0
+    options: int = 0
+
+
+# ---------- Воронка прохождения ----------
+
+class FunnelTaskOut(BaseModel):
+    task_id: int
+    title: str
+    completed: int  # студентов, решавших задачу
+
+
+class FunnelLessonOut(BaseModel):
+    lesson_id: int
+    title: str
+    position: int  # номер урока в курсе, с 1
+    completed: int  # студентов, завершивших урок
+    completion_rate: float  # доля от записанных на курс
+    drop_off: int  # на сколько меньше, чем на предыдущем шаге (для первого — от записанных)
+    tasks: List[FunnelTaskOut] = []
+
+
+class CourseFunnelOut(BaseModel):
+    course_id: int
+    enrolled: int
+    lessons: List[FunnelLessonOut] = []
+
+
+# ---------- Активность по дням ----------
+
+class DailyActivityOut(BaseModel):
+    day: date
+    active_students: int = 0  # уникальных студентов с попыткой или завершённым уроком
+    lessons_completed: int = 0
+    tasks_attempted: int = 0
+    tasks_correct: int = 0
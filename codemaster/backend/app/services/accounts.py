@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.revocation import revocations
+from app.models.user import User
+
+
+async def deactivate_user(db: AsyncSession, user_id: int) -> bool:
+    """
+    Деактивировать пользователя и отозвать все его токены.
+    В режиме AUTH_STATELESS строка users на запрос не читается, поэтому
+    без отзыва уже выданные токены работали бы до своего exp.
+    Коммитит сама (как и отзыв). False — пользователя нет.
+    """
+    res = await db.execute(update(User).where(User.id == user_id).values(is_active=False))
+    if res.rowcount == 0:
+        return False
+    await db.commit()
+    await revocations.revoke_user(db, user_id)
+    return True
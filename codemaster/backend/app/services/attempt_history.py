@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import case, func, inspect, insert, literal, select, text, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import CreateIndex, CreateTable, DropTable
+
+from app.core.config import get_settings
+from app.core.invalidation import KEY_ATTEMPT_PARTITIONS, Invalidation, bus
+from app.db.upsert import dialect_insert
+from app.models.attempt import (
+    AttemptSummary,
+    attempt_partition,
+    partition_month,
+    partition_name,
+)
+
+REGISTRY_TTL = 60.0  # секунд: партиции, созданные другими воркерами, видны не позже
+
+
+def month_of(moment: date) -> date:
+    return date(moment.year, moment.month, 1)
+
+
+def months_back(month: date, count: int) -> date:
+    """Первое число месяца, отстоящего от month на count месяцев назад."""
+    index = month.year * 12 + month.month - 1 - count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def retention_cutoff(keep_months: int, today: Optional[date] = None) -> date:
+    """Первый месяц окна хранения из keep_months месяцев, включая текущий (по UTC)."""
+    return months_back(month_of(today or datetime.now(timezone.utc).date()), keep_months - 1)
+
+
+class PartitionRegistry:
+    """
+    Какие месячные таблицы попыток есть в БД — чтобы читать только их.
+    Список перечитывается раз в REGISTRY_TTL секунд; свои создания и удаления
+    учитываются сразу.
+    """
+
+    def __init__(self) -> None:
+        self._names: Set[str] = set()
+        self._loaded_at: Optional[float] = None
+
+    async def names(self, db: AsyncSession) -> Set[str]:
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at > REGISTRY_TTL:
+            tables = await db.run_sync(lambda session: inspect(session.connection()).get_table_names())
+            self._names = {name for name in tables if partition_month(name) is not None}
+            self._loaded_at = now
+        return self._names
+
+    def known(self, name: str) -> bool:
+        return name in self._names
+
+    def add(self, name: str) -> None:
+        self._names.add(name)
+
+    def discard(self, name: str) -> None:
+        self._names.discard(name)
+
+    def invalidate(self) -> None:
+        self._names = set()
+        self._loaded_at = None
+
+
+partitions = PartitionRegistry()
+
+
+def _on_partitions_invalidated(message: Invalidation) -> None:
+    # свои удаления уже учтены через discard()
+    if not message.is_local:
+        partitions.invalidate()
+
+
+bus.subscribe(KEY_ATTEMPT_PARTITIONS, _on_partitions_invalidated)
+
+
+async def ensure_partition(db: AsyncSession, month: date) -> None:
+    """
+    Создать таблицу месяца, если её нет (в транзакции вызывающего).
+    На PostgreSQL одновременные CREATE TABLE IF NOT EXISTS из двух воркеров
+    могут упасть на уникальности pg_type, поэтому создание сериализуется
+    advisory-блокировкой по имени таблицы до конца транзакции: второй
+    воркер дождётся commit первого и увидит готовую таблицу.
+    """
+    name = partition_name(month)
+    if partitions.known(name):
+        return
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": name})
+    table = attempt_partition(month)
+    await db.execute(CreateTable(table, if_not_exists=True))
+    for index in table.indexes:
+        await db.execute(CreateIndex(index, if_not_exists=True))
+    partitions.add(name)
+
+
+async def write_attempts(db: AsyncSession, attempts: List[Dict[str, Any]]) -> None:
+    """
+    Записать попытки в таблицы их месяцев (в транзакции вызывающего).
+    Вызывается из сброса журнала событий, т.е. пачками.
+    """
+    attempts = sorted(attempts, key=lambda a: a["created_at"])
+    try:
+        for month, rows in groupby(attempts, key=lambda a: month_of(a["created_at"])):
+            await ensure_partition(db, month)
+            await db.execute(insert(attempt_partition(month)), list(rows))
+    except Exception:
+        # таблицу могла удалить свёртка в другом воркере — перепроверим при повторе
+        partitions.invalidate()
+        raise
+
+
+@dataclass
+class Attempt:
+    task_id: int
+    option_id: Optional[int]
+    is_correct: Optional[bool]
+    created_at: datetime
+
+
+async def recent_attempts(
+    db: AsyncSession, user_id: int, task_id: Optional[int] = None, limit: int = 50
+) -> List[Attempt]:
+    """Последние попытки студента из партиций окна хранения: один UNION ALL."""
+    # месяцы старше окна сворачивает и удаляет compact, возможно в другом воркере:
+    # его реестр мог ещё помнить их таблицы, а в UNION ALL они не нужны
+    cutoff = retention_cutoff(get_settings().ATTEMPT_HISTORY_MONTHS)
+    names = sorted(
+        (name for name in await partitions.names(db) if partition_month(name) >= cutoff),
+        reverse=True,
+    )
+    if not names:
+        return []
+    selects = []
+    for name in names:
+        table = attempt_partition(partition_month(name))
+        stmt = select(table.c.task_id, table.c.option_id, table.c.is_correct, table.c.created_at).where(
+            table.c.user_id == user_id
+        )
+        if task_id is not None:
+            stmt = stmt.where(table.c.task_id == task_id)
+        selects.append(stmt)
+    query = union_all(*selects).subquery()
+    res = await db.execute(select(query).order_by(query.c.created_at.desc()).limit(limit))
+    return [Attempt(**row._mapping) for row in res.all()]
+
+
+async def attempt_summary(db: AsyncSession, user_id: int, task_id: int) -> Optional[AttemptSummary]:
+    res = await db.execute(
+        select(AttemptSummary).where(
+            AttemptSummary.user_id == user_id, AttemptSummary.task_id == task_id
+        )
+    )
+    return res.scalar_one_or_none()
+
+
+async def compact_partition(db: AsyncSession, month: date) -> int:
+    """
+    Свернуть месяц в attempt_summaries и удалить его таблицу.
+    Свёртка идёт от старых месяцев к новым, поэтому last_* из свежей партиции
+    перекрывают накопленные. Возвращает число свёрнутых попыток; commit — снаружи.
+    """
+    table = attempt_partition(month)
+    total = (await db.execute(select(func.count()).select_from(table))).scalar_one()
+
+    by_pair = [table.c.user_id, table.c.task_id]
+    ranked = select(
+        table.c.user_id,
+        table.c.task_id,
+        table.c.course_id,
+        table.c.option_id,
+        table.c.is_correct,
+        func.row_number()
+        .over(partition_by=by_pair, order_by=[table.c.created_at.desc(), table.c.id.desc()])
+        .label("rn"),
+        func.count().over(partition_by=by_pair).label("attempts"),
+        func.sum(case((table.c.is_correct, 1), else_=0)).over(partition_by=by_pair).label("correct"),
+        func.min(table.c.created_at).over(partition_by=by_pair).label("first_at"),
+        func.max(table.c.created_at).over(partition_by=by_pair).label("last_at"),
+    ).subquery()
+
+    summaries = AttemptSummary.__table__
+    stmt = dialect_insert(db, summaries).from_select(
+        [
+            "user_id",
+            "task_id",
+            "course_id",
+            "attempts",
+            "correct_attempts",
+            "first_attempt_at",
+            "last_attempt_at",
+            "last_option_id",
+            "last_is_correct",
+        ],
+        select(
+            ranked.c.user_id,
+            ranked.c.task_id,
+            ranked.c.course_id,
+            ranked.c.attempts,
+            ranked.c.correct,
+            ranked.c.first_at,
+            ranked.c.last_at,
+            ranked.c.option_id,
+            ranked.c.is_correct,
+        ).where(ranked.c.rn == literal(1)),
+    )
+    new, old = stmt.excluded, summaries.c
+    newer = new.last_attempt_at >= old.last_attempt_at
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "task_id"],
+        set_={
+            "attempts": old.attempts + new.attempts,
+            "correct_attempts": old.correct_attempts + new.correct_attempts,
+            "first_attempt_at": case(
+                (new.first_attempt_at < old.first_attempt_at, new.first_attempt_at),
+                else_=old.first_attempt_at,
+            ),
+            "last_attempt_at": case((newer, new.last_attempt_at), else_=old.last_attempt_at),
+            "last_option_id": case((newer, new.last_option_id), else_=old.last_option_id),
+            "last_is_correct": case((newer, new.last_is_correct), else_=old.last_is_correct),
+            "course_id": func.coalesce(new.course_id, old.course_id),
+        },
+    )
+    await db.execute(stmt)
+    await db.execute(DropTable(table, if_exists=True))
+    partitions.discard(table.name)
+    return total
+
+
+async def compact(
+    db: AsyncSession,
+    keep_months: Optional[int] = None,
+    today: Optional[date] = None,
+    dry_run: bool = False,
+) -> Dict[str, int]:
+    """
+    Свернуть все месяцы старше окна хранения (keep_months, включая текущий).
+    Каждый месяц — своя транзакция: прерванная свёртка продолжится со следующего.
+    Месяц считается по UTC, как и created_at попыток. Об удалённых таблицах
+    остальные воркеры узнают по шине инвалидации.
+    """
+    keep = get_settings().ATTEMPT_HISTORY_MONTHS if keep_months is None else keep_months
+    if keep < 1:
+        # текущий месяц ещё пишется — его таблицу сворачивать нельзя
+        raise ValueError("keep_months must be at least 1")
+    cutoff = retention_cutoff(keep, today)
+    partitions.invalidate()
+    expired = sorted(
+        month for month in map(partition_month, await partitions.names(db)) if month < cutoff
+    )
+    result: Dict[str, int] = {}
+    for month in expired:
+        if dry_run:
+            table = attempt_partition(month)
+            result[table.name] = (await db.execute(select(func.count()).select_from(table))).scalar_one()
+            continue
+        result[partition_name(month)] = await compact_partition(db, month)
+        await db.commit()
+        bus.publish(KEY_ATTEMPT_PARTITIONS)
+    return result
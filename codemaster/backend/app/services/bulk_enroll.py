@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import csv
+import io
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.upsert import insert_ignore
+from app.models.cohort import Cohort, CohortMember
+from app.models.progress import Progress
+from app.models.user import User
+from app.schemas.teacher import BulkEnrollOut, BulkEnrollRowOut
+
+MAX_BULK_ROWS = 5000  # 5 параметров на строку — укладываемся в лимит параметров запроса
+
+ENROLLED = "enrolled"
+ALREADY_ENROLLED = "already_enrolled"
+NOT_FOUND = "not_found"
+NOT_STUDENT = "not_student"
+INVALID = "invalid"
+DUPLICATE = "duplicate"
+
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+def parse_csv(text: str) -> List[str]:
+    """
+    Адреса из CSV: колонка email, если есть строка заголовка с ней,
+    иначе первая колонка. Пустые строки пропускаются.
+    """
+    rows = [row for row in csv.reader(io.StringIO(text)) if any(cell.strip() for cell in row)]
+    if not rows:
+        return []
+    header = [cell.strip().lower() for cell in rows[0]]
+    if "email" in header:
+        column = header.index("email")
+        rows = rows[1:]
+    else:
+        column = 0
+    return [row[column].strip() if column < len(row) else "" for row in rows]
+
+
+async def enroll_bulk(
+    db: AsyncSession,
+    course_id: int,
+    emails: List[str],
+    cohort_name: Optional[str] = None,
+) -> BulkEnrollOut:
+    """
+    Записать студентов на курс по списку адресов.
+    Пользователи ищутся одним запросом, строки progress вставляются одним
+    INSERT ... ON CONFLICT DO NOTHING RETURNING — уже записанные не мешают.
+    commit — на вызывающей стороне.
+    """
+    report = BulkEnrollOut(course_id=course_id)
+    rows: List[BulkEnrollRowOut] = []
+    first_row: Dict[str, int] = {}  # нормализованный адрес -> номер первой строки
+
+    for number, raw in enumerate(emails, start=1):
+        email = raw.strip()
+        row = BulkEnrollRowOut(row=number, email=email, status=INVALID)
+        rows.append(row)
+        if not _EMAIL.match(email):
+            continue
+        key = email.lower()
+        if key in first_row:
+            row.status = DUPLICATE
+            continue
+        first_row[key] = number
+
+    users: Dict[str, Any] = {}  # строки (id, email, is_teacher)
+    if first_row:
+        # адреса сравниваются без учёта регистра: в users они хранятся как ввели при регистрации
+        res = await db.execute(
+            select(User.id, User.email, User.is_teacher).where(
+                func.lower(User.email).in_(list(first_row))
+            )
+        )
+        users = {user.email.lower(): user for user in res.all()}
+
+    student_ids: List[int] = []
+    for key, number in first_row.items():
+        row = rows[number - 1]
+        user = users.get(key)
+        if user is None:
+            row.status = NOT_FOUND
+        elif user.is_teacher:
+            row.user_id, row.status = user.id, NOT_STUDENT
+        else:
+            row.user_id, row.status = user.id, ALREADY_ENROLLED
+            student_ids.append(user.id)
+
+    if student_ids:
+        stmt = (
+            insert_ignore(db, Progress.__table__, ["user_id", "course_id"])
+            .values(
+                [
+                    {
+                        "user_id": user_id,
+                        "course_id": course_id,
+                        "lessons_completed": 0,
+                        "tasks_completed": 0,
+                        "score_avg": 0.0,
+                    }
+                    for user_id in student_ids
+                ]
+            )
+            .returning(Progress.__table__.c.user_id)
+        )
+        inserted = set((await db.execute(stmt)).scalars().all())
+        for row in rows:
+            if row.status == ALREADY_ENROLLED and row.user_id in inserted:
+                row.status = ENROLLED
+
+    if cohort_name and cohort_name.strip():
+        report.cohort_id = await _add_to_cohort(db, course_id, cohort_name.strip(), student_ids)
+
+    report.rows = rows
+    report.enrolled = sum(row.status == ENROLLED for row in rows)
+    report.already_enrolled = sum(row.status == ALREADY_ENROLLED for row in rows)
+    report.failed = len(rows) - report.enrolled - report.already_enrolled
+    return report
+
+
+async def _add_to_cohort(
+    db: AsyncSession, course_id: int, name: str, user_ids: List[int]
+) -> int:
+    await db.execute(
+        insert_ignore(db, Cohort.__table__, ["course_id", "name"]).values(
+            course_id=course_id, name=name, created_at=datetime.utcnow()
+        )
+    )
+    res = await db.execute(
+        select(Cohort.id).where(Cohort.course_id == course_id, Cohort.name == name)
+    )
+    cohort_id = res.scalar_one()
+    if user_ids:
+        now = datetime.utcnow()
+        await db.execute(
+            insert_ignore(db, CohortMember.__table__, ["cohort_id", "user_id"]).values(
+                [{"cohort_id": cohort_id, "user_id": user_id, "added_at": now} for user_id in user_ids]
+            )
+        )
+    return cohort_id
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+from app.core.encoding import PrecompressedBody, etag_matches
+from app.core.invalidation import KEY_CATALOG, Invalidation, bus
+
+
+class CatalogCache:
+    """
+    Анонимный ответ GET /courses/, сериализованный и сжатый один раз.
+    Сбрасывается по ключу catalog; generation защищает от записи в кеш
+    результата, прочитанного до инвалидации.
+    """
+
+    def __init__(self) -> None:
+        self._body: Optional[PrecompressedBody] = None
+        self.generation = 0
+
+    def get(self) -> Optional[PrecompressedBody]:
+        return self._body
+
+    def put(self, generation: int, payload: bytes) -> PrecompressedBody:
+        body = PrecompressedBody.build(payload)
+        if generation == self.generation:
+            self._body = body
+        return body
+
+    def invalidate(self) -> None:
+        self.generation += 1
+        self._body = None
+
+
+catalog_cache = CatalogCache()
+
+
+def precompressed_response(
+    request: Request,
+    body: PrecompressedBody,
+    media_type: str = "application/json",
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Ответ из заранее сжатого тела: выбор кодировки и 304 без повторного сжатия."""
+    headers = {**(headers or {}), "ETag": body.etag, "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), body.etag):
+        return Response(status_code=304, headers=headers)
+    content, coding = body.select(request.headers.get("accept-encoding"))
+    if coding is not None:
+        headers["Content-Encoding"] = coding
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
+def _on_catalog_invalidated(_message: Invalidation) -> None:
+    catalog_cache.invalidate()
+
+
+bus.subscribe(KEY_CATALOG, _on_catalog_invalidated)
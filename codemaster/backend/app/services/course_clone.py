@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from sqlalchemy import insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.course import Course
+from app.models.lesson import Lesson
+from app.models.task import Task, TaskOption
+from app.schemas.teacher import CourseCloneOut
+
+COPY_SUFFIX = " (копия)"
+
+
+async def free_copy_title(db: AsyncSession, title: str) -> str:
+    """'<title> (копия)', а если занято — '(копия 2)', '(копия 3)', ... (title курсов уникален)."""
+    base = title + COPY_SUFFIX
+    res = await db.execute(select(Course.title).where(Course.title.startswith(title + " (копия")))
+    taken = set(res.scalars().all())
+    if base not in taken:
+        return base
+    n = 2
+    while f"{title} (копия {n})" in taken:
+        n += 1
+    return f"{title} (копия {n})"
+
+
+async def clone_course(
+    db: AsyncSession,
+    source_id: int,
+    owner_id: int,
+    title: Optional[str] = None,
+) -> Optional[CourseCloneOut]:
+    """
+    Копия курса со всеми уроками, задачами и вариантами ответов.
+    Каждый уровень копируется одним INSERT ... SELECT: новые строки помнят
+    id источника в cloned_from_id, и следующий уровень находит своего
+    родителя join'ом по нему — ни одна строка не загружается в ORM, а число
+    запросов не зависит от размера курса. commit — на вызывающей стороне.
+    None — исходного курса нет.
+    """
+    res = await db.execute(select(Course.title, Course.description).where(Course.id == source_id))
+    source = res.one_or_none()
+    if source is None:
+        return None
+    title = title or await free_copy_title(db, source.title)
+
+    res = await db.execute(
+        insert(Course)
+        .values(title=title, description=source.description, owner_id=owner_id)
+        .returning(Course.id)
+    )
+    course_id = res.scalar_one()
+
+    lessons = await db.execute(
+        insert(Lesson).from_select(
+            ["course_id", "title", "content", "content_html_gz", "content_hash", "cloned_from_id"],
+            select(
+                literal(course_id),
+                Lesson.title,
+                Lesson.content,
+                Lesson.content_html_gz,  # HTML не перерисовываем — копируем готовый
+                Lesson.content_hash,
+                Lesson.id,
+            )
+            .where(Lesson.course_id == source_id)
+            .order_by(Lesson.id),
+        )
+    )
+
+    new_lesson = Lesson.__table__.alias("new_lesson")
+    tasks = await db.execute(
+        insert(Task).from_select(
+            ["lesson_id", "title", "body", "has_autocheck", "cloned_from_id"],
+            select(new_lesson.c.id, Task.title, Task.body, Task.has_autocheck, Task.id)
+            .select_from(Task)
+            .join(new_lesson, new_lesson.c.cloned_from_id == Task.lesson_id)
+            .where(new_lesson.c.course_id == course_id)
+            .order_by(Task.id),
+        )
+    )
+
+    new_task = Task.__table__.alias("new_task")
+    options = await db.execute(
+        insert(TaskOption).from_select(
+            ["task_id", "text", "is_correct"],
+            select(new_task.c.id, TaskOption.text, TaskOption.is_correct)
+            .select_from(TaskOption)
+            .join(new_task, new_task.c.cloned_from_id == TaskOption.task_id)
+            .join(new_lesson, new_lesson.c.id == new_task.c.lesson_id)
+            .where(new_lesson.c.course_id == course_id)
+            .order_by(TaskOption.id),
+        )
+    )
+
+    return CourseCloneOut(
+        id=course_id,
+        title=title,
+        source_course_id=source_id,
+        lessons=lessons.rowcount,
+        tasks=tasks.rowcount,
+        options=options.rowcount,
+    )
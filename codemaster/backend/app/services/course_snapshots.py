@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.config import get_settings
+from app.core.encoding import AVAILABLE_ENCODINGS, PrecompressedBody, compress, gzip_bytes
+from app.core.invalidation import Invalidation, bus, course_snapshot_key, key_id
+from app.models.course import Course
+from app.models.lesson import Lesson
+from app.models.snapshot import CourseSnapshot
+from app.models.task import Task
+from app.schemas.snapshot import (
+    CourseContentOut,
+    CourseSnapshotOut,
+    SnapshotLessonOut,
+    SnapshotOptionOut,
+    SnapshotTaskOut,
+)
+
+
+class SnapshotCache:
+    """
+    LRU снапшотов в памяти воркера: (course_id, version) -> готовое сжатое тело.
+    Версии неизменяемы, поэтому сбрасывать приходится только указатель
+    course_id -> текущая версия — при публикации новой. Указатель 0 — курс
+    не опубликован (чтения студентов идут в черновые таблицы без запроса
+    снапшота). Рядом лежат разобранные тела для /lessons и /tasks.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._bodies: "OrderedDict[Tuple[int, int], PrecompressedBody]" = OrderedDict()
+        self._contents: "OrderedDict[Tuple[int, int], CourseContentOut]" = OrderedDict()
+        self._current: Dict[int, int] = {}
+
+    def get(self, course_id: int, version: int) -> Optional[PrecompressedBody]:
+        body = self._bodies.get((course_id, version))
+        if body is not None:
+            self._bodies.move_to_end((course_id, version))
+        return body
+
+    def put(self, course_id: int, version: int, body: PrecompressedBody) -> None:
+        self._bodies[(course_id, version)] = body
+        self._bodies.move_to_end((course_id, version))
+        while len(self._bodies) > self.size:
+            self._bodies.popitem(last=False)
+
+    def get_content(self, course_id: int, version: int) -> Optional[CourseContentOut]:
+        content = self._contents.get((course_id, version))
+        if content is not None:
+            self._contents.move_to_end((course_id, version))
+        return content
+
+    def put_content(self, course_id: int, version: int, content: CourseContentOut) -> None:
+        self._contents[(course_id, version)] = content
+        self._contents.move_to_end((course_id, version))
+        while len(self._contents) > self.size:
+            self._contents.popitem(last=False)
+
+    def current_version(self, course_id: int) -> Optional[int]:
+        return self._current.get(course_id)
+
+    def mark_unpublished(self, course_id: int) -> None:
+        # не затираем версию, опубликованную, пока шёл запрос
+        self._current.setdefault(course_id, 0)
+
+    def set_current(self, course_id: int, version: int) -> None:
+        # чтение, начатое до публикации, не должно откатить указатель назад
+        if version > self._current.get(course_id, 0):
+            self._current[course_id] = version
+
+    def forget_current(self, course_id: int) -> None:
+        self._current.pop(course_id, None)
+
+    def invalidate(self) -> None:
+        self._bodies.clear()
+        self._contents.clear()
+        self._current.clear()
+
+
+snapshot_cache = SnapshotCache(get_settings().SNAPSHOT_CACHE_SIZE)
+
+
+def _body_from_blob(content_gz: bytes, content_hash: str) -> PrecompressedBody:
+    """Тело из сохранённого gzip: gzip отдаётся как есть, остальные кодировки — один раз."""
+    identity = gzip.decompress(content_gz)
+    encoded = {
+        coding: content_gz if coding == "gzip" else compress(identity, coding)
+        for coding in AVAILABLE_ENCODINGS
+    }
+    return PrecompressedBody(identity=identity, encoded=encoded, etag=f'"{content_hash}"')
+
+
+async def _build_content(
+    db: AsyncSession, course: Course, version: int, published_at: datetime
+) -> CourseContentOut:
+    lessons = (
+        await db.execute(select(Lesson).where(Lesson.course_id == course.id).order_by(Lesson.id))
+    ).scalars().all()
+    tasks_by_lesson: Dict[int, list] = {lesson.id: [] for lesson in lessons}
+    if lessons:
+        tasks = (
+            await db.execute(
+                select(Task)
+                .where(Task.lesson_id.in_(list(tasks_by_lesson)))
+                .options(selectinload(Task.options))
+                .order_by(Task.id)
+            )
+        ).scalars().all()
+        for task in tasks:
+            tasks_by_lesson[task.lesson_id].append(
+                SnapshotTaskOut(
+                    id=task.id,
+                    title=task.title,
+                    body=task.body,
+                    has_autocheck=bool(task.has_autocheck),
+                    options=[
+                        SnapshotOptionOut(id=o.id, text=o.text, is_correct=bool(o.is_correct))
+                        for o in sorted(task.options, key=lambda o: o.id)
+                    ],
+                )
+            )
+    return CourseContentOut(
+        course_id=course.id,
+        version=version,
+        title=course.title,
+        description=course.description,
+        published_at=published_at,
+        lessons=[
+            SnapshotLessonOut(
+                id=lesson.id,
+                title=lesson.title,
+                content=lesson.content,
+                content_hash=lesson.content_hash,
+                tasks=tasks_by_lesson[lesson.id],
+            )
+            for lesson in lessons
+        ],
+    )
+
+
+async def _latest(db: AsyncSession, course_id: int) -> Optional[CourseSnapshot]:
+    res = await db.execute(
+        select(CourseSnapshot)
+        .where(CourseSnapshot.course_id == course_id)
+        .order_by(CourseSnapshot.version.desc())
+        .limit(1)
+    )
+    return res.scalar_one_or_none()
+
+
+async def publish_course(db: AsyncSession, course_id: int, user_id: int) -> Optional[CourseSnapshotOut]:
+    """
+    Опубликовать текущий черновик курса новой версией снапшота.
+    Если содержимое не изменилось с последней версии, новая не создаётся.
+    commit — на вызывающей стороне; None — курса нет.
+    """
+    course = await db.get(Course, course_id)
+    if course is None:
+        return None
+
+    latest = await _latest(db, course_id)
+    if latest is not None:
+        # тот же черновик с номером и датой прошлой версии даёт тот же JSON
+        same = await _build_content(db, course, latest.version, latest.published_at)
+        if hashlib.sha256(same.model_dump_json().encode()).hexdigest() == latest.content_hash:
+            return _snapshot_out(latest, created=False)
+
+    version = latest.version + 1 if latest is not None else 1
+    content = await _build_content(db, course, version, datetime.utcnow())
+    payload = content.model_dump_json().encode()
+    snapshot = CourseSnapshot(
+        course_id=course_id,
+        version=version,
+        content_gz=gzip_bytes(payload),
+        content_hash=hashlib.sha256(payload).hexdigest(),
+        size_bytes=len(payload),
+        published_by=user_id,
+        published_at=content.published_at,
+    )
+    db.add(snapshot)
+    await db.flush()
+    return _snapshot_out(snapshot, created=True)
+
+
+def _snapshot_out(snapshot: CourseSnapshot, created: bool) -> CourseSnapshotOut:
+    return CourseSnapshotOut(
+        course_id=snapshot.course_id,
+        version=snapshot.version,
+        content_hash=snapshot.content_hash,
+        size_bytes=snapshot.size_bytes,
+        compressed_bytes=len(snapshot.content_gz),
+        published_at=snapshot.published_at,
+        created=created,
+    )
+
+
+def snapshot_published(course_id: int, version: int) -> None:
+    """После commit публикации: свой воркер переключается сразу, остальные — по шине."""
+    snapshot_cache.set_current(course_id, version)
+    bus.publish(course_snapshot_key(course_id))
+
+
+async def load_snapshot(
+    db: AsyncSession, course_id: int, version: Optional[int] = None
+) -> Optional[Tuple[int, PrecompressedBody]]:
+    """
+    (версия, тело) снапшота курса: заданной версии или текущей.
+    Из LRU — без обращения к БД; None — курс не опубликован или версии нет.
+    """
+    wanted = version if version is not None else snapshot_cache.current_version(course_id)
+    if wanted == 0:
+        return None
+    if wanted is not None:
+        body = snapshot_cache.get(course_id, wanted)
+        if body is not None:
+            return wanted, body
+
+    stmt = select(CourseSnapshot.version, CourseSnapshot.content_gz, CourseSnapshot.content_hash).where(
+        CourseSnapshot.course_id == course_id
+    )
+    if wanted is not None:
+        stmt = stmt.where(CourseSnapshot.version == wanted)
+    else:
+        stmt = stmt.order_by(CourseSnapshot.version.desc()).limit(1)
+    row = (await db.execute(stmt)).one_or_none()
+    if row is None:
+        if version is None:
+            snapshot_cache.mark_unpublished(course_id)
+        return None
+
+    body = _body_from_blob(row.content_gz, row.content_hash)
+    snapshot_cache.put(course_id, row.version, body)
+    if version is None:
+        snapshot_cache.set_current(course_id, row.version)
+    return row.version, body
+
+
+async def published_content(db: AsyncSession, course_id: int) -> Optional[CourseContentOut]:
+    """
+    Текущая опубликованная версия курса разобранной моделью — для чтений
+    студентов. Разбирается один раз на версию; None — курс не опубликован.
+    """
+    snapshot = await load_snapshot(db, course_id)
+    if snapshot is None:
+        return None
+    version, body = snapshot
+    content = snapshot_cache.get_content(course_id, version)
+    if content is None:
+        content = CourseContentOut.model_validate_json(body.identity)
+        snapshot_cache.put_content(course_id, version, content)
+    return content
+
+
+def _on_snapshot_published(message: Invalidation) -> None:
+    # у публиковавшего воркера указатель уже новый
+    if not message.is_local:
+        snapshot_cache.forget_current(key_id(message.key))
+
+
+bus.subscribe("snapshot:", _on_snapshot_published)
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError, InterfaceError
+
+from app.core.config import get_settings
+from app.db.database import AsyncSessionLocal
+from app.models.event import EVENT_ATTEMPT, LearningEvent
+from app.services.attempt_history import write_attempts
+from app.services.rollups import apply_events
+
+logger = logging.getLogger(__name__)
+
+
+class EventLogWriter:
+    """
+    Буфер учебных событий в памяти воркера.
+    Запрос только кладёт событие в буфер; в БД оно уходит пачкой —
+    когда набралось batch_size событий или прошло flush_interval секунд.
+    При остановке приложения буфер дописывается до конца.
+    Пачка, которую БД отвергает max_attempts раз подряд (битая строка,
+    нарушение ограничения), пишется по одному событию, а не прошедшие
+    уходят в лог ошибок — чтобы не держать очередь за собой. Недоступность
+    БД попыткой не считается: от неё защищает max_queue.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_queue: int, max_attempts: int) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        self._buffer: List[Dict[str, Any]] = []
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._head_attempts = 0  # неудачи подряд у пачки в начале очереди
+        self.written = 0
+        self.dropped = 0
+        self.dead_lettered = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+
+    def emit(self, kind: str, user_id: int, **fields: Any) -> None:
+        if len(self._buffer) >= self.max_queue:
+            # БД недоступна слишком долго: журнал не должен съесть память воркера
+            self.dropped += 1
+            return
+        self._buffer.append(
+            {"kind": kind, "user_id": user_id, "created_at": datetime.utcnow(), **fields}
+        )
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def discard(self) -> None:
+        """Выбросить буфер без записи (схема БД пересоздана, события ей уже чужие)."""
+        self._buffer.clear()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        async with AsyncSessionLocal() as session:
+            await session.execute(insert(LearningEvent), batch)
+            # попытки дополнительно — в помесячную историю, той же транзакцией
+            attempts = [_attempt_row(event) for event in batch if event["kind"] == EVENT_ATTEMPT]
+            if attempts:
+                await write_attempts(session, attempts)
+            await apply_events(session, batch)
+            await session.commit()
+
+    async def flush(self) -> None:
+        while self._buffer:
+            batch = self._buffer[: self.batch_size]
+            del self._buffer[: len(batch)]
+            try:
+                await self._write(batch)
+            except asyncio.CancelledError:
+                self._buffer[:0] = batch
+                raise
+            except Exception as exc:
+                self.failed_flushes += 1
+                if not _is_unavailable(exc):
+                    self._head_attempts += 1
+                if self._head_attempts < self.max_attempts:
+                    # вернём пачку в начало очереди и попробуем на следующем тике
+                    self._buffer[:0] = batch
+                    logger.exception("Failed to flush %d learning events", len(batch))
+                    return
+                logger.exception(
+                    "Learning event batch failed %d times, writing events one by one", self._head_attempts
+                )
+                await self._write_one_by_one(batch)
+            else:
+                self.written += len(batch)
+                self.flushes += 1
+            self._head_attempts = 0
+
+    async def _write_one_by_one(self, batch: List[Dict[str, Any]]) -> None:
+        """Отделить битые события от нормальных: каждое — своей транзакцией."""
+        for event in batch:
+            try:
+                await self._write([event])
+            except Exception:
+                self.dead_lettered += 1
+                logger.exception("Dead-lettered learning event: %s", json.dumps(event, default=str))
+            else:
+                self.written += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": len(self._buffer),
+            "max_queue": self.max_queue,
+            "written": self.written,
+            "dropped": self.dropped,
+            "dead_lettered": self.dead_lettered,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+_ATTEMPT_FIELDS = ("user_id", "course_id", "lesson_id", "task_id", "option_id", "is_correct", "created_at")
+
+
+def _is_unavailable(exc: Exception) -> bool:
+    """БД недоступна (соединение не установлено или оборвано), а не отвергла данные."""
+    if isinstance(exc, (OSError, InterfaceError)):
+        return True
+    return isinstance(exc, DBAPIError) and exc.connection_invalidated
+
+
+def _attempt_row(event: Dict[str, Any]) -> Dict[str, Any]:
+    return {name: event.get(name) for name in _ATTEMPT_FIELDS}
+
+
+_settings = get_settings()
+
+event_log = EventLogWriter(
+    batch_size=_settings.EVENT_LOG_BATCH_SIZE,
+    flush_interval=_settings.EVENT_LOG_FLUSH_SECONDS,
+    max_queue=_settings.EVENT_LOG_MAX_QUEUE,
+    max_attempts=_settings.EVENT_LOG_MAX_ATTEMPTS,
+)
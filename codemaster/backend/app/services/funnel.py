@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.invalidation import Invalidation, bus, key_id
+from app.models.lesson import Lesson
+from app.models.progress import LessonCompletion, Progress, TaskCompletion
+from app.models.task import Task
+from app.schemas.teacher import CourseFunnelOut, FunnelLessonOut, FunnelTaskOut
+
+KIND_ENROLLED = "enrolled"
+KIND_LESSON = "lesson"
+KIND_TASK = "task"
+
+
+@dataclass
+class CourseFunnel:
+    """Структура курса и счётчики завершений по урокам и задачам."""
+
+    course_id: int
+    lessons: List[Tuple[int, str]]  # (id, title) в порядке курса
+    tasks: Dict[int, List[Tuple[int, str]]]  # lesson_id -> [(task_id, title)]
+    enrolled: int = 0
+    lesson_done: Dict[int, int] = field(default_factory=dict)
+    task_done: Dict[int, int] = field(default_factory=dict)
+    enrolled_stale: bool = False
+
+    def to_out(self) -> CourseFunnelOut:
+        lessons: List[FunnelLessonOut] = []
+        previous = self.enrolled
+        for position, (lesson_id, title) in enumerate(self.lessons, start=1):
+            completed = self.lesson_done.get(lesson_id, 0)
+            lessons.append(
+                FunnelLessonOut(
+                    lesson_id=lesson_id,
+                    title=title,
+                    position=position,
+                    completed=completed,
+                    completion_rate=round(completed / self.enrolled, 4) if self.enrolled else 0.0,
+                    drop_off=max(previous - completed, 0),
+                    tasks=[
+                        FunnelTaskOut(
+                            task_id=task_id, title=task_title, completed=self.task_done.get(task_id, 0)
+                        )
+                        for task_id, task_title in self.tasks.get(lesson_id, [])
+                    ],
+                )
+            )
+            previous = completed
+        return CourseFunnelOut(course_id=self.course_id, enrolled=self.enrolled, lessons=lessons)
+
+
+async def _load(db: AsyncSession, course_id: int) -> CourseFunnel:
+    structure = await db.execute(
+        select(Lesson.id, Lesson.title, Task.id.label("task_id"), Task.title.label("task_title"))
+        .outerjoin(Task, Task.lesson_id == Lesson.id)
+        .where(Lesson.course_id == course_id)
+        .order_by(Lesson.id, Task.id)
+    )
+    funnel = CourseFunnel(course_id=course_id, lessons=[], tasks={})
+    for row in structure.all():
+        if not funnel.lessons or funnel.lessons[-1][0] != row.id:
+            funnel.lessons.append((row.id, row.title))
+            funnel.tasks[row.id] = []
+        if row.task_id is not None:
+            funnel.tasks[row.id].append((row.task_id, row.task_title))
+
+    # все счётчики — одним сгруппированным запросом по обеим таблицам завершений
+    events = union_all(
+        select(literal(KIND_LESSON).label("kind"), LessonCompletion.lesson_id.label("item_id"))
+        .where(LessonCompletion.course_id == course_id),
+        select(literal(KIND_TASK), TaskCompletion.task_id)
+        .where(TaskCompletion.course_id == course_id),
+        select(literal(KIND_ENROLLED), literal(0))
+        .select_from(Progress)
+        .where(Progress.course_id == course_id),
+    ).subquery()
+    counts = await db.execute(
+        select(events.c.kind, events.c.item_id, func.count().label("n")).group_by(
+            events.c.kind, events.c.item_id
+        )
+    )
+    for row in counts.all():
+        if row.kind == KIND_LESSON:
+            funnel.lesson_done[row.item_id] = row.n
+        elif row.kind == KIND_TASK:
+            funnel.task_done[row.item_id] = row.n
+        else:
+            funnel.enrolled = row.n
+    return funnel
+
+
+class FunnelRegistry:
+    """
+    Воронка прохождения курсов в памяти воркера.
+    Строится из БД при первом запросе, дальше свои новые завершения
+    прибавляются через record_lesson/record_task. Число записанных
+    пересчитывается одним count после локальных записей прогресса;
+    изменения структуры курса и чужие записи сбрасывают воронку целиком.
+    """
+
+    def __init__(self) -> None:
+        self._funnels: Dict[int, CourseFunnel] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        # растёт при каждом изменении курса: загрузку, пересёкшуюся с записью, не кешируем
+        self._generation: Dict[int, int] = {}
+
+    async def get(self, db: AsyncSession, course_id: int) -> CourseFunnelOut:
+        funnel = self._funnels.get(course_id)
+        if funnel is None:
+            lock = self._locks.setdefault(course_id, asyncio.Lock())
+            async with lock:
+                funnel = self._funnels.get(course_id)
+                if funnel is None:
+                    generation = self._generation.setdefault(course_id, 0)
+                    funnel = await _load(db, course_id)
+                    if generation == self._generation[course_id]:
+                        self._funnels[course_id] = funnel
+        if funnel.enrolled_stale:
+            funnel.enrolled_stale = False
+            res = await db.execute(select(func.count()).where(Progress.course_id == course_id))
+            funnel.enrolled = res.scalar_one()
+        return funnel.to_out()
+
+    def _touch(self, course_id: int) -> CourseFunnel | None:
+        self._generation[course_id] = self._generation.get(course_id, 0) + 1
+        return self._funnels.get(course_id)
+
+    def record_lesson(self, course_id: int, lesson_id: int) -> None:
+        """Новая строка lesson_completions (после commit)."""
+        funnel = self._touch(course_id)
+        if funnel is not None:
+            funnel.lesson_done[lesson_id] = funnel.lesson_done.get(lesson_id, 0) + 1
+
+    def record_task(self, course_id: int, task_id: int) -> None:
+        """Новая строка task_completions (после commit)."""
+        funnel = self._touch(course_id)
+        if funnel is not None:
+            funnel.task_done[task_id] = funnel.task_done.get(task_id, 0) + 1
+
+    def mark_enrolled_stale(self, course_id: int) -> None:
+        funnel = self._touch(course_id)
+        if funnel is not None:
+            funnel.enrolled_stale = True
+
+    def invalidate(self, course_id: int | None = None) -> None:
+        if course_id is None:
+            for key in self._generation:
+                self._generation[key] += 1
+            self._funnels.clear()
+        else:
+            self._touch(course_id)
+            self._funnels.pop(course_id, None)
+
+
+funnel = FunnelRegistry()
+
+
+def _on_progress_invalidated(message: Invalidation) -> None:
+    # свои завершения уже учтены через record_*, остаётся число записанных
+    if message.is_local:
+        funnel.mark_enrolled_stale(key_id(message.key))
+    else:
+        funnel.invalidate(key_id(message.key))
+
+
+def _on_course_invalidated(message: Invalidation) -> None:
+    # новые уроки и задачи меняют состав воронки — перестроим
+    funnel.invalidate(key_id(message.key))
+
+
+bus.subscribe("progress:course:", _on_progress_invalidated)
+bus.subscribe("course:", _on_course_invalidated)
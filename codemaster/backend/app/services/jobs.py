@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.invalidation import bus, course_progress_key
+from app.models.job import JOB_DONE, JOB_FAILED, BackgroundJob
+from app.services.attempt_history import compact
+from app.services.progress_rebuild import apply_fixes, find_drift
+from app.services.rollups import backfill, utc_today
+from app.services.scheduler import scheduler
+
+# Обслуживание, которое раньше запускали только руками из app/db/*.
+# Кеши воркеров сюда не входят: задачу выполняет один воркер, а прогревать
+# нужно каждый.
+
+logger = logging.getLogger(__name__)
+
+DAILY = timedelta(days=1)
+
+
+async def backfill_rollups(db: AsyncSession, payload: Dict[str, Any]) -> None:
+    """Пересчитать дневные свёртки; по умолчанию — за вчера (UTC, как и сами дни)."""
+    yesterday = utc_today() - timedelta(days=1)
+    since = date.fromisoformat(payload["since"]) if "since" in payload else yesterday
+    until = date.fromisoformat(payload["until"]) if "until" in payload else yesterday
+    await backfill(db, since, until)
+
+
+async def compact_attempts(db: AsyncSession, payload: Dict[str, Any]) -> None:
+    await compact(db, keep_months=payload.get("keep_months"))
+
+
+async def rebuild_progress(db: AsyncSession, payload: Dict[str, Any]) -> None:
+    """
+    Найти расхождения progress с завершениями. По расписанию — только отчёт в лог,
+    исправляет при JOB_PROGRESS_REBUILD_APPLY или {"apply": true} в задаче.
+    """
+    drifts = await find_drift(db)
+    if not drifts:
+        return
+    if not payload.get("apply", get_settings().JOB_PROGRESS_REBUILD_APPLY):
+        logger.warning(
+            "progress drift in %d rows (report only): %s",
+            len(drifts),
+            ", ".join(f"user={d.user_id} course={d.course_id}" for d in drifts[:20]),
+        )
+        return
+    fixed = await apply_fixes(db, drifts, batch_size=payload.get("batch_size", 500))
+    for course_id in sorted({d.course_id for d in fixed}):
+        bus.publish(course_progress_key(course_id))
+
+
+async def prune_jobs(db: AsyncSession, payload: Dict[str, Any]) -> None:
+    """Удалить завершённые разовые задачи старше JOB_RETENTION_DAYS."""
+    cutoff = datetime.utcnow() - timedelta(days=get_settings().JOB_RETENTION_DAYS)
+    await db.execute(
+        delete(BackgroundJob).where(
+            BackgroundJob.status.in_([JOB_DONE, JOB_FAILED]),
+            BackgroundJob.finished_at < cutoff,
+        )
+    )
+
+
+scheduler.register("rollups.backfill", backfill_rollups, every=DAILY)
+scheduler.register("attempts.compact", compact_attempts, every=DAILY)
+scheduler.register("progress.rebuild", rebuild_progress, every=DAILY)
+scheduler.register("jobs.prune", prune_jobs, every=DAILY)
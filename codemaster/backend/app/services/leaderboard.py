@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.invalidation import Invalidation, bus, key_id
+from app.models.progress import Progress
+
+# Ключ сортировки: выше средний балл -> выше место, при равенстве — больше задач,
+# затем user_id, чтобы ключи были уникальными и порядок — стабильным.
+SortKey = Tuple[float, int, int]
+
+_MAX_LEVEL = 24  # хватает на ~16 млн записей в одном курсе
+
+
+@dataclass
+class LeaderboardEntry:
+    user_id: int
+    lessons_completed: int
+    tasks_completed: int
+    score_avg: float
+    # когда строка прочитана/записана (time_ns, как версии шины): старое не перекрывает новое
+    version: int = 0
+
+    @property
+    def key(self) -> SortKey:
+        return (-self.score_avg, -self.tasks_completed, self.user_id)
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key: Optional[SortKey], level: int):
+        self.key = key
+        self.next: List[Optional[_Node]] = [None] * level
+        self.width: List[int] = [1] * level
+
+
+class _IndexableSkipList:
+    """
+    Skip-list с ширинами ссылок: вставка, удаление, поиск позиции ключа
+    и доступ по индексу — всё за O(log n).
+    """
+
+    def __init__(self) -> None:
+        self._head = _Node(None, _MAX_LEVEL)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _path(self, key: SortKey) -> Tuple[List[_Node], List[int]]:
+        chain: List[_Node] = [self._head] * _MAX_LEVEL
+        steps: List[int] = [0] * _MAX_LEVEL
+        node = self._head
+        for level in reversed(range(_MAX_LEVEL)):
+            while node.next[level] is not None and node.next[level].key < key:
+                steps[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+        return chain, steps
+
+    def insert(self, key: SortKey) -> None:
+        chain, steps_at_level = self._path(key)
+        height = 1
+        while height < _MAX_LEVEL and random.random() < 0.5:
+            height += 1
+        new = _Node(key, height)
+        steps = 0
+        for level in range(height):
+            prev = chain[level]
+            new.next[level] = prev.next[level]
+            prev.next[level] = new
+            new.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(height, _MAX_LEVEL):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key: SortKey) -> None:
+        chain, _ = self._path(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        height = len(node.next)
+        for level in range(height):
+            prev = chain[level]
+            prev.width[level] += node.width[level] - 1
+            prev.next[level] = node.next[level]
+        for level in range(height, _MAX_LEVEL):
+            chain[level].width[level] -= 1
+        self._size -= 1
+
+    def index(self, key: SortKey) -> int:
+        """Количество ключей строго меньше key (позиция key, если он есть)."""
+        _, steps = self._path(key)
+        return sum(steps)
+
+    def iter_from(self, index: int) -> Iterator[SortKey]:
+        if index < 0 or index >= self._size:
+            return
+        node = self._head
+        remaining = index + 1
+        for level in reversed(range(_MAX_LEVEL)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+
+
+class CourseLeaderboard:
+    """
+    Рейтинг студентов одного курса.
+    Места нумеруются с 1, порядок — по score_avg, затем по tasks_completed.
+    """
+
+    def __init__(self, course_id: int):
+        self.course_id = course_id
+        self._entries: Dict[int, LeaderboardEntry] = {}
+        self._order = _IndexableSkipList()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def upsert(self, entry: LeaderboardEntry) -> None:
+        old = self._entries.get(entry.user_id)
+        if old is not None:
+            if entry.version < old.version:
+                return
+            if old.key == entry.key:
+                self._entries[entry.user_id] = entry
+                return
+            self._order.remove(old.key)
+        self._entries[entry.user_id] = entry
+        self._order.insert(entry.key)
+
+    def remove(self, user_id: int) -> None:
+        old = self._entries.pop(user_id, None)
+        if old is not None:
+            self._order.remove(old.key)
+
+    def rank_of(self, user_id: int) -> Optional[int]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        return self._order.index(entry.key) + 1
+
+    def slice(self, start_rank: int, count: int) -> List[Tuple[int, LeaderboardEntry]]:
+        """count записей начиная с места start_rank: [(место, запись), ...]."""
+        start_rank = max(start_rank, 1)
+        result: List[Tuple[int, LeaderboardEntry]] = []
+        if count <= 0:
+            return result
+        for offset, key in enumerate(self._order.iter_from(start_rank - 1)):
+            if offset >= count:
+                break
+            result.append((start_rank + offset, self._entries[key[2]]))
+        return result
+
+    def top(self, limit: int) -> List[Tuple[int, LeaderboardEntry]]:
+        return self.slice(1, limit)
+
+    def around(self, user_id: int, radius: int) -> List[Tuple[int, LeaderboardEntry]]:
+        """Место пользователя и по radius соседей сверху и снизу."""
+        rank = self.rank_of(user_id)
+        if rank is None:
+            return []
+        start = max(rank - radius, 1)
+        return self.slice(start, rank + radius - start + 1)
+
+
+class LeaderboardRegistry:
+    """
+    In-memory рейтинги по курсам.
+    Рейтинг курса строится лениво из таблицы progress при первом обращении,
+    дальше поддерживается инкрементально через record() из кода,
+    который пишет Progress, и apply() — для строк, записанных другими воркерами.
+    """
+
+    def __init__(self) -> None:
+        self._boards: Dict[int, CourseLeaderboard] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        # обновления, пришедшие пока курс загружается из БД
+        self._pending: Dict[int, Dict[int, LeaderboardEntry]] = {}
+
+    def is_loaded(self, course_id: int) -> bool:
+        return course_id in self._boards
+
+    async def get(self, db: AsyncSession, course_id: int) -> CourseLeaderboard:
+        board = self._boards.get(course_id)
+        if board is not None:
+            return board
+
+        lock = self._locks.setdefault(course_id, asyncio.Lock())
+        async with lock:
+            board = self._boards.get(course_id)
+            if board is not None:
+                return board
+
+            pending = self._pending.setdefault(course_id, {})
+            loaded_at = time.time_ns()
+            try:
+                res = await db.execute(
+                    select(
+                        Progress.user_id,
+                        Progress.lessons_completed,
+                        Progress.tasks_completed,
+                        Progress.score_avg,
+                    ).where(Progress.course_id == course_id)
+                )
+                board = CourseLeaderboard(course_id)
+                for row in res.all():
+                    board.upsert(
+                        LeaderboardEntry(
+                            user_id=row.user_id,
+                            lessons_completed=row.lessons_completed,
+                            tasks_completed=row.tasks_completed,
+                            score_avg=float(row.score_avg),
+                            version=loaded_at,
+                        )
+                    )
+                for entry in pending.values():
+                    board.upsert(entry)
+            finally:
+                self._pending.pop(course_id, None)
+
+            self._boards[course_id] = board
+            return board
+
+    def record(self, progress: Progress) -> None:
+        """Учесть свежезаписанную строку Progress (после commit)."""
+        self.apply(
+            progress.course_id,
+            LeaderboardEntry(
+                user_id=progress.user_id,
+                lessons_completed=progress.lessons_completed,
+                tasks_completed=progress.tasks_completed,
+                score_avg=float(progress.score_avg),
+                version=time.time_ns(),
+            ),
+        )
+
+    def apply(self, course_id: int, entry: LeaderboardEntry) -> None:
+        """Учесть строку курса; незагруженный рейтинг прочитает её из БД сам."""
+        board = self._boards.get(course_id)
+        if board is not None:
+            board.upsert(entry)
+            return
+        pending = self._pending.get(course_id)
+        if pending is not None:
+            old = pending.get(entry.user_id)
+            if old is None or entry.version >= old.version:
+                pending[entry.user_id] = entry
+
+    def invalidate(self, course_id: int | None = None) -> None:
+        """Сбросить рейтинг курса (или все) — он перестроится при следующем чтении."""
+        if course_id is None:
+            self._boards.clear()
+        else:
+            self._boards.pop(course_id, None)
+
+
+leaderboard = LeaderboardRegistry()
+
+
+def progress_update(progress: Progress) -> Dict[str, Any]:
+    """Payload инвалидации progress:course:{id}: строка, которую другие воркеры применят у себя."""
+    return {
+        "user_id": progress.user_id,
+        "lessons_completed": progress.lessons_completed,
+        "tasks_completed": progress.tasks_completed,
+        "score_avg": float(progress.score_avg),
+    }
+
+
+def _on_progress_invalidated(message: Invalidation) -> None:
+    # свои записи уже учтены через record()
+    if message.is_local:
+        return
+    course_id = key_id(message.key)
+    if message.payload is None:
+        # массовые изменения (зачисление списком, пересчёт progress) — перечитаем из БД
+        leaderboard.invalidate(course_id)
+    else:
+        leaderboard.apply(course_id, LeaderboardEntry(**message.payload, version=message.version))
+
+
+bus.subscribe("progress:course:", _on_progress_invalidated)
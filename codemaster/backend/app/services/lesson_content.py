@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Tuple
+
+from app.core.encoding import gzip_bytes
+from app.core.markdown import render_markdown
+from app.models.lesson import Lesson
+
+
+def render_content(content: str | None) -> Tuple[bytes, str]:
+    """Текст урока -> (HTML в gzip, sha256 HTML) — то, что хранится рядом с исходником."""
+    html = render_markdown(content).encode("utf-8")
+    return gzip_bytes(html), hashlib.sha256(html).hexdigest()
+
+
+def apply_rendered(lesson: Lesson) -> None:
+    """Отрендерить content урока; вызывать при каждой записи content."""
+    lesson.content_html_gz, lesson.content_hash = render_content(lesson.content)
+
+
+def content_etag(content_hash: str) -> str:
+    return f'"{content_hash}"'
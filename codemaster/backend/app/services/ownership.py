@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.invalidation import Invalidation, bus, key_id
+from app.models.course import Course
+from app.models.lesson import Lesson
+
+
+class OwnershipIndex:
+    """
+    Карта владения в памяти воркера: course_id -> owner_id и lesson_id -> course_id.
+    Загружается целиком при первом обращении (это только пары целых чисел),
+    дальше пополняется при создании курсов и уроков.
+    Промах — не отказ: id, созданный другим воркером, дочитывается из БД.
+    """
+
+    def __init__(self) -> None:
+        self._course_owner: Dict[int, int] = {}
+        self._lesson_course: Dict[int, int] = {}
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    async def _ensure_loaded(self, db: AsyncSession) -> None:
+        if self._loaded:
+            return
+        async with self._lock:
+            if self._loaded:
+                return
+            courses = await db.execute(select(Course.id, Course.owner_id))
+            lessons = await db.execute(select(Lesson.id, Lesson.course_id))
+            self._course_owner.update({row.id: row.owner_id for row in courses.all()})
+            self._lesson_course.update({row.id: row.course_id for row in lessons.all()})
+            self._loaded = True
+
+    async def course_owner(self, db: AsyncSession, course_id: int) -> Optional[int]:
+        """Владелец курса; None — курса нет."""
+        await self._ensure_loaded(db)
+        if course_id in self._course_owner:
+            return self._course_owner[course_id]
+        res = await db.execute(select(Course.owner_id).where(Course.id == course_id))
+        row = res.one_or_none()
+        if row is None:
+            return None
+        self._course_owner[course_id] = row.owner_id
+        return row.owner_id
+
+    async def lesson_course(self, db: AsyncSession, lesson_id: int) -> Optional[int]:
+        """Курс урока; None — урока нет."""
+        await self._ensure_loaded(db)
+        course_id = self._lesson_course.get(lesson_id)
+        if course_id is not None:
+            return course_id
+        res = await db.execute(select(Lesson.course_id).where(Lesson.id == lesson_id))
+        course_id = res.scalar_one_or_none()
+        if course_id is not None:
+            self._lesson_course[lesson_id] = course_id
+        return course_id
+
+    async def owns_course(self, db: AsyncSession, user_id: int, course_id: int) -> bool:
+        owner_id = await self.course_owner(db, course_id)
+        return owner_id is not None and owner_id == user_id
+
+    async def owned_lesson_course(self, db: AsyncSession, user_id: int, lesson_id: int) -> Optional[int]:
+        """course_id урока, если курс принадлежит user_id, иначе None."""
+        course_id = await self.lesson_course(db, lesson_id)
+        if course_id is None or not await self.owns_course(db, user_id, course_id):
+            return None
+        return course_id
+
+    def add_course(self, course_id: int, owner_id: int) -> None:
+        """Учесть созданный курс (после commit)."""
+        self._course_owner[course_id] = owner_id
+
+    def add_lesson(self, lesson_id: int, course_id: int) -> None:
+        """Учесть созданный урок (после commit)."""
+        self._lesson_course[lesson_id] = course_id
+
+    def forget_course(self, course_id: int) -> None:
+        self._course_owner.pop(course_id, None)
+
+    def invalidate(self) -> None:
+        self._course_owner.clear()
+        self._lesson_course.clear()
+        self._loaded = False
+
+
+ownership = OwnershipIndex()
+
+
+def _on_course_invalidated(message: Invalidation) -> None:
+    # чужие изменения курса: владельца перечитаем из БД при следующей проверке
+    if not message.is_local:
+        ownership.forget_course(key_id(message.key))
+
+
+bus.subscribe("course:", _on_course_invalidated)
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.upsert import dialect_insert
+from app.models.progress import Progress, LessonCompletion, TaskCompletion
+
+Pair = Tuple[int, int]  # (user_id, course_id)
+
+SCORE_EPSILON = 1e-9
+
+
+@dataclass
+class Counters:
+    lessons_completed: int = 0
+    tasks_completed: int = 0
+    score_avg: float = 0.0
+
+    def differs(self, other: "Counters") -> bool:
+        return (
+            self.lessons_completed != other.lessons_completed
+            or self.tasks_completed != other.tasks_completed
+            or abs(self.score_avg - other.score_avg) > SCORE_EPSILON
+        )
+
+
+@dataclass
+class Drift:
+    user_id: int
+    course_id: int
+    stored: Optional[Counters]  # None — строки progress нет вовсе
+    expected: Counters
+
+
+async def compute_expected(
+    db: AsyncSession, user_ids: Optional[Sequence[int]] = None
+) -> Dict[Pair, Counters]:
+    """
+    Эталонные счётчики из lesson_completions и task_completions —
+    двумя GROUP BY (user_id, course_id) на всю таблицу (или на переданных пользователей).
+    """
+    lessons_stmt = select(
+        LessonCompletion.user_id,
+        LessonCompletion.course_id,
+        func.count(LessonCompletion.id),
+    ).group_by(LessonCompletion.user_id, LessonCompletion.course_id)
+    tasks_stmt = select(
+        TaskCompletion.user_id,
+        TaskCompletion.course_id,
+        func.count(TaskCompletion.id),
+        func.avg(TaskCompletion.score),
+    ).group_by(TaskCompletion.user_id, TaskCompletion.course_id)
+    if user_ids is not None:
+        lessons_stmt = lessons_stmt.where(LessonCompletion.user_id.in_(user_ids))
+        tasks_stmt = tasks_stmt.where(TaskCompletion.user_id.in_(user_ids))
+
+    expected: Dict[Pair, Counters] = {}
+    for user_id, course_id, lessons in (await db.execute(lessons_stmt)).all():
+        expected.setdefault((user_id, course_id), Counters()).lessons_completed = lessons
+    for user_id, course_id, tasks, score_avg in (await db.execute(tasks_stmt)).all():
+        counters = expected.setdefault((user_id, course_id), Counters())
+        counters.tasks_completed = tasks
+        counters.score_avg = float(score_avg) if score_avg is not None else 0.0
+    return expected
+
+
+async def load_stored(
+    db: AsyncSession, user_ids: Optional[Sequence[int]] = None
+) -> Dict[Pair, Counters]:
+    stmt = select(
+        Progress.user_id,
+        Progress.course_id,
+        Progress.lessons_completed,
+        Progress.tasks_completed,
+        Progress.score_avg,
+    )
+    if user_ids is not None:
+        stmt = stmt.where(Progress.user_id.in_(user_ids))
+    return {
+        (row.user_id, row.course_id): Counters(
+            row.lessons_completed, row.tasks_completed, float(row.score_avg)
+        )
+        for row in (await db.execute(stmt)).all()
+    }
+
+
+def diff(stored: Dict[Pair, Counters], expected: Dict[Pair, Counters]) -> List[Drift]:
+    drifts: List[Drift] = []
+    for pair in sorted(set(stored) | set(expected)):
+        want = expected.get(pair, Counters())
+        have = stored.get(pair)
+        if have is None or have.differs(want):
+            drifts.append(Drift(pair[0], pair[1], have, want))
+    return drifts
+
+
+async def find_drift(db: AsyncSession, user_ids: Optional[Sequence[int]] = None) -> List[Drift]:
+    stored = await load_stored(db, user_ids)
+    expected = await compute_expected(db, user_ids)
+    return diff(stored, expected)
+
+
+def _batches(items: List[int], size: int) -> Iterable[List[int]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+async def apply_fixes(db: AsyncSession, drifts: List[Drift], batch_size: int = 500) -> List[Drift]:
+    """
+    Исправить расхождения пачками пользователей, коммит после каждой пачки.
+    Перед записью счётчики пачки пересчитываются заново в той же транзакции,
+    чтобы не затереть то, что успели записать живые запросы.
+    Возвращает фактически исправленные строки.
+    """
+    user_ids = sorted({d.user_id for d in drifts})
+    fixed: List[Drift] = []
+
+    for batch in _batches(user_ids, batch_size):
+        current = await find_drift(db, batch)
+        updates = [d for d in current if d.stored is not None]
+        inserts = [d for d in current if d.stored is None]
+
+        if updates:
+            table = Progress.__table__
+            await db.execute(
+                update(table)
+                .where(
+                    table.c.user_id == bindparam("b_user_id"),
+                    table.c.course_id == bindparam("b_course_id"),
+                )
+                .values(
+                    lessons_completed=bindparam("b_lessons"),
+                    tasks_completed=bindparam("b_tasks"),
+                    score_avg=bindparam("b_score"),
+                ),
+                [
+                    {
+                        "b_user_id": d.user_id,
+                        "b_course_id": d.course_id,
+                        "b_lessons": d.expected.lessons_completed,
+                        "b_tasks": d.expected.tasks_completed,
+                        "b_score": d.expected.score_avg,
+                    }
+                    for d in updates
+                ],
+            )
+        if inserts:
+            # строку мог успеть создать живой запрос: тогда просто перезаписываем счётчики
+            table = Progress.__table__
+            stmt = dialect_insert(db, table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["user_id", "course_id"],
+                set_={
+                    name: stmt.excluded[name]
+                    for name in ("lessons_completed", "tasks_completed", "score_avg")
+                },
+            )
+            await db.execute(
+                stmt,
+                [
+                    {
+                        "user_id": d.user_id,
+                        "course_id": d.course_id,
+                        "lessons_completed": d.expected.lessons_completed,
+                        "tasks_completed": d.expected.tasks_completed,
+                        "score_avg": d.expected.score_avg,
+                    }
+                    for d in inserts
+                ],
+            )
+        await db.commit()
+        fixed.extend(current)
+
+    return fixed
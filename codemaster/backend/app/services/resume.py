@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from typing import List
+
+from sqlalchemy import and_, func, literal, null, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.course import Course
+from app.models.lesson import Lesson
+from app.models.progress import LessonCompletion, Progress, TaskCompletion
+from app.models.task import Task
+from app.schemas.progress import ResumeCourseOut
+
+KIND_LESSON = "lesson"
+KIND_TASK = "task"
+
+
+async def resume_points(db: AsyncSession, user_id: int) -> List[ResumeCourseOut]:
+    """
+    Где продолжить обучение: по каждому курсу студента — первый незавершённый
+    урок и первая нерешённая задача в порядке курса (уроки и задачи по id).
+    Один запрос: кандидаты обоих видов нумеруются окном внутри курса,
+    берутся первые; курс без кандидатов пройден целиком.
+    """
+    enrolled = Progress.user_id == user_id
+    candidates = union_all(
+        select(
+            Lesson.course_id.label("course_id"),
+            literal(KIND_LESSON).label("kind"),
+            Lesson.id.label("lesson_id"),
+            Lesson.title.label("lesson_title"),
+            null().label("task_id"),
+            null().label("task_title"),
+        )
+        .select_from(Progress)
+        .join(Lesson, Lesson.course_id == Progress.course_id)
+        .outerjoin(
+            LessonCompletion,
+            and_(LessonCompletion.lesson_id == Lesson.id, LessonCompletion.user_id == user_id),
+        )
+        .where(enrolled, LessonCompletion.id.is_(None)),
+        select(Lesson.course_id, literal(KIND_TASK), Lesson.id, Lesson.title, Task.id, Task.title)
+        .select_from(Progress)
+        .join(Lesson, Lesson.course_id == Progress.course_id)
+        .join(Task, Task.lesson_id == Lesson.id)
+        .outerjoin(
+            TaskCompletion,
+            and_(TaskCompletion.task_id == Task.id, TaskCompletion.user_id == user_id),
+        )
+        .where(enrolled, TaskCompletion.id.is_(None)),
+    ).subquery()
+    ranked = select(
+        candidates,
+        func.row_number()
+        .over(
+            partition_by=[candidates.c.course_id, candidates.c.kind],
+            order_by=[candidates.c.lesson_id, candidates.c.task_id],
+        )
+        .label("rn"),
+    ).cte("resume_candidates")
+
+    lesson = ranked.alias("next_lesson")
+    task = ranked.alias("next_task")
+    res = await db.execute(
+        select(
+            Course.id,
+            Course.title,
+            lesson.c.lesson_id,
+            lesson.c.lesson_title,
+            task.c.task_id,
+            task.c.task_title,
+            task.c.lesson_id.label("task_lesson_id"),
+        )
+        .select_from(Progress)
+        .join(Course, Course.id == Progress.course_id)
+        .outerjoin(
+            lesson,
+            and_(lesson.c.course_id == Course.id, lesson.c.kind == KIND_LESSON, lesson.c.rn == 1),
+        )
+        .outerjoin(
+            task,
+            and_(task.c.course_id == Course.id, task.c.kind == KIND_TASK, task.c.rn == 1),
+        )
+        .where(enrolled)
+        .order_by(Course.id)
+    )
+    return [
+        ResumeCourseOut(
+            course_id=row.id,
+            course_title=row.title,
+            next_lesson_id=row.lesson_id,
+            next_lesson_title=row.lesson_title,
+            next_task_id=row.task_id,
+            next_task_title=row.task_title,
+            next_task_lesson_id=row.task_lesson_id,
+            completed=row.lesson_id is None and row.task_id is None,
+        )
+        for row in res.all()
+    ]
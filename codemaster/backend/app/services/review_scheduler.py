@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.review import ReviewSchedule
+
+MIN_EASINESS = 1.3
+DEFAULT_EASINESS = 2.5
+
+# У нас только "верно/неверно", поэтому оценку SM-2 (0..5) берём фиксированную:
+# верный ответ — 4 (easiness не меняется), неверный — 1 (повторение с начала).
+QUALITY_CORRECT = 4
+QUALITY_WRONG = 1
+
+
+@dataclass
+class Sm2State:
+    repetitions: int = 0
+    interval_days: int = 0
+    easiness: float = DEFAULT_EASINESS
+
+
+def sm2_next(state: Sm2State, quality: int) -> Sm2State:
+    """
+    Один шаг SM-2: новое состояние после ответа с оценкой quality (0..5).
+    """
+    if quality >= 3:
+        if state.repetitions == 0:
+            interval = 1
+        elif state.repetitions == 1:
+            interval = 6
+        else:
+            interval = max(1, round(state.interval_days * state.easiness))
+        repetitions = state.repetitions + 1
+    else:
+        repetitions = 0
+        interval = 1
+
+    easiness = state.easiness + (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    return Sm2State(
+        repetitions=repetitions,
+        interval_days=interval,
+        easiness=max(MIN_EASINESS, easiness),
+    )
+
+
+async def record_review(
+    db: AsyncSession,
+    user_id: int,
+    task_id: int,
+    is_correct: bool,
+    now: datetime | None = None,
+) -> ReviewSchedule:
+    """
+    Обновить расписание повторения по результату ответа.
+    Коммит остаётся за вызывающим кодом.
+    """
+    now = now or datetime.utcnow()
+    quality = QUALITY_CORRECT if is_correct else QUALITY_WRONG
+
+    res = await db.execute(
+        select(ReviewSchedule).where(
+            ReviewSchedule.user_id == user_id,
+            ReviewSchedule.task_id == task_id,
+        )
+    )
+    schedule = res.scalar_one_or_none()
+    if schedule is None:
+        state = Sm2State()
+        schedule = ReviewSchedule(user_id=user_id, task_id=task_id)
+        db.add(schedule)
+    else:
+        state = Sm2State(
+            repetitions=schedule.repetitions,
+            interval_days=schedule.interval_days,
+            easiness=schedule.easiness,
+        )
+
+    state = sm2_next(state, quality)
+    schedule.repetitions = state.repetitions
+    schedule.interval_days = state.interval_days
+    schedule.easiness = state.easiness
+    schedule.due_at = now + timedelta(days=state.interval_days)
+    schedule.last_reviewed_at = now
+    schedule.last_quality = quality
+    return schedule
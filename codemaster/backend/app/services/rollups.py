@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, delete, func, insert, literal, select, union, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.upsert import dialect_insert, insert_ignore
+from app.models.event import EVENT_ATTEMPT, EVENT_LESSON_COMPLETE, LearningEvent
+from app.models.progress import LessonCompletion
+from app.models.rollup import DailyActiveStudent, DailyCourseActivity
+from app.schemas.teacher import DailyActivityOut
+
+Key = Tuple[int, date]  # (course_id, день)
+
+COUNTERS = ("active_students", "lessons_completed", "tasks_attempted", "tasks_correct")
+
+
+async def apply_events(db: AsyncSession, events: List[Dict[str, Any]]) -> None:
+    """
+    Прибавить пачку учебных событий к дневным счётчикам (в транзакции вызывающего).
+    Вызывается из сброса журнала событий: на пачку — одна вставка активных
+    студентов и один upsert по затронутым (курс, день).
+    """
+    counts: Dict[Key, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    active = set()
+    for event in events:
+        course_id = event.get("course_id")
+        if course_id is None or event["kind"] not in (EVENT_ATTEMPT, EVENT_LESSON_COMPLETE):
+            continue
+        key = (course_id, event["created_at"].date())
+        if event["kind"] == EVENT_ATTEMPT:
+            counts[key]["tasks_attempted"] += 1
+            counts[key]["tasks_correct"] += int(bool(event.get("is_correct")))
+        else:
+            counts[key]["lessons_completed"] += 1
+        active.add((*key, event["user_id"]))
+    if not counts:
+        return
+
+    # уникальных студентов считают только впервые вставленные строки
+    res = await db.execute(
+        insert_ignore(db, DailyActiveStudent.__table__, ["course_id", "day", "user_id"])
+        .values([{"course_id": c, "day": d, "user_id": u} for c, d, u in sorted(active)])
+        .returning(DailyActiveStudent.__table__.c.course_id, DailyActiveStudent.__table__.c.day)
+    )
+    for course_id, day in res.all():
+        counts[(course_id, day)]["active_students"] += 1
+
+    table = DailyCourseActivity.__table__
+    stmt = dialect_insert(db, table).values(
+        [{"course_id": c, "day": d, **values} for (c, d), values in sorted(counts.items())]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["course_id", "day"],
+        set_={name: table.c[name] + stmt.excluded[name] for name in COUNTERS},
+    )
+    await db.execute(stmt)
+
+
+def utc_today() -> date:
+    """Сегодня по UTC: дни свёрток — даты created_at событий, а они в UTC."""
+    return datetime.now(timezone.utc).date()
+
+
+def _day_bounds(since: date, until: date) -> Tuple[datetime, datetime]:
+    return datetime.combine(since, time.min), datetime.combine(until + timedelta(days=1), time.min)
+
+
+async def backfill(
+    db: AsyncSession,
+    since: date,
+    until: Optional[date] = None,
+) -> int:
+    """
+    Пересчитать дни [since, until] с нуля из lesson_completions и журнала попыток.
+    По умолчанию until — вчера: сегодняшний день ещё пополняется сбросами
+    журнала, и пересчёт мог бы разойтись с ними. Возвращает число строк
+    (курс, день); commit — на вызывающей стороне.
+    """
+    until = until or utc_today() - timedelta(days=1)
+    start, end = _day_bounds(since, until)
+    activity, students = DailyCourseActivity.__table__, DailyActiveStudent.__table__
+    await db.execute(delete(students).where(students.c.day.between(since, until)))
+    await db.execute(delete(activity).where(activity.c.day.between(since, until)))
+
+    lesson_day = func.date(LessonCompletion.completed_at)
+    attempt_day = func.date(LearningEvent.created_at)
+    lessons = LessonCompletion.completed_at >= start, LessonCompletion.completed_at < end
+    attempts = (
+        LearningEvent.kind == EVENT_ATTEMPT,
+        LearningEvent.course_id.isnot(None),
+        LearningEvent.created_at >= start,
+        LearningEvent.created_at < end,
+    )
+
+    await db.execute(
+        insert(students).from_select(
+            ["course_id", "day", "user_id"],
+            union(
+                select(LessonCompletion.course_id, lesson_day, LessonCompletion.user_id).where(*lessons),
+                select(LearningEvent.course_id, attempt_day, LearningEvent.user_id).where(*attempts),
+            ),
+        )
+    )
+
+    one, zero = literal(1), literal(0)
+    events = union_all(
+        select(
+            LessonCompletion.course_id.label("course_id"),
+            lesson_day.label("day"),
+            zero.label("active"),
+            one.label("lessons"),
+            zero.label("attempted"),
+            zero.label("correct"),
+        ).where(*lessons),
+        select(
+            LearningEvent.course_id,
+            attempt_day,
+            zero,
+            zero,
+            one,
+            case((LearningEvent.is_correct, 1), else_=0),
+        ).where(*attempts),
+        select(students.c.course_id, students.c.day, one, zero, zero, zero).where(
+            students.c.day.between(since, until)
+        ),
+    ).subquery()
+    res = await db.execute(
+        insert(activity).from_select(
+            ["course_id", "day", *COUNTERS],
+            select(
+                events.c.course_id,
+                events.c.day,
+                func.sum(events.c.active),
+                func.sum(events.c.lessons),
+                func.sum(events.c.attempted),
+                func.sum(events.c.correct),
+            ).group_by(events.c.course_id, events.c.day),
+        )
+    )
+    return res.rowcount
+
+
+async def course_activity(
+    db: AsyncSession, course_id: int, since: date, until: date
+) -> List[DailyActivityOut]:
+    """Ряд по дням для графика: дни без активности заполняются нулями."""
+    res = await db.execute(
+        select(DailyCourseActivity).where(
+            and_(
+                DailyCourseActivity.course_id == course_id,
+                DailyCourseActivity.day.between(since, until),
+            )
+        )
+    )
+    by_day = {row.day: row for row in res.scalars().all()}
+    series: List[DailyActivityOut] = []
+    day = since
+    while day <= until:
+        row = by_day.get(day)
+        series.append(
+            DailyActivityOut(
+                day=day, **{name: getattr(row, name) if row is not None else 0 for name in COUNTERS}
+            )
+        )
+        day += timedelta(days=1)
+    return series
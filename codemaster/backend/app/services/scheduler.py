@@ -0,0 +1,361 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.db.database import AsyncSessionLocal
+from app.db.startup import readiness
+from app.db.upsert import insert_ignore
+from app.models.job import JOB_DONE, JOB_FAILED, JOB_PENDING, JOB_RUNNING, BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[AsyncSession, Dict[str, Any]], Awaitable[None]]
+
+MAX_ERROR_LENGTH = 2000
+
+
+@dataclass
+class ClaimedJob:
+    id: int
+    name: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    interval_seconds: Optional[int]
+
+
+async def enqueue(
+    db: AsyncSession,
+    name: str,
+    payload: Optional[Dict[str, Any]] = None,
+    key: Optional[str] = None,
+    run_at: Optional[datetime] = None,
+    max_attempts: Optional[int] = None,
+) -> Optional[int]:
+    """
+    Поставить разовую задачу. С key повторная постановка ничего не делает
+    (None вместо id) — пока строка с этим ключом есть в таблице. commit — снаружи.
+    """
+    res = await db.execute(
+        insert_ignore(db, BackgroundJob.__table__, ["key"])
+        .values(
+            name=name,
+            key=key,
+            payload=payload or {},
+            status=JOB_PENDING,
+            run_at=run_at or datetime.utcnow(),
+            attempts=0,
+            max_attempts=max_attempts or get_settings().JOB_MAX_ATTEMPTS,
+            created_at=datetime.utcnow(),
+        )
+        .returning(BackgroundJob.__table__.c.id)
+    )
+    return res.scalar_one_or_none()
+
+
+class JobScheduler:
+    """
+    Планировщик фоновых задач внутри воркера.
+    Раз в poll_interval секунд (или сразу после завершения задачи) забирает
+    созревшие задачи из background_jobs условным UPDATE — задачу получает ровно
+    один воркер, — и выполняет не больше concurrency штук одновременно, каждую
+    в своей сессии. Пока задача идёт, аренда продлевается; упавшая задача
+    повторяется с экспоненциальной задержкой, периодическая после запуска
+    переносится на следующий интервал.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        poll_interval: float,
+        lease_seconds: int,
+        retry_base: float,
+        retry_max: float,
+        worker_id: Optional[str] = None,
+    ) -> None:
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handlers: Dict[str, Handler] = {}
+        self._periodic: Dict[str, int] = {}
+        self._running: Set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+
+    def register(self, name: str, handler: Handler, every: Optional[timedelta] = None) -> None:
+        """Обработчик задач name; every — ещё и запускать периодически."""
+        self._handlers[name] = handler
+        if every is not None:
+            self._periodic[name] = int(every.total_seconds())
+
+    def backoff(self, attempts: int) -> float:
+        return min(self.retry_base * 2 ** max(attempts - 1, 0), self.retry_max)
+
+    # ---------- жизненный цикл ----------
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # незавершённые задачи отпускаются сразу, а не по истечении аренды
+        for task in list(self._running):
+            task.cancel()
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def _run(self) -> None:
+        # опрос очереди и продление аренды идут по очереди в этом цикле,
+        # так что служебным запросам планировщика хватает одного соединения
+        prepared = False
+        renewed_at = 0.0
+        loop = asyncio.get_running_loop()
+        while True:
+            # в режиме check_migrations таблицы задач может ещё не быть
+            if readiness.ready:
+                try:
+                    if not prepared:
+                        async with AsyncSessionLocal() as db:
+                            await self.ensure_periodic(db)
+                            await db.commit()
+                        prepared = True
+                    if self._running and loop.time() - renewed_at >= self.lease_seconds / 3:
+                        await self.renew_leases()
+                        renewed_at = loop.time()
+                    await self.tick()
+                except Exception:
+                    logger.exception("Failed to poll background jobs")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def ensure_periodic(self, db: AsyncSession) -> None:
+        """Строка на каждую периодическую задачу (ключ — её имя); интервал берётся из кода."""
+        for name, seconds in self._periodic.items():
+            await enqueue(db, name, key=name)
+            await db.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.key == name)
+                .values(interval_seconds=seconds)
+            )
+
+    # ---------- захват и выполнение ----------
+
+    async def tick(self) -> List[asyncio.Task]:
+        """Забрать сколько влезает в лимит созревших задач и запустить их."""
+        free = self.concurrency - len(self._running)
+        if free <= 0 or not self._handlers:
+            return []
+        started = []
+        for job in await self.claim(free):
+            task = asyncio.create_task(self._execute(job))
+            self._running.add(task)
+            task.add_done_callback(self._on_done)
+            started.append(task)
+        return started
+
+    async def run_pending(self) -> int:
+        """Выполнить всё созревшее до конца (CLI и тесты). Возвращает число запусков."""
+        total = 0
+        while True:
+            started = await self.tick()
+            if not started:
+                return total
+            total += len(started)
+            await asyncio.gather(*started, return_exceptions=True)
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        self._wakeup.set()
+
+    def _due(self, now: datetime):
+        return or_(
+            and_(BackgroundJob.status == JOB_PENDING, BackgroundJob.run_at <= now),
+            and_(BackgroundJob.status == JOB_RUNNING, BackgroundJob.locked_until < now),
+        )
+
+    async def claim(self, limit: int) -> List[ClaimedJob]:
+        """
+        Захватить до limit созревших задач (свежих или с истёкшей арендой).
+        Каждая захватывается UPDATE ... WHERE <всё ещё созрела>: если другой
+        воркер успел раньше, UPDATE ничего не вернёт и задача пропускается.
+        """
+        now = datetime.utcnow()
+        claimed: List[ClaimedJob] = []
+        async with AsyncSessionLocal() as db:
+            res = await db.execute(
+                select(BackgroundJob.id)
+                .where(self._due(now), BackgroundJob.name.in_(list(self._handlers)))
+                .order_by(BackgroundJob.run_at)
+                .limit(limit)
+            )
+            for job_id in res.scalars().all():
+                res = await db.execute(
+                    update(BackgroundJob)
+                    .where(BackgroundJob.id == job_id, self._due(now))
+                    .values(
+                        status=JOB_RUNNING,
+                        locked_by=self.worker_id,
+                        locked_until=now + timedelta(seconds=self.lease_seconds),
+                        attempts=BackgroundJob.attempts + 1,
+                    )
+                    .returning(
+                        BackgroundJob.id,
+                        BackgroundJob.name,
+                        BackgroundJob.payload,
+                        BackgroundJob.attempts,
+                        BackgroundJob.max_attempts,
+                        BackgroundJob.interval_seconds,
+                    )
+                )
+                row = res.one_or_none()
+                if row is not None:
+                    claimed.append(
+                        ClaimedJob(
+                            id=row.id,
+                            name=row.name,
+                            payload=row.payload or {},
+                            attempts=row.attempts,
+                            max_attempts=row.max_attempts,
+                            interval_seconds=row.interval_seconds,
+                        )
+                    )
+            await db.commit()
+        return claimed
+
+    async def _execute(self, job: ClaimedJob) -> None:
+        # сессия обработчика закрывается до записи итога: задача держит одно соединение
+        error: Optional[str] = None
+        try:
+            async with AsyncSessionLocal() as db:
+                await self._handlers[job.name](db, job.payload)
+                await db.commit()
+        except asyncio.CancelledError:
+            await self._release(job)
+            raise
+        except Exception as exc:
+            logger.exception("Background job %s #%d failed (attempt %d)", job.name, job.id, job.attempts)
+            error = f"{type(exc).__name__}: {exc}"[:MAX_ERROR_LENGTH]
+        await self._finish(job, error)
+
+    async def renew_leases(self) -> int:
+        """Продлить аренду всех задач, которые сейчас выполняет этот воркер, одним UPDATE."""
+        async with AsyncSessionLocal() as db:
+            res = await db.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.locked_by == self.worker_id, BackgroundJob.status == JOB_RUNNING)
+                .values(locked_until=datetime.utcnow() + timedelta(seconds=self.lease_seconds))
+            )
+            await db.commit()
+        return res.rowcount
+
+    async def _set_state(self, job_id: int, **values: Any) -> None:
+        # только пока аренда наша: истёкшую мог забрать другой воркер
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.id == job_id, BackgroundJob.locked_by == self.worker_id)
+                .values(locked_by=None, locked_until=None, **values)
+            )
+            await db.commit()
+
+    async def _finish(self, job: ClaimedJob, error: Optional[str]) -> None:
+        now = datetime.utcnow()
+        if error is None:
+            self.completed += 1
+            if job.interval_seconds:
+                values = dict(
+                    status=JOB_PENDING,
+                    run_at=now + timedelta(seconds=job.interval_seconds),
+                    attempts=0,
+                    last_error=None,
+                )
+            else:
+                values = dict(status=JOB_DONE, finished_at=now, last_error=None)
+        elif job.attempts < job.max_attempts:
+            self.retried += 1
+            values = dict(
+                status=JOB_PENDING,
+                run_at=now + timedelta(seconds=self.backoff(job.attempts)),
+                last_error=error,
+            )
+        else:
+            self.failed += 1
+            if job.interval_seconds:
+                # периодическая задача не умирает: следующая попытка — в свой срок
+                values = dict(
+                    status=JOB_PENDING,
+                    run_at=now + timedelta(seconds=job.interval_seconds),
+                    attempts=0,
+                    last_error=error,
+                )
+            else:
+                values = dict(status=JOB_FAILED, finished_at=now, last_error=error)
+        await self._set_state(job.id, **values)
+
+    async def _release(self, job: ClaimedJob) -> None:
+        """Остановка воркера: вернуть задачу в очередь, попытка не засчитывается."""
+        try:
+            await asyncio.shield(
+                self._set_state(
+                    job.id,
+                    status=JOB_PENDING,
+                    run_at=datetime.utcnow(),
+                    attempts=job.attempts - 1,
+                )
+            )
+        except Exception:
+            logger.exception("Failed to release background job #%d", job.id)
+
+    # ---------- метрики ----------
+
+    async def stats(self, db: AsyncSession) -> Dict[str, Any]:
+        res = await db.execute(
+            select(BackgroundJob.status, func.count()).group_by(BackgroundJob.status)
+        )
+        return {
+            "worker_id": self.worker_id,
+            "concurrency": self.concurrency,
+            "running": len(self._running),
+            "completed": self.completed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "queue": dict(res.all()),
+        }
+
+
+_settings = get_settings()
+
+scheduler = JobScheduler(
+    concurrency=_settings.JOB_CONCURRENCY,
+    poll_interval=_settings.JOB_POLL_SECONDS,
+    lease_seconds=_settings.JOB_LEASE_SECONDS,
+    retry_base=_settings.JOB_RETRY_BASE_SECONDS,
+    retry_max=_settings.JOB_RETRY_MAX_SECONDS,
+)
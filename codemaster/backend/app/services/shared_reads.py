@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, Literal, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
+
+from app.db.database import AsyncSessionLocal
+from app.models.lesson import Lesson
+from app.models.task import Task
+from app.schemas.snapshot import SnapshotTaskOut
+from app.services.course_snapshots import published_content
+from app.services.ownership import ownership
+from app.services.single_flight import SingleFlight
+
+# Общие (не зависящие от пользователя) чтения, которые при открытии курса целой
+# группой приходят сотнями одновременно. Опубликованный курс студентам отдаётся
+# из снапшота в памяти (published_*); черновые таблицы читаются, пока курс
+# не опубликован, и для преподавателей. Загрузка из таблиц идёт в собственной
+# сессии, а наружу отдаются неизменяемые строки — результат можно раздать всем.
+# Вызывающий не должен держать своё соединение, пока ждёт загрузку: иначе
+# при наплыве запросов пул выбирается целиком и загрузка ждёт до таймаута.
+
+# full — все поля; summary — только то, что нужно для оглавления:
+# без Lesson.content, Task.body и вариантов ответа (из БД они не читаются)
+View = Literal["full", "summary"]
+
+lessons_flight = SingleFlight("lessons")
+tasks_flight = SingleFlight("tasks")
+
+
+@dataclass(frozen=True)
+class LessonRow:
+    id: int
+    course_id: int
+    title: str
+    content: Optional[str]
+    content_hash: Optional[str]
+
+
+@dataclass(frozen=True)
+class TaskOptionRow:
+    id: int
+    text: str
+    is_correct: bool
+
+
+@dataclass(frozen=True)
+class TaskRow:
+    id: int
+    lesson_id: int
+    title: str
+    body: Optional[str]
+    has_autocheck: bool
+    options: Tuple[TaskOptionRow, ...]
+
+
+async def _select_lessons(course_id: int | None, view: View) -> Tuple[LessonRow, ...]:
+    stmt = select(Lesson)
+    if view == "summary":
+        stmt = stmt.options(load_only(Lesson.id, Lesson.course_id, Lesson.title, Lesson.content_hash))
+    if course_id is not None:
+        stmt = stmt.where(Lesson.course_id == course_id)
+    async with AsyncSessionLocal() as session:
+        res = await session.execute(stmt.order_by(Lesson.id))
+        return tuple(
+            LessonRow(
+                id=lesson.id,
+                course_id=lesson.course_id,
+                title=lesson.title,
+                content=lesson.content if view == "full" else None,
+                content_hash=lesson.content_hash,
+            )
+            for lesson in res.scalars().all()
+        )
+
+
+async def _select_tasks(lesson_id: int | None, view: View) -> Tuple[TaskRow, ...]:
+    if view == "summary":
+        stmt = select(Task).options(load_only(Task.id, Task.lesson_id, Task.title, Task.has_autocheck))
+    else:
+        stmt = select(Task).options(selectinload(Task.options))
+    if lesson_id is not None:
+        stmt = stmt.where(Task.lesson_id == lesson_id)
+    async with AsyncSessionLocal() as session:
+        res = await session.execute(stmt.order_by(Task.id))
+        return tuple(
+            TaskRow(
+                id=task.id,
+                lesson_id=task.lesson_id,
+                title=task.title,
+                body=task.body if view == "full" else None,
+                has_autocheck=task.has_autocheck,
+                options=tuple(
+                    TaskOptionRow(id=o.id, text=o.text, is_correct=o.is_correct)
+                    for o in task.options
+                )
+                if view == "full"
+                else (),
+            )
+            for task in res.scalars().all()
+        )
+
+
+def _published_task_rows(lesson_id: int, tasks: Iterable[SnapshotTaskOut], view: View) -> Tuple[TaskRow, ...]:
+    return tuple(
+        TaskRow(
+            id=task.id,
+            lesson_id=lesson_id,
+            title=task.title,
+            body=task.body if view == "full" else None,
+            has_autocheck=task.has_autocheck,
+            options=tuple(
+                TaskOptionRow(id=o.id, text=o.text, is_correct=o.is_correct) for o in task.options
+            )
+            if view == "full"
+            else (),
+        )
+        for task in tasks
+    )
+
+
+async def published_lessons(
+    db: AsyncSession, course_id: int, view: View = "full"
+) -> Optional[Tuple[LessonRow, ...]]:
+    """Уроки текущей опубликованной версии курса; None — курс не опубликован."""
+    content = await published_content(db, course_id)
+    if content is None:
+        return None
+    return tuple(
+        LessonRow(
+            id=lesson.id,
+            course_id=course_id,
+            title=lesson.title,
+            content=lesson.content if view == "full" else None,
+            content_hash=lesson.content_hash,
+        )
+        for lesson in content.lessons
+    )
+
+
+async def published_tasks(
+    db: AsyncSession, lesson_id: int, view: View = "full"
+) -> Optional[Tuple[TaskRow, ...]]:
+    """
+    Задачи урока в текущей опубликованной версии его курса (урока, добавленного
+    после публикации, там нет — пустой список). None — курс не опубликован.
+    """
+    course_id = await ownership.lesson_course(db, lesson_id)
+    if course_id is None:
+        return None
+    content = await published_content(db, course_id)
+    if content is None:
+        return None
+    lesson = next((lesson for lesson in content.lessons if lesson.id == lesson_id), None)
+    return _published_task_rows(lesson_id, lesson.tasks if lesson is not None else (), view)
+
+
+async def load_lessons(course_id: int | None, view: View = "full") -> Tuple[LessonRow, ...]:
+    return await lessons_flight.do((course_id, view), lambda: _select_lessons(course_id, view))
+
+
+async def load_tasks(lesson_id: int | None, view: View = "full") -> Tuple[TaskRow, ...]:
+    return await tasks_flight.do((lesson_id, view), lambda: _select_tasks(lesson_id, view))
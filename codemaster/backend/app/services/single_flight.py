@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Склейка одинаковых одновременных загрузок: пока загрузка по ключу идёт,
+    остальные вызовы с тем же ключом ждут её и получают тот же результат.
+    Результат должен быть неизменяемым — он общий для всех ожидающих.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.executions = 0
+
+    async def do(self, key: Hashable, loader: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+        future = self._in_flight.get(key)
+        if future is None:
+            self.executions += 1
+            future = asyncio.ensure_future(loader())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # shield: отмена одного ожидающего (клиент отключился) не отменяет общую загрузку
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.calls - self.executions,
+            "coalescing_ratio": round(self.calls / self.executions, 3) if self.executions else None,
+            "in_flight": len(self._in_flight),
+        }
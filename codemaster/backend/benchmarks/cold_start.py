@@ -0,0 +1,80 @@
+"""
+Бенчмарк холодного старта: от exec процесса uvicorn до первого обслуженного запроса.
+
+Пример (из codemaster/backend):
+    python benchmarks/cold_start.py --runs 5 --path /health
+    DB_STARTUP_MODE=check_migrations python benchmarks/cold_start.py --path /health/ready
+
+Переменные окружения (DATABASE_URL, DB_STARTUP_MODE, ...) передаются серверу как есть.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_once(path: str, timeout: float) -> float:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}{path}"
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=os.environ.copy(),
+    )
+    try:
+        while True:
+            elapsed = time.perf_counter() - started
+            if elapsed > timeout:
+                raise TimeoutError(f"{url} не ответил за {timeout} с")
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn завершился с кодом {proc.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=0.5) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError, TimeoutError):
+                pass
+            time.sleep(0.01)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/health", help="эндпоинт, ответ 200 которого считаем первым запросом")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    samples = []
+    for i in range(args.runs):
+        seconds = measure_once(args.path, args.timeout)
+        samples.append(seconds)
+        print(f"run {i + 1}: {seconds * 1000:.0f} ms")
+
+    print(
+        f"{args.path}: median {statistics.median(samples) * 1000:.0f} ms, "
+        f"min {min(samples) * 1000:.0f} ms, max {max(samples) * 1000:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Бенчмарк сжатия ответов: байты и CPU на запрос для типичных JSON-документов
+(список уроков курса, дерево курса с задачами).
+
+Пример (из codemaster/backend):
+    python benchmarks/compression.py --lessons 40 --tasks 8 --repeat 200
+
+Строки таблицы:
+    identity        — без сжатия
+    gzip-N / br-N   — сжатие middleware на каждый запрос с заданным уровнем
+    precompressed   — запись кеша, сжатая один раз (CPU на запрос ~ 0)
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.encoding import AVAILABLE_ENCODINGS, PrecompressedBody, compress  # noqa: E402
+
+PARAGRAPH = (
+    "В этом уроке разбираем циклы: for, while и их отличия. "
+    "Пример: `for i in range(10): print(i)`. Обратите внимание на условие выхода. "
+)
+
+
+def lesson_list(lessons: int) -> bytes:
+    return json.dumps(
+        [
+            {
+                "id": i,
+                "course_id": 1,
+                "title": f"Урок {i}: управляющие конструкции",
+                "content": PARAGRAPH * 12,
+                "content_hash": f"{i:064x}",
+                "is_completed": i % 3 == 0,
+            }
+            for i in range(1, lessons + 1)
+        ],
+        ensure_ascii=False,
+    ).encode()
+
+
+def course_tree(lessons: int, tasks: int) -> bytes:
+    return json.dumps(
+        {
+            "id": 1,
+            "title": "Основы программирования",
+            "lessons": [
+                {
+                    "id": i,
+                    "title": f"Урок {i}",
+                    "tasks": [
+                        {
+                            "id": i * 100 + j,
+                            "title": f"Задача {j}",
+                            "body": "Что выведет программа? " * 4,
+                            "options": [
+                                {"id": k, "text": f"Вариант {k}", "is_correct": k == 1}
+                                for k in range(1, 5)
+                            ],
+                        }
+                        for j in range(tasks)
+                    ],
+                }
+                for i in range(1, lessons + 1)
+            ],
+        },
+        ensure_ascii=False,
+    ).encode()
+
+
+def cpu_ms(fn, repeat: int) -> float:
+    started = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - started) * 1000 / repeat
+
+
+def report(name: str, payload: bytes, repeat: int) -> None:
+    print(f"\n{name}: {len(payload)} bytes")
+    print(f"  {'variant':<20}{'bytes':>10}{'ratio':>8}{'cpu ms/req':>12}")
+    print(f"  {'identity':<20}{len(payload):>10}{1.0:>8.3f}{0.0:>12.3f}")
+
+    levels = {"gzip": (1, 6, 9), "br": (1, 4, 11)}
+    for coding in AVAILABLE_ENCODINGS:
+        for level in levels[coding]:
+            out = compress(payload, coding, level)
+            ms = cpu_ms(lambda: compress(payload, coding, level), repeat)
+            print(f"  {f'{coding}-{level}':<20}{len(out):>10}{len(out) / len(payload):>8.3f}{ms:>12.3f}")
+
+    body = PrecompressedBody.build(payload)
+    ms = cpu_ms(lambda: body.select("gzip, br"), repeat)
+    out, coding = body.select("gzip, br")
+    print(f"  {f'precompressed-{coding}':<20}{len(out):>10}{len(out) / len(payload):>8.3f}{ms:>12.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lessons", type=int, default=40)
+    parser.add_argument("--tasks", type=int, default=8, help="задач на урок в дереве курса")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"encodings: {', '.join(AVAILABLE_ENCODINGS)}")
+    report("lesson list", lesson_list(args.lessons), args.repeat)
+    report("course tree", course_tree(args.lessons, args.tasks), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Общая обвязка тестов: ASGI-приложение поверх временной SQLite-базы,
+фабрики моделей и бюджет запросов к БД на вызов эндпоинта.
+
+Окружение выставляется до импорта app — настройки читаются один раз.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+_DB_DIR = tempfile.mkdtemp(prefix="codemaster-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{Path(_DB_DIR) / 'test.db'}"
+os.environ["DB_STARTUP_MODE"] = "skip"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["INVALIDATION_BACKEND"] = "inprocess"
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.core.revocation import revocations  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.db.database import AsyncSessionLocal, Base, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.attempt import partition_metadata  # noqa: E402
+from app.models import Course, Lesson, Progress, Task, TaskOption, User  # noqa: E402
+from app.services.attempt_history import partitions  # noqa: E402
+from app.services.catalog_cache import catalog_cache  # noqa: E402
+from app.services.funnel import funnel  # noqa: E402
+from app.services.course_snapshots import snapshot_cache  # noqa: E402
+from app.services.event_log import event_log  # noqa: E402
+from app.services.leaderboard import leaderboard  # noqa: E402
+from app.services.lesson_content import apply_rendered  # noqa: E402
+from app.services.ownership import ownership  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db_schema():
+    """Чистая схема на каждый тест и сброс in-memory кешей воркера."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(partition_metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    leaderboard.invalidate()
+    ownership.invalidate()
+    catalog_cache.invalidate()
+    snapshot_cache.invalidate()
+    partitions.invalidate()
+    funnel.invalidate()
+    event_log.discard()
+    # список отзывов грузится раз в час на воркер — не должен попадать в бюджеты запросов
+    async with AsyncSessionLocal() as session:
+        await revocations.ensure_loaded(session)
+    yield
+    await engine.dispose()
+
+
+@pytest.fixture
+async def client(db_schema):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+class Factory:
+    """Создание данных напрямую через ORM (без argon2 и HTTP)."""
+
+    def __init__(self) -> None:
+        self._seq = 0
+
+    def _next(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    async def _save(self, *objects):
+        async with AsyncSessionLocal() as session:
+            session.add_all(objects)
+            await session.commit()
+        return objects[0] if len(objects) == 1 else objects
+
+    async def user(self, teacher: bool = False, email: Optional[str] = None) -> User:
+        n = self._next()
+        return await self._save(
+            User(
+                email=email or f"user{n}@example.com",
+                hashed_password="!",
+                full_name=f"User {n}",
+                is_teacher=teacher,
+            )
+        )
+
+    async def course(self, owner: User, title: Optional[str] = None) -> Course:
+        n = self._next()
+        return await self._save(Course(title=title or f"Course {n}", description="d", owner_id=owner.id))
+
+    async def lesson(self, course: Course, content: str = "# Урок\n\nтекст") -> Lesson:
+        lesson = Lesson(course_id=course.id, title=f"Lesson {self._next()}", content=content)
+        apply_rendered(lesson)
+        return await self._save(lesson)
+
+    async def task(self, lesson: Lesson, options: int = 4) -> Task:
+        task = await self._save(
+            Task(lesson_id=lesson.id, title=f"Task {self._next()}", body="?", has_autocheck=options > 0)
+        )
+        if options:
+            await self._save(
+                *[
+                    TaskOption(task_id=task.id, text=f"option {i}", is_correct=i == 0)
+                    for i in range(options)
+                ]
+            )
+        return task
+
+    async def enroll(self, user: User, course: Course) -> Progress:
+        return await self._save(Progress(user_id=user.id, course_id=course.id))
+
+    async def course_tree(self, owner: User, lessons: int, tasks_per_lesson: int) -> Course:
+        course = await self.course(owner)
+        for _ in range(lessons):
+            lesson = await self.lesson(course)
+            for _ in range(tasks_per_lesson):
+                await self.task(lesson)
+        return course
+
+    @staticmethod
+    def headers(user: User) -> Dict[str, str]:
+        token = create_access_token({"sub": str(user.id), "is_teacher": user.is_teacher})
+        return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def factory(db_schema) -> Factory:
+    return Factory()
+
+
+class QueryBudget:
+    """Считает SQL-выражения, ушедшие в БД, и время блока."""
+
+    def __init__(self) -> None:
+        self.statements: List[str] = []
+        self.elapsed_ms = 0.0
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+    @asynccontextmanager
+    async def __call__(self, max_queries: Optional[int] = None, max_ms: Optional[float] = None):
+        self.statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.elapsed_ms = (time.perf_counter() - started) * 1000
+            event.remove(engine.sync_engine, "before_cursor_execute", self._on_execute)
+        if max_queries is not None:
+            assert self.count <= max_queries, (
+                f"{self.count} queries > budget {max_queries}:\n" + "\n---\n".join(self.statements)
+            )
+        if max_ms is not None:
+            assert self.elapsed_ms <= max_ms, f"{self.elapsed_ms:.1f} ms > budget {max_ms} ms"
+
+
+@pytest.fixture
+def query_budget() -> QueryBudget:
+    """
+    async with query_budget(max_queries=3, max_ms=200) as q:
+        await client.get(...)
+    """
+    return QueryBudget()
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import time
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import inspect, select
+
+from app.core.config import get_settings
+from app.core.invalidation import KEY_ATTEMPT_PARTITIONS, Invalidation, bus
+from app.db.database import AsyncSessionLocal
+from app.models.attempt import AttemptSummary, partition_name
+from app.services import attempt_history
+from app.services.attempt_history import (
+    PartitionRegistry,
+    compact,
+    month_of,
+    months_back,
+    partitions,
+    recent_attempts,
+    write_attempts,
+)
+from app.services.event_log import event_log
+
+pytestmark = pytest.mark.anyio
+
+
+def test_months_back_crosses_year():
+    assert months_back(date(2026, 2, 1), 2) == date(2025, 12, 1)
+    assert months_back(date(2026, 2, 1), 0) == date(2026, 2, 1)
+
+
+def _attempt(user_id, task_id, when, option_id, is_correct):
+    return {
+        "user_id": user_id,
+        "course_id": 1,
+        "lesson_id": 1,
+        "task_id": task_id,
+        "option_id": option_id,
+        "is_correct": is_correct,
+        "created_at": when,
+    }
+
+
+async def _tables():
+    async with AsyncSessionLocal() as db:
+        names = await db.run_sync(lambda s: inspect(s.connection()).get_table_names())
+    return sorted(name for name in names if name.startswith("attempts_"))
+
+
+async def test_compaction_folds_old_months_into_summaries(db_schema):
+    async with AsyncSessionLocal() as db:
+        await write_attempts(
+            db,
+            [
+                _attempt(7, 1, datetime(2026, 6, 3), 11, False),
+                _attempt(7, 1, datetime(2026, 6, 4), 12, True),
+                _attempt(7, 1, datetime(2026, 7, 1), 13, False),
+                _attempt(8, 1, datetime(2026, 7, 2), 12, True),
+                _attempt(7, 1, datetime(2026, 10, 5), 12, True),
+            ],
+        )
+        await db.commit()
+    assert await _tables() == ["attempts_2026_06", "attempts_2026_07", "attempts_2026_10"]
+
+    async with AsyncSessionLocal() as db:
+        dry = await compact(db, keep_months=3, today=date(2026, 10, 19), dry_run=True)
+    assert dry == {"attempts_2026_06": 2, "attempts_2026_07": 2}
+    assert len(await _tables()) == 3
+
+    async with AsyncSessionLocal() as db:
+        assert await compact(db, keep_months=3, today=date(2026, 10, 19)) == dry
+        rows = (await db.execute(select(AttemptSummary).order_by(AttemptSummary.user_id))).scalars().all()
+    assert await _tables() == ["attempts_2026_10"]
+
+    student = rows[0]
+    assert (student.user_id, student.attempts, student.correct_attempts) == (7, 3, 1)
+    assert student.first_attempt_at == datetime(2026, 6, 3)
+    assert student.last_attempt_at == datetime(2026, 7, 1)
+    assert (student.last_option_id, student.last_is_correct) == (13, False)
+    assert (rows[1].user_id, rows[1].attempts, rows[1].correct_attempts) == (8, 1, 1)
+
+
+async def test_submitted_attempts_reach_history(client, factory):
+    teacher = await factory.user(teacher=True)
+    student = await factory.user()
+    course = await factory.course(teacher)
+    lesson = await factory.lesson(course)
+    task = await factory.task(lesson)
+    await factory.enroll(student, course)
+    headers = factory.headers(student)
+
+    options = (await client.get(f"/tasks/{task.id}", headers=headers)).json()["options"]
+    wrong = next(o for o in options if not o["is_correct"])
+    right = next(o for o in options if o["is_correct"])
+    for option in (wrong, right):
+        res = await client.post(
+            f"/tasks/{task.id}/submit-answer", json={"option_id": option["id"]}, headers=headers
+        )
+        assert res.status_code == 200
+    await event_log.flush()
+
+    res = await client.get(f"/tasks/{task.id}/attempts", headers=headers)
+    assert res.status_code == 200
+    body = res.json()
+    assert [a["option_id"] for a in body["recent"]] == [right["id"], wrong["id"]]
+    assert body["older"] is None
+
+
+async def test_compact_keeps_at_least_current_month(db_schema):
+    async with AsyncSessionLocal() as db:
+        with pytest.raises(ValueError):
+            await compact(db, keep_months=0)
+
+
+async def test_reads_survive_compaction_by_another_worker(db_schema, monkeypatch):
+    current = month_of(datetime.now(timezone.utc).date())
+    expired = months_back(current, get_settings().ATTEMPT_HISTORY_MONTHS)
+    async with AsyncSessionLocal() as db:
+        await write_attempts(
+            db,
+            [
+                _attempt(7, 1, datetime.combine(expired, datetime.min.time()), 11, False),
+                _attempt(7, 1, datetime.combine(current, datetime.min.time()), 12, True),
+            ],
+        )
+        await db.commit()
+        assert [a.option_id for a in await recent_attempts(db, 7, task_id=1)] == [12]
+    assert partitions.known(partition_name(expired))
+
+    # свёртка в другом воркере: у него свой реестр, наш о ней не знает
+    monkeypatch.setattr(attempt_history, "partitions", PartitionRegistry())
+    async with AsyncSessionLocal() as db:
+        assert await compact(db) == {partition_name(expired): 1}
+    monkeypatch.undo()
+    assert partitions.known(partition_name(expired))
+
+    async with AsyncSessionLocal() as db:
+        assert [a.option_id for a in await recent_attempts(db, 7, task_id=1)] == [12]
+
+    # сообщение другого воркера сбрасывает реестр
+    bus._deliver(Invalidation(key=KEY_ATTEMPT_PARTITIONS, version=time.time_ns(), origin="other"))
+    assert not partitions.known(partition_name(expired))
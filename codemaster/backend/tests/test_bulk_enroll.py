@@ -0,0 +1,101 @@
+import pytest
+from sqlalchemy import select
+
+from app.db.database import AsyncSessionLocal
+from app.models.cohort import CohortMember
+from app.models.progress import Progress
+from app.services.bulk_enroll import parse_csv
+
+
+def test_parse_csv_uses_email_column():
+    text = "name,Email\nAnna, anna@x.io \n\nBoris,boris@x.io\nno-email\n"
+    assert parse_csv(text) == ["anna@x.io", "boris@x.io", ""]
+
+
+def test_parse_csv_without_header_takes_first_column():
+    assert parse_csv("a@x.io,A\nb@x.io\n") == ["a@x.io", "b@x.io"]
+    assert parse_csv("") == []
+
+
+async def _members(cohort_id: int) -> set:
+    async with AsyncSessionLocal() as db:
+        res = await db.execute(select(CohortMember.user_id).where(CohortMember.cohort_id == cohort_id))
+        return set(res.scalars().all())
+
+
+@pytest.mark.anyio
+async def test_enroll_bulk_json_reports_status_per_row(client, factory):
+    teacher = await factory.user(teacher=True)
+    course = await factory.course(teacher)
+    fresh = await factory.user(email="Fresh@x.io")
+    enrolled = await factory.user()
+    await factory.enroll(enrolled, course)
+    other_teacher = await factory.user(teacher=True)
+
+    res = await client.post(
+        f"/teacher/courses/{course.id}/enroll-bulk",
+        json={
+            "emails": ["fresh@x.io", enrolled.email, "ghost@x.io", other_teacher.email, "nope", "FRESH@x.io"],
+            "cohort": "Поток 1",
+        },
+        headers=factory.headers(teacher),
+    )
+    assert res.status_code == 200
+    body = res.json()
+    assert [(row["status"], row["user_id"]) for row in body["rows"]] == [
+        ("enrolled", fresh.id),
+        ("already_enrolled", enrolled.id),
+        ("not_found", None),
+        ("not_student", other_teacher.id),
+        ("invalid", None),
+        ("duplicate", None),
+    ]
+    assert (body["enrolled"], body["already_enrolled"], body["failed"]) == (1, 1, 4)
+
+    async with AsyncSessionLocal() as db:
+        res = await db.execute(select(Progress.user_id).where(Progress.course_id == course.id))
+        assert set(res.scalars().all()) == {fresh.id, enrolled.id}
+    # в группу попадают все студенты списка, в том числе записанные раньше
+    assert await _members(body["cohort_id"]) == {fresh.id, enrolled.id}
+
+
+@pytest.mark.anyio
+async def test_enroll_bulk_csv_adds_to_existing_cohort(client, factory):
+    teacher = await factory.user(teacher=True)
+    course = await factory.course(teacher)
+    first, second = await factory.user(), await factory.user()
+    url = f"/teacher/courses/{course.id}/enroll-bulk"
+    headers = factory.headers(teacher)
+
+    res = await client.post(url, json={"emails": [first.email], "cohort": "A"}, headers=headers)
+    cohort_id = res.json()["cohort_id"]
+
+    csv_body = f"name,email\nFirst,{first.email}\nSecond,{second.email}\n"
+    res = await client.post(
+        url,
+        params={"cohort": "A"},
+        content=csv_body.encode(),
+        headers={**headers, "Content-Type": "text/csv"},
+    )
+    assert res.status_code == 200
+    body = res.json()
+    assert [row["status"] for row in body["rows"]] == ["already_enrolled", "enrolled"]
+    assert body["cohort_id"] == cohort_id
+    assert await _members(cohort_id) == {first.id, second.id}
+
+
+@pytest.mark.anyio
+async def test_enroll_bulk_requires_course_owner(client, factory):
+    owner = await factory.user(teacher=True)
+    course = await factory.course(owner)
+    stranger = await factory.user(teacher=True)
+    student = await factory.user()
+    url = f"/teacher/courses/{course.id}/enroll-bulk"
+    body = {"emails": [student.email]}
+
+    res = await client.post(url, json=body, headers=factory.headers(stranger))
+    assert res.status_code == 404
+    res = await client.post(url, json=body, headers=factory.headers(student))
+    assert res.status_code == 403
+    async with AsyncSessionLocal() as db:
+        assert (await db.execute(select(Progress).where(Progress.user_id == student.id))).first() is None
@@ -0,0 +1,70 @@
+import asyncio
+import gzip
+
+from app.core.compression import CompressionMiddleware
+from app.core.encoding import PrecompressedBody, choose_encoding
+from app.core.invalidation import KEY_CATALOG, bus
+from app.services.catalog_cache import catalog_cache
+
+
+def _app(body: bytes, headers=None):
+    async def app(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": headers or [(b"content-type", b"application/json")],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    return app
+
+
+def _call(app, accept_encoding: str):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    asyncio.run(app(scope, None, send))
+    return dict(sent[0]["headers"]), sent[1]["body"]
+
+
+def test_large_json_is_gzipped():
+    body = b'{"items": [' + b'{"title": "lesson"},' * 200 + b"{}]}"
+    headers, sent = _call(CompressionMiddleware(_app(body), minimum_size=100), "gzip")
+    assert headers[b"content-encoding"] == b"gzip"
+    assert headers[b"vary"] == b"Accept-Encoding"
+    assert gzip.decompress(sent) == body
+
+
+def test_small_and_encoded_responses_pass_through():
+    headers, sent = _call(CompressionMiddleware(_app(b"{}"), minimum_size=100), "gzip")
+    assert b"content-encoding" not in headers and sent == b"{}"
+
+    encoded = [(b"content-type", b"application/json"), (b"content-encoding", b"br")]
+    app = CompressionMiddleware(_app(b"x" * 500, encoded), minimum_size=100)
+    headers, sent = _call(app, "gzip")
+    assert headers[b"content-encoding"] == b"br" and sent == b"x" * 500
+
+
+def test_choose_encoding_respects_q_values():
+    assert choose_encoding("gzip;q=0.5, br", ("br", "gzip")) == "br"
+    assert choose_encoding("gzip, br;q=0", ("br", "gzip")) == "gzip"
+    assert choose_encoding("identity", ("br", "gzip")) is None
+
+
+def test_catalog_cache_drops_stale_fill():
+    body = PrecompressedBody.build(b"[]")
+    assert gzip.decompress(body.encoded["gzip"]) == b"[]"
+
+    generation = catalog_cache.generation
+    bus.publish(KEY_CATALOG)  # курс создан, пока шло чтение
+    catalog_cache.put(generation, b"[]")
+    assert catalog_cache.get() is None
+
+    catalog_cache.put(catalog_cache.generation, b"[]")
+    assert catalog_cache.get() is not None
+    catalog_cache.invalidate()
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_clone_copies_lessons_tasks_and_options(client, factory):
+    teacher = await factory.user(teacher=True)
+    source = await factory.course_tree(teacher, lessons=2, tasks_per_lesson=3)
+    headers = factory.headers(teacher)
+
+    res = await client.post(f"/teacher/courses/{source.id}/clone", headers=headers)
+    assert res.status_code == 201
+    body = res.json()
+    assert body["title"] == f"{source.title} (копия)"
+    assert (body["lessons"], body["tasks"], body["options"]) == (2, 6, 24)
+
+    old = (await client.get(f"/teacher/courses/{source.id}/lessons", headers=headers)).json()
+    new = (await client.get(f"/teacher/courses/{body['id']}/lessons", headers=headers)).json()
+    assert [lesson["title"] for lesson in new] == [lesson["title"] for lesson in old]
+    assert {lesson["id"] for lesson in new}.isdisjoint(lesson["id"] for lesson in old)
+
+    for old_lesson, new_lesson in zip(old, new):
+        old_tasks = (await client.get(f"/teacher/lessons/{old_lesson['id']}/tasks", headers=headers)).json()
+        new_tasks = (await client.get(f"/teacher/lessons/{new_lesson['id']}/tasks", headers=headers)).json()
+        strip = lambda tasks: [  # noqa: E731
+            (t["title"], [(o["text"], o["is_correct"]) for o in t["options"]]) for t in tasks
+        ]
+        assert strip(new_tasks) == strip(old_tasks)
+        assert all(t["lesson_id"] == new_lesson["id"] for t in new_tasks)
+
+    html = await client.get(f"/lessons/{new[0]['id']}/html", headers=headers)
+    assert html.status_code == 200 and "<h1>" in html.text
+
+    again = await client.post(f"/teacher/courses/{source.id}/clone", headers=headers)
+    assert again.json()["title"] == f"{source.title} (копия 2)"
+
+
+async def test_clone_query_count_does_not_grow_with_course(client, factory, query_budget):
+    teacher = await factory.user(teacher=True)
+    headers = factory.headers(teacher)
+    small = await factory.course_tree(teacher, lessons=1, tasks_per_lesson=1)
+    large = await factory.course_tree(teacher, lessons=10, tasks_per_lesson=10)
+
+    async with query_budget() as q_small:
+        assert (await client.post(f"/teacher/courses/{small.id}/clone", headers=headers)).status_code == 201
+    async with query_budget(max_queries=q_small.count) as q_large:
+        res = await client.post(f"/teacher/courses/{large.id}/clone", headers=headers)
+    assert res.json()["tasks"] == 100
+    assert q_large.count == q_small.count
+
+
+async def test_clone_rejects_foreign_course_and_taken_title(client, factory):
+    owner = await factory.user(teacher=True)
+    other = await factory.user(teacher=True)
+    course = await factory.course_tree(owner, lessons=1, tasks_per_lesson=1)
+
+    res = await client.post(f"/teacher/courses/{course.id}/clone", headers=factory.headers(other))
+    assert res.status_code == 404
+
+    res = await client.post(
+        f"/teacher/courses/{course.id}/clone",
+        json={"title": course.title},
+        headers=factory.headers(owner),
+    )
+    assert res.status_code == 409
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import update
+
+from app.db.database import AsyncSessionLocal
+from app.models.lesson import Lesson
+from app.models.task import Task
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_publish_and_serve_snapshot(client, factory, query_budget):
+    teacher = await factory.user(teacher=True)
+    student = await factory.user()
+    course = await factory.course_tree(teacher, lessons=2, tasks_per_lesson=2)
+    teacher_headers, student_headers = factory.headers(teacher), factory.headers(student)
+
+    assert (await client.get(f"/courses/{course.id}/content", headers=student_headers)).status_code == 404
+
+    res = await client.post(f"/teacher/courses/{course.id}/publish", headers=teacher_headers)
+    assert res.status_code == 200
+    assert res.json()["version"] == 1 and res.json()["created"] is True
+    res = await client.post(f"/teacher/courses/{course.id}/publish", headers=teacher_headers)
+    assert res.json()["version"] == 1 and res.json()["created"] is False
+
+    res = await client.get(
+        f"/courses/{course.id}/content", headers={**student_headers, "Accept-Encoding": "gzip"}
+    )
+    assert res.status_code == 200
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.headers["x-course-version"] == "1"
+    content = res.json()
+    assert [len(lesson["tasks"]) for lesson in content["lessons"]] == [2, 2]
+    assert len(content["lessons"][0]["tasks"][0]["options"]) == 4
+
+    async with query_budget() as q:
+        again = await client.get(
+            f"/courses/{course.id}/content",
+            headers={**student_headers, "If-None-Match": res.headers["etag"]},
+        )
+    assert again.status_code == 304
+    assert not any("course_snapshots" in s or "FROM lessons" in s for s in q.statements)
+
+
+async def test_draft_edits_are_invisible_until_next_publish(client, factory):
+    teacher = await factory.user(teacher=True)
+    student = await factory.user()
+    course = await factory.course_tree(teacher, lessons=1, tasks_per_lesson=1)
+    teacher_headers, student_headers = factory.headers(teacher), factory.headers(student)
+    await client.post(f"/teacher/courses/{course.id}/publish", headers=teacher_headers)
+
+    res = await client.post(
+        f"/teacher/courses/{course.id}/lessons",
+        json={"title": "Новый урок", "content": "черновик"},
+        headers=teacher_headers,
+    )
+    assert res.status_code == 201
+    current = await client.get(f"/courses/{course.id}/content", headers=student_headers)
+    assert len(current.json()["lessons"]) == 1
+
+    res = await client.post(f"/teacher/courses/{course.id}/publish", headers=teacher_headers)
+    assert res.json()["version"] == 2
+    current = await client.get(f"/courses/{course.id}/content", headers=student_headers)
+    assert current.headers["x-course-version"] == "2"
+    assert [lesson["title"] for lesson in current.json()["lessons"]][-1] == "Новый урок"
+
+    old = await client.get(f"/courses/{course.id}/content?version=1", headers=student_headers)
+    assert len(old.json()["lessons"]) == 1
+    assert "immutable" in old.headers["cache-control"]
+    assert old.headers["etag"] != current.headers["etag"]
+
+
+async def test_student_reads_serve_published_version(client, factory):
+    teacher = await factory.user(teacher=True)
+    student = await factory.user()
+    course = await factory.course_tree(teacher, lessons=1, tasks_per_lesson=1)
+    teacher_headers, student_headers = factory.headers(teacher), factory.headers(student)
+    await client.post(f"/teacher/courses/{course.id}/publish", headers=teacher_headers)
+
+    lessons = (await client.get(f"/lessons/?course_id={course.id}", headers=student_headers)).json()
+    lesson_id, published_title = lessons[0]["id"], lessons[0]["title"]
+    task_id = (await client.get(f"/tasks/?lesson_id={lesson_id}", headers=student_headers)).json()[0]["id"]
+
+    # правка черновика после публикации
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(Lesson).where(Lesson.id == lesson_id).values(title="Черновик"))
+        await db.execute(update(Task).where(Task.id == task_id).values(title="Черновик"))
+        await db.commit()
+    res = await client.post(
+        f"/teacher/lessons/{lesson_id}/tasks",
+        json={
+            "title": "Новая задача",
+            "options": [{"text": str(i), "is_correct": i == 0} for i in range(4)],
+        },
+        headers=teacher_headers,
+    )
+    assert res.status_code == 201, res.text
+    new_task_id = res.json()["id"]
+
+    lessons = (await client.get(f"/lessons/?course_id={course.id}", headers=student_headers)).json()
+    assert [lesson["title"] for lesson in lessons] == [published_title]
+    tasks = (await client.get(f"/tasks/?lesson_id={lesson_id}", headers=student_headers)).json()
+    assert [task["id"] for task in tasks] == [task_id]
+    assert tasks[0]["title"] != "Черновик" and len(tasks[0]["options"]) == 4
+    task = await client.get(f"/tasks/{task_id}", headers=student_headers)
+    assert task.json()["title"] != "Черновик"
+    assert (await client.get(f"/tasks/{new_task_id}", headers=student_headers)).status_code == 404
+
+    # преподаватель видит черновик
+    lessons = (await client.get(f"/lessons/?course_id={course.id}", headers=teacher_headers)).json()
+    assert [lesson["title"] for lesson in lessons] == ["Черновик"]
+    tasks = (await client.get(f"/tasks/?lesson_id={lesson_id}", headers=teacher_headers)).json()
+    assert [task["id"] for task in tasks] == [task_id, new_task_id]
+
+
+async def test_only_owner_can_publish(client, factory):
+    owner = await factory.user(teacher=True)
+    other = await factory.user(teacher=True)
+    course = await factory.course_tree(owner, lessons=1, tasks_per_lesson=0)
+    res = await client.post(f"/teacher/courses/{course.id}/publish", headers=factory.headers(other))
+    assert res.status_code == 404
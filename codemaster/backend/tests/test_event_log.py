@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from app.db.database import AsyncSessionLocal
+from app.models.event import EVENT_ENROLL, LearningEvent
+from app.services import event_log as event_log_module
+from app.services.event_log import EventLogWriter
+
+pytestmark = pytest.mark.anyio
+
+
+def _writer(**kwargs) -> EventLogWriter:
+    options = {"batch_size": 100, "flush_interval": 60.0, "max_queue": 1000, "max_attempts": 2}
+    options.update(kwargs)
+    return EventLogWriter(**options)
+
+
+async def _stored() -> int:
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(func.count()).select_from(LearningEvent))).scalar_one()
+
+
+async def _wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+async def test_full_batch_is_flushed_without_waiting_for_interval(db_schema):
+    writer = _writer(batch_size=3)
+    await writer.start()
+    try:
+        for user_id in range(2):
+            writer.emit(EVENT_ENROLL, user_id, course_id=1)
+        await asyncio.sleep(0.05)
+        assert writer.written == 0
+        writer.emit(EVENT_ENROLL, 2, course_id=1)
+        await _wait_for(lambda: writer.written == 3)
+    finally:
+        await writer.stop()
+    assert writer.flushes == 1
+    assert await _stored() == 3
+
+
+async def test_partial_batch_is_flushed_by_interval(db_schema):
+    writer = _writer(flush_interval=0.05)
+    await writer.start()
+    try:
+        writer.emit(EVENT_ENROLL, 1, course_id=1)
+        await _wait_for(lambda: writer.written == 1)
+    finally:
+        await writer.stop()
+    assert await _stored() == 1
+
+
+async def test_stop_flushes_remaining_events(db_schema):
+    writer = _writer(batch_size=2)
+    await writer.start()
+    for user_id in range(5):
+        writer.emit(EVENT_ENROLL, user_id, course_id=1)
+    await writer.stop()
+    assert writer.stats()["queue_depth"] == 0
+    assert await _stored() == 5
+
+
+async def test_overflow_drops_new_events(db_schema):
+    writer = _writer(max_queue=2)
+    for user_id in range(3):
+        writer.emit(EVENT_ENROLL, user_id, course_id=1)
+    assert writer.stats()["queue_depth"] == 2
+    assert writer.dropped == 1
+    await writer.flush()
+    assert await _stored() == 2
+
+
+async def test_rejected_batch_is_retried_then_split_and_dead_lettered(db_schema):
+    writer = _writer(max_attempts=2)
+    writer.emit(EVENT_ENROLL, 1, course_id=1)
+    writer.emit(None, 2, course_id=1)  # kind NOT NULL — БД отвергнет всю пачку
+    writer.emit(EVENT_ENROLL, 3, course_id=1)
+
+    await writer.flush()
+    assert writer.stats()["queue_depth"] == 3
+    assert writer.failed_flushes == 1 and await _stored() == 0
+
+    # попытки кончились: нормальные события записаны, битое ушло в лог
+    await writer.flush()
+    assert writer.stats()["queue_depth"] == 0
+    assert (writer.written, writer.dead_lettered) == (2, 1)
+    assert await _stored() == 2
+
+    # очередь не застряла: следующая пачка пишется как обычно
+    writer.emit(EVENT_ENROLL, 4, course_id=1)
+    await writer.flush()
+    assert await _stored() == 3
+
+
+async def test_unavailable_database_does_not_use_up_attempts(db_schema, monkeypatch):
+    writer = _writer(max_attempts=1)
+    writer.emit(EVENT_ENROLL, 1, course_id=1)
+
+    def refuse():
+        raise ConnectionRefusedError("db is down")
+
+    monkeypatch.setattr(event_log_module, "AsyncSessionLocal", refuse)
+    for _ in range(3):
+        await writer.flush()
+    assert writer.stats()["queue_depth"] == 1
+    assert writer.dead_lettered == 0
+
+    monkeypatch.undo()
+    await writer.flush()
+    assert writer.written == 1 and await _stored() == 1
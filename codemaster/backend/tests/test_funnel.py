@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import pytest
+
+from app.services.funnel import funnel
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_funnel_counts_and_incremental_updates(client, factory, query_budget):
+    teacher = await factory.user(teacher=True)
+    course = await factory.course_tree(teacher, lessons=3, tasks_per_lesson=2)
+    students = [await factory.user() for _ in range(4)]
+    for student in students:
+        await factory.enroll(student, course)
+    teacher_headers = factory.headers(teacher)
+
+    lessons = (await client.get(f"/teacher/courses/{course.id}/lessons", headers=teacher_headers)).json()
+    first, second = lessons[0]["id"], lessons[1]["id"]
+    first_tasks = (await client.get(f"/teacher/lessons/{first}/tasks", headers=teacher_headers)).json()
+
+    for student in students[:3]:
+        res = await client.post(f"/progress/lessons/{first}/complete", headers=factory.headers(student))
+        assert res.status_code == 200
+    await client.post(
+        f"/progress/tasks/{first_tasks[0]['id']}/complete", json={}, headers=factory.headers(students[0])
+    )
+
+    async with query_budget(max_queries=4):
+        res = await client.get(f"/teacher/courses/{course.id}/funnel", headers=teacher_headers)
+    body = res.json()
+    assert body["enrolled"] == 4
+    assert [(lesson["completed"], lesson["drop_off"]) for lesson in body["lessons"]] == [(3, 1), (0, 3), (0, 0)]
+    assert [t["completed"] for t in body["lessons"][0]["tasks"]] == [1, 0]
+    assert body["lessons"][0]["completion_rate"] == 0.75
+
+    # свои записи прибавляются к кешу без повторной агрегации
+    await client.post(f"/progress/lessons/{second}/complete", headers=factory.headers(students[0]))
+    async with query_budget() as q:
+        cached = (await client.get(f"/teacher/courses/{course.id}/funnel", headers=teacher_headers)).json()
+    assert not any("UNION ALL" in s for s in q.statements)
+    assert [lesson["completed"] for lesson in cached["lessons"]] == [3, 1, 0]
+
+    funnel.invalidate()
+    fresh = (await client.get(f"/teacher/courses/{course.id}/funnel", headers=teacher_headers)).json()
+    assert fresh == cached
+
+
+async def test_funnel_rebuilds_after_structure_change(client, factory):
+    teacher = await factory.user(teacher=True)
+    course = await factory.course_tree(teacher, lessons=1, tasks_per_lesson=1)
+    headers = factory.headers(teacher)
+    assert len((await client.get(f"/teacher/courses/{course.id}/funnel", headers=headers)).json()["lessons"]) == 1
+
+    await client.post(f"/teacher/courses/{course.id}/lessons", json={"title": "Ещё урок"}, headers=headers)
+    body = (await client.get(f"/teacher/courses/{course.id}/funnel", headers=headers)).json()
+    assert [lesson["title"] for lesson in body["lessons"]][-1] == "Ещё урок"
+
+    other = await factory.user(teacher=True)
+    res = await client.get(f"/teacher/courses/{course.id}/funnel", headers=factory.headers(other))
+    assert res.status_code == 404
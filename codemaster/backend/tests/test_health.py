@@ -1,2 +1,9 @@
-﻿def test_placeholder():
-    assert True
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_liveness(client):
+    response = await client.get("/health")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
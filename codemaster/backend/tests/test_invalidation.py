@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+from app.core.invalidation import Invalidation, InvalidationBus, UnixSocketBus
+
+
+def test_inprocess_bus_delivers_by_prefix_and_drops_stale_versions():
+    bus = InvalidationBus()
+    received = []
+    bus.subscribe("course:", received.append)
+
+    message = bus.publish("course:1")
+    bus.publish("catalog")
+    bus._deliver(message)  # повтор той же версии
+
+    assert [m.key for m in received] == ["course:1"]
+    assert received[0].is_local
+
+
+def test_unix_socket_bus_reaches_other_workers(tmp_path):
+    async def scenario():
+        workers = [UnixSocketBus(str(tmp_path)) for _ in range(3)]
+        inboxes = [[] for _ in workers]
+        for worker, inbox in zip(workers, inboxes):
+            worker.subscribe("progress:", inbox.append)
+            await worker.start()
+        try:
+            started = time.perf_counter()
+            workers[0].publish("progress:course:7", {"user_id": 3, "score_avg": 0.5})
+            while not (inboxes[1] and inboxes[2]):
+                assert time.perf_counter() - started < 0.5
+                await asyncio.sleep(0.001)
+        finally:
+            for worker in workers:
+                await worker.stop()
+        return inboxes
+
+    inboxes = asyncio.run(scenario())
+    assert [m.is_local for m in inboxes[0]] == [True]
+    for inbox in inboxes[1:]:
+        assert [(m.key, m.is_local) for m in inbox] == [("progress:course:7", False)]
+        assert inbox[0].payload == {"user_id": 3, "score_avg": 0.5}
+
+
+def test_payload_messages_are_not_dropped_as_stale():
+    bus = InvalidationBus()
+    received = []
+    bus.subscribe("progress:", received.append)
+
+    bus.publish("progress:course:1")
+    older = Invalidation(key="progress:course:1", version=1, origin="other", payload={"user_id": 5})
+    bus._deliver(older)
+    bus._deliver(Invalidation(key="progress:course:1", version=2, origin="other"))
+
+    assert [m.payload for m in received] == [None, {"user_id": 5}]
@@ -0,0 +1,87 @@
+import random
+import time
+
+from app.core.invalidation import Invalidation, bus, course_progress_key
+from app.models.progress import Progress
+from app.services.leaderboard import (
+    CourseLeaderboard,
+    LeaderboardEntry,
+    LeaderboardRegistry,
+    progress_update,
+)
+
+
+def _sorted_ids(entries):
+    return [e.user_id for e in sorted(entries.values(), key=lambda e: e.key)]
+
+
+def test_leaderboard_matches_full_sort():
+    rnd = random.Random(42)
+    board = CourseLeaderboard(course_id=1)
+    expected = {}
+    for _ in range(2000):
+        user_id = rnd.randint(1, 300)
+        if rnd.random() < 0.1:
+            board.remove(user_id)
+            expected.pop(user_id, None)
+            continue
+        entry = LeaderboardEntry(
+            user_id=user_id,
+            lessons_completed=rnd.randint(0, 5),
+            tasks_completed=rnd.randint(0, 20),
+            score_avg=rnd.choice([0.0, 0.25, 0.5, 1.0]),
+        )
+        board.upsert(entry)
+        expected[user_id] = entry
+
+    order = _sorted_ids(expected)
+    assert len(board) == len(order)
+    assert [e.user_id for _, e in board.top(15)] == order[:15]
+    for rank, user_id in enumerate(order, start=1):
+        assert board.rank_of(user_id) == rank
+
+
+def test_leaderboard_around_clamps_to_edges():
+    board = CourseLeaderboard(course_id=1)
+    for user_id in range(1, 6):
+        board.upsert(LeaderboardEntry(user_id, 0, user_id, 1.0))
+
+    # больше задач -> выше место: user 5 первый, user 1 последний
+    assert [rank for rank, _ in board.around(5, 2)] == [1, 2, 3]
+    assert [e.user_id for _, e in board.around(3, 1)] == [4, 3, 2]
+    assert [rank for rank, _ in board.around(1, 2)] == [3, 4, 5]
+    assert board.around(42, 2) == []
+
+
+def test_older_entry_does_not_override_newer():
+    board = CourseLeaderboard(course_id=1)
+    board.upsert(LeaderboardEntry(1, 0, 5, 1.0, version=20))
+    board.upsert(LeaderboardEntry(1, 0, 1, 0.0, version=10))
+    assert board.top(1)[0][1].tasks_completed == 5
+
+
+def _remote(course_id, payload=None, version=None):
+    return Invalidation(
+        key=course_progress_key(course_id),
+        version=version or time.time_ns(),
+        origin="other-worker",
+        payload=payload,
+    )
+
+
+def test_remote_progress_is_applied_without_rebuild(monkeypatch):
+    registry = LeaderboardRegistry()
+    monkeypatch.setattr("app.services.leaderboard.leaderboard", registry)
+    board = CourseLeaderboard(course_id=3)
+    board.upsert(LeaderboardEntry(1, 0, 2, 0.5, version=1))
+    registry._boards[3] = board
+
+    row = Progress(user_id=2, course_id=3, lessons_completed=1, tasks_completed=4, score_avg=1.0)
+    bus._deliver(_remote(3, progress_update(row)))
+    assert registry.is_loaded(3)
+    assert [e.user_id for _, e in registry._boards[3].top(2)] == [2, 1]
+
+    # массовое изменение без строк — рейтинг перечитается из БД
+    bus._deliver(_remote(3))
+    assert not registry.is_loaded(3)
+
@@ -0,0 +1,40 @@
+import gzip
+import hashlib
+
+from app.core.encoding import accepts_encoding, etag_matches, parse_accept_encoding
+from app.core.markdown import render_markdown
+from app.services.lesson_content import render_content
+
+
+def test_markdown_escapes_raw_html():
+    html = render_markdown('<script>alert(1)</script> **x** [a](javascript:alert(1)) [b](https://e.com)')
+    assert "<script>" not in html
+    assert "&lt;script&gt;" in html
+    assert "<strong>x</strong>" in html
+    assert 'href="javascript' not in html
+    assert '<a href="https://e.com" rel="nofollow noopener">b</a>' in html
+
+
+def test_markdown_blocks():
+    html = render_markdown("# T\n\n- a\n- b\n\n```py\nx < 1\n```")
+    assert html == (
+        "<h1>T</h1>\n<ul><li>a</li><li>b</li></ul>\n"
+        '<pre><code class="language-py">x &lt; 1</code></pre>'
+    )
+
+
+def test_render_content_is_deterministic():
+    html_gz, content_hash = render_content("*hi*")
+    assert render_content("*hi*") == (html_gz, content_hash)
+    assert gzip.decompress(html_gz) == b"<p><em>hi</em></p>"
+    assert content_hash == hashlib.sha256(b"<p><em>hi</em></p>").hexdigest()
+
+
+def test_accept_encoding_and_etag():
+    assert parse_accept_encoding("gzip;q=0.5, br") == {"gzip": 0.5, "br": 1.0}
+    assert accepts_encoding("gzip, deflate", "gzip")
+    assert not accepts_encoding("gzip;q=0", "gzip")
+    assert accepts_encoding("*", "gzip")
+    assert not accepts_encoding(None, "gzip")
+    assert etag_matches('W/"a", "b"', '"a"')
+    assert not etag_matches('"c"', '"a"')
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import pstats
+
+import httpx
+import pytest
+
+from app.core.profiling import ProfilingMiddleware
+from app.main import app
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def profiled(db_schema, tmp_path):
+    transport = httpx.ASGITransport(app=ProfilingMiddleware(app, directory=str(tmp_path), top=3))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c, tmp_path
+
+
+async def test_teacher_request_is_profiled(profiled, factory):
+    client, directory = profiled
+    teacher = await factory.user(teacher=True)
+    await factory.course_tree(teacher, lessons=2, tasks_per_lesson=2)
+
+    res = await client.get("/courses/", headers={**factory.headers(teacher), "X-Profile": "1"})
+
+    assert res.status_code == 200
+    assert res.headers["x-profile-status"] == "ok"
+    assert len(res.headers["x-profile-top"].split("; ")) == 3
+    assert float(res.headers["x-profile-total-ms"]) > 0
+    path = directory / res.headers["x-profile-file"]
+    assert path.suffix == ".prof"
+    assert pstats.Stats(str(path)).total_calls > 0
+
+
+async def test_profile_header_ignored_for_students_and_anonymous(profiled, factory):
+    client, directory = profiled
+    student = await factory.user()
+
+    for headers in ({"X-Profile": "1"}, {**factory.headers(student), "X-Profile": "1"}):
+        res = await client.get("/courses/", headers=headers)
+        assert res.status_code == 200
+        assert "x-profile-status" not in res.headers
+
+    assert list(directory.iterdir()) == []
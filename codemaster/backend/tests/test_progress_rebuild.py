@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import select
+
+from app.db.database import AsyncSessionLocal
+from app.db.rebuild_progress import rebuild
+from app.models.progress import LessonCompletion, Progress, TaskCompletion
+from app.services import progress_rebuild
+from app.services.progress_rebuild import Counters, Drift, apply_fixes, find_drift
+
+pytestmark = pytest.mark.anyio
+
+
+async def _progress():
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(select(Progress))).scalars().all()
+    return {
+        (p.user_id, p.course_id): (p.lessons_completed, p.tasks_completed, p.score_avg) for p in rows
+    }
+
+
+async def _seed(factory):
+    """Три расхождения: строки нет, строка устарела, строка без завершений."""
+    teacher = await factory.user(teacher=True)
+    course = await factory.course(teacher)
+    lesson = await factory.lesson(course)
+    task = await factory.task(lesson)
+    missing, stale, orphaned, healthy = [await factory.user() for _ in range(4)]
+
+    await factory._save(
+        LessonCompletion(user_id=missing.id, lesson_id=lesson.id, course_id=course.id),
+        LessonCompletion(user_id=stale.id, lesson_id=lesson.id, course_id=course.id),
+        TaskCompletion(user_id=stale.id, task_id=task.id, course_id=course.id, score=1.0),
+        LessonCompletion(user_id=healthy.id, lesson_id=lesson.id, course_id=course.id),
+        Progress(user_id=stale.id, course_id=course.id, lessons_completed=0, tasks_completed=0, score_avg=0.0),
+        Progress(user_id=orphaned.id, course_id=course.id, lessons_completed=3, tasks_completed=2, score_avg=0.5),
+        Progress(user_id=healthy.id, course_id=course.id, lessons_completed=1, tasks_completed=0, score_avg=0.0),
+    )
+    return course, missing, stale, orphaned, healthy
+
+
+async def test_dry_run_reports_drift_without_writing(factory, capsys):
+    course, missing, stale, orphaned, healthy = await _seed(factory)
+    before = await _progress()
+
+    assert await rebuild(dry_run=True, batch_size=500) == 3
+    out = capsys.readouterr().out
+    assert f"user={missing.id} course={course.id}: missing row" in out
+    assert f"user={stale.id} course={course.id}: lessons 0->1, tasks 0->1" in out
+    assert f"user={orphaned.id} course={course.id}: lessons 3->0, tasks 2->0" in out
+    assert f"user={healthy.id} " not in out
+    assert await _progress() == before
+
+
+async def test_apply_fixes_corrects_every_kind_of_drift(factory):
+    course, missing, stale, orphaned, healthy = await _seed(factory)
+    async with AsyncSessionLocal() as db:
+        drifts = await find_drift(db)
+        assert {d.user_id for d in drifts} == {missing.id, stale.id, orphaned.id}
+        fixed = await apply_fixes(db, drifts, batch_size=2)
+        assert len(fixed) == 3
+        assert await find_drift(db) == []
+
+    assert await _progress() == {
+        (missing.id, course.id): (1, 0, 0.0),
+        (stale.id, course.id): (1, 1, 1.0),
+        (orphaned.id, course.id): (0, 0, 0.0),
+        (healthy.id, course.id): (1, 0, 0.0),
+    }
+
+
+async def test_apply_fixes_survives_row_created_concurrently(factory, monkeypatch):
+    course, missing, *_ = await _seed(factory)
+    # живой запрос создал строку уже после того, как пачка увидела её отсутствие
+    await factory.enroll(missing, course)
+    stale_view = [Drift(missing.id, course.id, None, Counters(lessons_completed=1))]
+
+    async def find_stale(db, user_ids=None):
+        return stale_view
+
+    monkeypatch.setattr(progress_rebuild, "find_drift", find_stale)
+    async with AsyncSessionLocal() as db:
+        await apply_fixes(db, stale_view)
+    assert (await _progress())[(missing.id, course.id)] == (1, 0, 0.0)
@@ -0,0 +1,150 @@
+"""
+Бюджет запросов к БД: число SQL-выражений на вызов эндпоинта не должно
+расти вместе с объёмом данных (N+1), плюс грубый предел по времени.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.db.database import AsyncSessionLocal
+from app.models.review import ReviewSchedule
+
+pytestmark = pytest.mark.anyio
+
+LATENCY_MS = 500  # с запасом для медленных CI-машин; ловит порядки, а не проценты
+
+
+async def _queries(client, query_budget, path, headers, method="GET", max_queries=None, **kwargs) -> int:
+    async with query_budget(max_queries=max_queries, max_ms=LATENCY_MS) as q:
+        response = await client.request(method, path, headers=headers, **kwargs)
+    assert response.status_code == 200, response.text
+    return q.count
+
+
+async def test_list_tasks_is_constant_in_tasks(client, factory, query_budget):
+    teacher = await factory.user(teacher=True)
+    student = await factory.user()
+    course = await factory.course(teacher)
+    lesson = await factory.lesson(course)
+    for _ in range(2):
+        await factory.task(lesson)
+    headers = factory.headers(student)
+    path = f"/tasks/?lesson_id={lesson.id}"
+
+    # первый запрос прогревает карту владения и отметку «курс не опубликован»
+    await _queries(client, query_budget, path, headers)
+    # пользователь, задачи, варианты ответа, отметки о выполнении
+    small = await _queries(client, query_budget, path, headers, max_queries=4)
+    for _ in range(18):
+        await factory.task(lesson)
+    large = await _queries(client, query_budget, path, headers, max_queries=4)
+    assert large == small
+
+    summary = await _queries(client, query_budget, path + "&view=summary", headers)
+    assert summary < small  # без вариантов ответа
+
+
+async def test_course_tree_is_constant_in_lessons(client, factory, query_budget):
+    teacher = await factory.user(teacher=True)
+    student = await factory.user()
+    course = await factory.course_tree(teacher, lessons=2, tasks_per_lesson=1)
+    headers = factory.headers(student)
+    path = f"/lessons/?course_id={course.id}"
+
+    # первый запрос прогревает отметку «курс не опубликован»
+    await _queries(client, query_budget, path, headers)
+    small = await _queries(client, query_budget, path, headers, max_queries=3)
+    for _ in range(18):
+        await factory.lesson(course)
+    large = await _queries(client, query_budget, path, headers, max_queries=3)
+    assert large == small
+
+
+async def test_my_courses_is_constant_in_enrollments(client, factory, query_budget):
+    teacher = await factory.user(teacher=True)
+    student = await factory.user()
+    headers = factory.headers(student)
+    await factory.enroll(student, await factory.course_tree(teacher, lessons=2, tasks_per_lesson=2))
+
+    small = await _queries(client, query_budget, "/progress/my-courses", headers, max_queries=4)
+    for _ in range(9):
+        await factory.enroll(student, await factory.course_tree(teacher, lessons=2, tasks_per_lesson=2))
+    large = await _queries(client, query_budget, "/progress/my-courses", headers, max_queries=4)
+    assert large == small
+
+
+async def test_submit_answer_is_constant_in_completed_tasks(client, factory, query_budget):
+    teacher = await factory.user(teacher=True)
+    student = await factory.user()
+    course = await factory.course(teacher)
+    lesson = await factory.lesson(course)
+    tasks = [await factory.task(lesson) for _ in range(11)]
+    await factory.enroll(student, course)
+    headers = factory.headers(student)
+
+    async def answer(task) -> int:
+        res = await client.get(f"/tasks/{task.id}", headers=headers)
+        correct = next(o["id"] for o in res.json()["options"] if o["is_correct"])
+        return await _queries(
+            client,
+            query_budget,
+            f"/tasks/{task.id}/submit-answer",
+            headers,
+            method="POST",
+            json={"option_id": correct},
+        )
+
+    first = await answer(tasks[0])
+    for task in tasks[1:10]:
+        await answer(task)
+    last = await answer(tasks[10])
+    assert last == first
+
+
+async def test_teacher_students_progress_is_constant_in_students(client, factory, query_budget):
+    teacher = await factory.user(teacher=True)
+    course = await factory.course(teacher)
+    headers = factory.headers(teacher)
+    path = "/teacher/students-progress"
+
+    await factory.enroll(await factory.user(), course)
+    small = await _queries(client, query_budget, path, headers, max_queries=2)
+    for _ in range(9):
+        await factory.enroll(await factory.user(), course)
+    large = await _queries(client, query_budget, path, headers, max_queries=2)
+    assert large == small
+
+
+async def test_due_reviews_is_constant_in_schedules(client, factory, query_budget):
+    teacher = await factory.user(teacher=True)
+    student = await factory.user()
+    course = await factory.course(teacher)
+    lesson = await factory.lesson(course)
+    headers = factory.headers(student)
+
+    async def fail(task):
+        res = await client.get(f"/tasks/{task.id}", headers=headers)
+        wrong = next(o["id"] for o in res.json()["options"] if not o["is_correct"])
+        await client.post(f"/tasks/{task.id}/submit-answer", json={"option_id": wrong}, headers=headers)
+
+    async def make_due():
+        # после ошибки SM-2 назначает повтор на завтра — сдвигаем его в прошлое
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(ReviewSchedule)
+                .where(ReviewSchedule.user_id == student.id)
+                .values(due_at=datetime.utcnow() - timedelta(hours=1))
+            )
+            await db.commit()
+
+    await fail(await factory.task(lesson))
+    await make_due()
+    assert len((await client.get("/reviews/due", headers=headers)).json()) == 1
+    small = await _queries(client, query_budget, "/reviews/due", headers, max_queries=2)
+    for _ in range(9):
+        await fail(await factory.task(lesson))
+    await make_due()
+    assert len((await client.get("/reviews/due", headers=headers)).json()) == 10
+    large = await _queries(client, query_budget, "/reviews/due", headers, max_queries=2)
+    assert large == small
@@ -0,0 +1,157 @@
+import asyncio
+
+from app.core.rate_limit import (
+    AdmissionControlMiddleware,
+    ConcurrencyRule,
+    RateRule,
+    TokenBucket,
+    client_ip,
+    parse_rate,
+)
+
+
+def test_token_bucket_refills_over_time():
+    bucket = TokenBucket(capacity=2, refill_per_second=1.0, tokens=2, updated_at=0.0)
+    assert bucket.take(0.0) == 0
+    assert bucket.take(0.0) == 0
+    assert bucket.take(0.0) == 1.0
+    assert bucket.take(0.5) == 0.5
+    assert bucket.take(1.0) == 0
+
+
+def test_parse_rate():
+    assert parse_rate("30/minute") == (0.5, 30)
+    assert parse_rate("5/second") == (5.0, 5)
+
+
+def _call(app, path, method="GET", client="1.2.3.4"):
+    scope = {"type": "http", "method": method, "path": path, "headers": [], "client": (client, 1)}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent[0]["status"]
+
+
+def test_middleware_rejects_over_budget_per_ip():
+    async def ok_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    app = AdmissionControlMiddleware(
+        ok_app,
+        rate_rules=[RateRule("login", "POST", r"^/auth/login$", rate=0.01, burst=2, per="ip")],
+        concurrency_rules=[],
+    )
+    statuses = [_call(app, "/auth/login", "POST") for _ in range(3)]
+    assert statuses == [200, 200, 429]
+    assert _call(app, "/auth/login", "POST", client="5.6.7.8") == 200
+    assert _call(app, "/courses/") == 200
+
+
+def test_middleware_caps_concurrency():
+    release = None
+
+    async def slow_app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    app = AdmissionControlMiddleware(
+        slow_app,
+        rate_rules=[],
+        concurrency_rules=[ConcurrencyRule("heavy", "GET", r"^/heavy$", limit=1)],
+    )
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        statuses = []
+
+        async def call():
+            scope = {"type": "http", "method": "GET", "path": "/heavy", "headers": [], "client": ("1.1.1.1", 1)}
+
+            async def receive():
+                return {"type": "http.request", "body": b""}
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    statuses.append(message["status"])
+
+            await app(scope, receive, send)
+
+        first = asyncio.create_task(call())
+        await asyncio.sleep(0)
+        await call()
+        release.set()
+        await first
+        return statuses
+
+    assert asyncio.run(scenario()) == [503, 200]
+
+
+def test_teacher_aggregates_cover_course_reports():
+    app = AdmissionControlMiddleware(lambda *a: None)
+    for path in (
+        "/teacher/students-progress",
+        "/teacher/courses",
+        "/teacher/courses/7/funnel",
+        "/teacher/courses/7/activity",
+    ):
+        assert any(r.name == "teacher-aggregates" and r.matches("GET", path) for r in app.rate_rules)
+        assert any(r.name == "teacher-aggregates" and r.matches("GET", path) for r in app.concurrency_rules)
+    assert not any(r.name == "teacher-aggregates" and r.matches("GET", "/teacher/courses/7") for r in app.rate_rules)
+
+
+def _forwarded(client, forwarded_for):
+    return {
+        "type": "http",
+        "method": "POST",
+        "path": "/auth/login",
+        "headers": [(b"x-forwarded-for", forwarded_for.encode())],
+        "client": (client, 1),
+    }
+
+
+def test_client_ip_trusts_forwarded_for_only_from_proxies():
+    proxies = frozenset({"10.0.0.1"})
+    assert client_ip(_forwarded("10.0.0.1", "5.6.7.8"), proxies) == "5.6.7.8"
+    # подделанный клиентом адрес левее — берётся последний добавленный прокси
+    assert client_ip(_forwarded("10.0.0.1", "9.9.9.9, 5.6.7.8"), proxies) == "5.6.7.8"
+    # напрямую заголовок не принимается
+    assert client_ip(_forwarded("1.2.3.4", "5.6.7.8"), proxies) == "1.2.3.4"
+    assert client_ip(_forwarded("10.0.0.1", ""), proxies) == "10.0.0.1"
+
+
+def test_middleware_buckets_per_forwarded_client():
+    async def ok_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    app = AdmissionControlMiddleware(
+        ok_app,
+        rate_rules=[RateRule("login", "POST", r"^/auth/login$", rate=0.01, burst=1, per="ip")],
+        concurrency_rules=[],
+        trusted_proxies=["10.0.0.1"],
+    )
+
+    def call(forwarded_for):
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(app(_forwarded("10.0.0.1", forwarded_for), receive, send))
+        return sent[0]["status"]
+
+    assert call("5.6.7.8") == 200
+    assert call("5.6.7.8") == 429
+    assert call("8.7.6.5") == 200
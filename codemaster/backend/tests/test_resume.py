@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_resume_points_per_enrolled_course(client, factory, query_budget):
+    teacher = await factory.user(teacher=True)
+    first = await factory.course_tree(teacher, lessons=3, tasks_per_lesson=2)
+    second = await factory.course_tree(teacher, lessons=1, tasks_per_lesson=1)
+    await factory.course_tree(teacher, lessons=1, tasks_per_lesson=1)  # не записан
+    student = await factory.user()
+    await factory.enroll(student, first)
+    await factory.enroll(student, second)
+    headers = factory.headers(student)
+    teacher_headers = factory.headers(teacher)
+
+    lessons = (await client.get(f"/teacher/courses/{first.id}/lessons", headers=teacher_headers)).json()
+    tasks = (await client.get(f"/teacher/lessons/{lessons[0]['id']}/tasks", headers=teacher_headers)).json()
+    # первый урок отмечен, но одна его задача не решена
+    await client.post(f"/progress/lessons/{lessons[0]['id']}/complete", headers=headers)
+    await client.post(f"/progress/tasks/{tasks[0]['id']}/complete", json={}, headers=headers)
+
+    second_lesson = (await client.get(f"/teacher/courses/{second.id}/lessons", headers=teacher_headers)).json()[0]
+    second_task = (await client.get(f"/teacher/lessons/{second_lesson['id']}/tasks", headers=teacher_headers)).json()[0]
+    await client.post(f"/progress/lessons/{second_lesson['id']}/complete", headers=headers)
+    await client.post(f"/progress/tasks/{second_task['id']}/complete", json={}, headers=headers)
+
+    async with query_budget() as q:
+        res = await client.get("/progress/resume", headers=headers)
+    assert res.status_code == 200
+    assert sum("row_number() OVER" in s for s in q.statements) == 1
+
+    by_course = {row["course_id"]: row for row in res.json()}
+    assert set(by_course) == {first.id, second.id}
+    assert by_course[first.id]["next_lesson_id"] == lessons[1]["id"]
+    assert by_course[first.id]["next_task_id"] == tasks[1]["id"]
+    assert by_course[first.id]["next_task_lesson_id"] == lessons[0]["id"]
+    assert not by_course[first.id]["completed"]
+    assert by_course[second.id]["completed"]
+    assert by_course[second.id]["next_lesson_id"] is None
+
+
+async def test_resume_requires_student(client, factory):
+    teacher = await factory.user(teacher=True)
+    res = await client.get("/progress/resume", headers=factory.headers(teacher))
+    assert res.status_code == 403
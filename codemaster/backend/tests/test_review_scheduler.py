@@ -0,0 +1,28 @@
+from app.services.review_scheduler import (
+    MIN_EASINESS,
+    QUALITY_CORRECT,
+    QUALITY_WRONG,
+    Sm2State,
+    sm2_next,
+)
+
+
+def test_sm2_intervals_grow_on_correct_answers():
+    state = Sm2State()
+    intervals = []
+    for _ in range(4):
+        state = sm2_next(state, QUALITY_CORRECT)
+        intervals.append(state.interval_days)
+    assert intervals == [1, 6, 15, 38]
+
+
+def test_sm2_wrong_answer_resets_and_lowers_easiness():
+    state = Sm2State(repetitions=3, interval_days=15, easiness=2.5)
+    state = sm2_next(state, QUALITY_WRONG)
+    assert state.repetitions == 0
+    assert state.interval_days == 1
+    assert state.easiness < 2.5
+
+    for _ in range(20):
+        state = sm2_next(state, QUALITY_WRONG)
+    assert state.easiness == MIN_EASINESS
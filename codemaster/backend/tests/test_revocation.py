@@ -0,0 +1,95 @@
+import pytest
+from sqlalchemy import update
+
+from app.core import security
+from app.core.revocation import BloomFilter
+from app.core.security import create_access_token, get_password_hash, verify_token
+from app.db.database import AsyncSessionLocal
+from app.models.user import User
+from app.services.accounts import deactivate_user
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(size_bits=1 << 16, hashes=5)
+    revoked = [f"jti-{i}" for i in range(500)]
+    for jti in revoked:
+        bloom.add(jti)
+
+    assert all(jti in bloom for jti in revoked)
+    false_positives = sum(f"other-{i}" in bloom for i in range(5000))
+    assert false_positives < 50
+
+
+def test_verified_token_is_memoized():
+    token = create_access_token({"sub": "1", "is_teacher": True})
+    first = verify_token(token)
+    assert first["sub"] == "1" and first["jti"]
+    assert verify_token(token) is first
+    assert verify_token(token + "x") is None
+
+
+async def _login(client, email: str, password: str):
+    return await client.post("/auth/login", data={"username": email, "password": password})
+
+
+async def _student_with_password(factory, password: str = "secret-pass"):
+    user = await factory.user()
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(User).where(User.id == user.id).values(hashed_password=get_password_hash(password))
+        )
+        await db.commit()
+    return user, password
+
+
+@pytest.fixture
+def stateless(monkeypatch):
+    monkeypatch.setattr(security.settings, "AUTH_STATELESS", True)
+
+
+@pytest.mark.anyio
+async def test_stateless_auth_does_not_read_users(client, factory, query_budget, stateless):
+    student = await factory.user()
+    async with query_budget() as q:
+        res = await client.get("/progress/my-courses", headers=factory.headers(student))
+    assert res.status_code == 200
+    assert not any("FROM users" in s for s in q.statements)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("mode", ["db", "stateless"])
+async def test_logout_rejects_old_token(client, factory, monkeypatch, mode):
+    monkeypatch.setattr(security.settings, "AUTH_STATELESS", mode == "stateless")
+    student = await factory.user()
+    kept, dropped = factory.headers(student), factory.headers(student)
+
+    assert (await client.post("/auth/logout", headers=dropped)).status_code == 204
+    assert (await client.get("/progress/my-courses", headers=dropped)).status_code == 401
+    assert (await client.get("/progress/my-courses", headers=kept)).status_code == 200
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("mode", ["db", "stateless"])
+async def test_logout_all_rejects_every_earlier_token(client, factory, monkeypatch, mode):
+    monkeypatch.setattr(security.settings, "AUTH_STATELESS", mode == "stateless")
+    student = await factory.user()
+    first, second = factory.headers(student), factory.headers(student)
+
+    assert (await client.post("/auth/logout-all", headers=first)).status_code == 204
+    for headers in (first, second):
+        assert (await client.get("/progress/my-courses", headers=headers)).status_code == 401
+    # новый вход после logout-all работает
+    assert (await client.get("/progress/my-courses", headers=factory.headers(student))).status_code == 200
+
+
+@pytest.mark.anyio
+async def test_deactivation_revokes_tokens_in_stateless_mode(client, factory, stateless):
+    student, password = await _student_with_password(factory)
+    res = await _login(client, student.email, password)
+    headers = {"Authorization": f"Bearer {res.json()['access_token']}"}
+    assert (await client.get("/progress/my-courses", headers=headers)).status_code == 200
+
+    async with AsyncSessionLocal() as db:
+        assert await deactivate_user(db, student.id)
+    assert (await client.get("/progress/my-courses", headers=headers)).status_code == 401
+    assert (await _login(client, student.email, password)).status_code == 403
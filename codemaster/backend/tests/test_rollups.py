@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.db.database import AsyncSessionLocal
+from app.models.event import EVENT_ATTEMPT, EVENT_ENROLL, EVENT_LESSON_COMPLETE
+from app.models.rollup import DailyCourseActivity
+from app.services.event_log import event_log
+from app.services.rollups import apply_events, backfill, utc_today
+
+pytestmark = pytest.mark.anyio
+
+COLUMNS = ("active_students", "lessons_completed", "tasks_attempted", "tasks_correct")
+
+
+async def _rows():
+    async with AsyncSessionLocal() as session:
+        res = await session.execute(
+            select(DailyCourseActivity).order_by(DailyCourseActivity.course_id, DailyCourseActivity.day)
+        )
+        return [(r.course_id, r.day, *(getattr(r, c) for c in COLUMNS)) for r in res.scalars().all()]
+
+
+async def test_apply_events_counts_unique_students_per_day(db_schema):
+    day = datetime(2026, 3, 1, 23, 0)
+    events = [
+        {"kind": EVENT_ATTEMPT, "user_id": 1, "course_id": 7, "is_correct": False, "created_at": day},
+        {"kind": EVENT_ATTEMPT, "user_id": 1, "course_id": 7, "is_correct": True, "created_at": day},
+        {"kind": EVENT_LESSON_COMPLETE, "user_id": 2, "course_id": 7, "created_at": day},
+        {"kind": EVENT_ENROLL, "user_id": 3, "course_id": 7, "created_at": day},
+    ]
+    async with AsyncSessionLocal() as session:
+        await apply_events(session, events)
+        # следующая пачка: тот же студент в тот же день не считается второй раз
+        await apply_events(
+            session,
+            [
+                {"kind": EVENT_ATTEMPT, "user_id": 1, "course_id": 7, "is_correct": True, "created_at": day},
+                {
+                    "kind": EVENT_ATTEMPT,
+                    "user_id": 1,
+                    "course_id": 7,
+                    "is_correct": True,
+                    "created_at": day + timedelta(hours=2),
+                },
+            ],
+        )
+        await session.commit()
+
+    assert await _rows() == [
+        (7, date(2026, 3, 1), 2, 1, 3, 2),
+        (7, date(2026, 3, 2), 1, 0, 1, 1),
+    ]
+
+
+async def test_incremental_rollup_matches_backfill(client, factory):
+    teacher = await factory.user(teacher=True)
+    course = await factory.course(teacher)
+    lesson = await factory.lesson(course)
+    task = await factory.task(lesson)
+    students = [await factory.user() for _ in range(3)]
+    for student in students:
+        await factory.enroll(student, course)
+
+    options = (await client.get(f"/tasks/{task.id}", headers=factory.headers(students[0]))).json()["options"]
+    right = next(o for o in options if o["is_correct"])
+    wrong = next(o for o in options if not o["is_correct"])
+    for student, picks in zip(students, [(wrong, right), (right,), ()]):
+        for option in picks:
+            await client.post(
+                f"/tasks/{task.id}/submit-answer",
+                json={"option_id": option["id"]},
+                headers=factory.headers(student),
+            )
+    for student in students[1:]:
+        # повторная отметка урока не добавляет завершений
+        for _ in range(2):
+            await client.post(f"/progress/lessons/{lesson.id}/complete", headers=factory.headers(student))
+    await event_log.flush()
+
+    today = utc_today()
+    res = await client.get(
+        f"/teacher/courses/{course.id}/activity",
+        params={"since": (today - timedelta(days=2)).isoformat()},
+        headers=factory.headers(teacher),
+    )
+    assert res.status_code == 200
+    body = res.json()
+    assert [day["day"] for day in body] == [(today - timedelta(days=n)).isoformat() for n in (2, 1, 0)]
+    assert body[0]["tasks_attempted"] == 0
+    assert {c: body[-1][c] for c in COLUMNS} == {
+        "active_students": 3,
+        "lessons_completed": 2,
+        "tasks_attempted": 3,
+        "tasks_correct": 2,
+    }
+
+    incremental = await _rows()
+    async with AsyncSessionLocal() as session:
+        assert await backfill(session, today, today) == 1
+        await session.commit()
+    assert await _rows() == incremental
+
+
+async def test_activity_requires_owner_and_sane_range(client, factory):
+    teacher = await factory.user(teacher=True)
+    course = await factory.course(teacher)
+    other = await factory.user(teacher=True)
+    url = f"/teacher/courses/{course.id}/activity"
+
+    assert (await client.get(url, headers=factory.headers(other))).status_code == 404
+    res = await client.get(url, params={"since": "2026-02-01", "until": "2026-01-01"}, headers=factory.headers(teacher))
+    assert res.status_code == 400
+    series = (await client.get(url, headers=factory.headers(teacher))).json()
+    assert len(series) == 90
+    # дни свёрток — UTC, и период по умолчанию тоже кончается сегодняшним днём UTC
+    assert series[-1]["day"] == utc_today().isoformat()
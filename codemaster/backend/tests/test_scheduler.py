@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from app.db.database import AsyncSessionLocal
+from app.models.job import JOB_DONE, JOB_FAILED, JOB_PENDING, JOB_RUNNING, BackgroundJob
+from app.services.scheduler import JobScheduler, enqueue
+
+pytestmark = pytest.mark.anyio
+
+
+def _scheduler(worker_id: str, concurrency: int = 2) -> JobScheduler:
+    return JobScheduler(
+        concurrency=concurrency,
+        poll_interval=0.1,
+        lease_seconds=60,
+        retry_base=10.0,
+        retry_max=40.0,
+        worker_id=worker_id,
+    )
+
+
+async def _enqueue(name: str, **kwargs) -> int:
+    async with AsyncSessionLocal() as db:
+        job_id = await enqueue(db, name, **kwargs)
+        await db.commit()
+    return job_id
+
+
+async def _job(job_id: int) -> BackgroundJob:
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(BackgroundJob).where(BackgroundJob.id == job_id))).scalar_one()
+
+
+async def test_job_runs_once_across_workers(db_schema):
+    calls = []
+
+    async def handler(db, payload):
+        calls.append(payload["n"])
+
+    first, second = _scheduler("a"), _scheduler("b")
+    for scheduler in (first, second):
+        scheduler.register("demo", handler)
+    job_id = await _enqueue("demo", payload={"n": 1}, key="demo:1")
+    assert await _enqueue("demo", payload={"n": 2}, key="demo:1") is None
+
+    # второй воркер видит ту же строку, но захват уже не проходит
+    claimed = await first.claim(5)
+    assert [job.id for job in claimed] == [job_id]
+    assert await second.claim(5) == []
+    assert (await _job(job_id)).locked_by == "a"
+
+    await first._execute(claimed[0])
+    assert await second.run_pending() == 0
+    assert calls == [1]
+    job = await _job(job_id)
+    assert job.status == JOB_DONE and job.locked_by is None
+
+
+async def test_failed_job_retries_with_backoff_then_fails(db_schema):
+    async def broken(db, payload):
+        raise RuntimeError("boom")
+
+    scheduler = _scheduler("a")
+    scheduler.register("broken", broken)
+    job_id = await _enqueue("broken", max_attempts=3)
+
+    before = datetime.utcnow()
+    assert await scheduler.run_pending() == 1
+    job = await _job(job_id)
+    assert (job.status, job.attempts) == (JOB_PENDING, 1)
+    assert "RuntimeError: boom" in job.last_error
+    assert job.run_at >= before + timedelta(seconds=10)
+
+    for attempt, delay in ((2, 20), (3, None)):
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(BackgroundJob).values(run_at=datetime.utcnow()))
+            await db.commit()
+        before = datetime.utcnow()
+        await scheduler.run_pending()
+        job = await _job(job_id)
+        assert job.attempts == attempt
+        if delay is not None:
+            assert job.run_at >= before + timedelta(seconds=delay)
+    assert job.status == JOB_FAILED and job.finished_at is not None
+    assert scheduler.failed == 1 and scheduler.retried == 2
+
+
+async def test_periodic_job_is_rescheduled(db_schema):
+    runs = []
+
+    async def tick(db, payload):
+        runs.append(payload)
+
+    scheduler = _scheduler("a")
+    scheduler.register("tick", tick, every=timedelta(hours=1))
+    async with AsyncSessionLocal() as db:
+        await scheduler.ensure_periodic(db)
+        await scheduler.ensure_periodic(db)  # повторный старт не плодит строк
+        await db.commit()
+
+    assert await scheduler.run_pending() == 1
+    assert await scheduler.run_pending() == 0
+    async with AsyncSessionLocal() as db:
+        jobs = (await db.execute(select(BackgroundJob))).scalars().all()
+    assert len(jobs) == 1 and len(runs) == 1
+    assert jobs[0].status == JOB_PENDING and jobs[0].attempts == 0
+    assert jobs[0].run_at > datetime.utcnow() + timedelta(minutes=59)
+
+
+async def test_expired_lease_is_taken_over_and_concurrency_is_capped(db_schema):
+    async def noop(db, payload):
+        pass
+
+    crashed, alive = _scheduler("crashed"), _scheduler("alive", concurrency=1)
+    for scheduler in (crashed, alive):
+        scheduler.register("noop", noop)
+    stuck = await _enqueue("noop")
+    other = await _enqueue("noop")
+
+    assert len(await crashed.claim(1)) == 1
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == stuck)
+            .values(locked_until=datetime.utcnow() - timedelta(seconds=1))
+        )
+        await db.commit()
+
+    # один слот: за проход берётся одна задача, но обе в итоге выполнены
+    started = await alive.tick()
+    assert len(started) == 1
+    assert await alive.tick() == []
+    await started[0]
+    await alive.run_pending()
+    for job_id in (stuck, other):
+        job = await _job(job_id)
+        assert job.status == JOB_DONE
+    assert (await _job(stuck)).attempts == 2
+    assert (await _job(stuck)).status != JOB_RUNNING
+
+
+async def test_maintenance_jobs_run_on_empty_database(db_schema):
+    from app.services import jobs  # noqa: F401
+    from app.services.scheduler import scheduler
+
+    async with AsyncSessionLocal() as db:
+        await scheduler.ensure_periodic(db)
+        await db.commit()
+    assert await scheduler.run_pending() == 4
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(select(BackgroundJob.name, BackgroundJob.last_error))).all()
+    assert sorted(rows) == [
+        ("attempts.compact", None),
+        ("jobs.prune", None),
+        ("progress.rebuild", None),
+        ("rollups.backfill", None),
+    ]
+
+
+async def test_renew_leases_touches_only_own_running_jobs(db_schema):
+    async def noop(db, payload):
+        pass
+
+    mine, theirs = _scheduler("mine"), _scheduler("theirs")
+    for scheduler in (mine, theirs):
+        scheduler.register("noop", noop)
+    own, foreign = await _enqueue("noop"), await _enqueue("noop")
+    await mine.claim(1)
+    await theirs.claim(1)
+    soon = datetime.utcnow() + timedelta(seconds=5)
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(BackgroundJob).values(locked_until=soon))
+        await db.commit()
+
+    assert await mine.renew_leases() == 1
+    assert (await _job(own)).locked_until > soon + timedelta(seconds=30)
+    assert (await _job(foreign)).locked_until == soon
+
+
+async def test_scheduled_progress_rebuild_only_reports_by_default(factory):
+    from app.models.progress import Progress
+    from app.services.jobs import rebuild_progress
+
+    teacher = await factory.user(teacher=True)
+    course = await factory.course(teacher)
+    student = await factory.user()
+    await factory._save(
+        Progress(user_id=student.id, course_id=course.id, lessons_completed=5, tasks_completed=0, score_avg=0.0)
+    )
+
+    async def stored():
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(select(Progress.lessons_completed))).scalar_one()
+
+    async with AsyncSessionLocal() as db:
+        await rebuild_progress(db, {})
+    assert await stored() == 5
+
+    async with AsyncSessionLocal() as db:
+        await rebuild_progress(db, {"apply": True})
+    assert await stored() == 0
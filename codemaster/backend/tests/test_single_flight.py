@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.db.database import engine, get_db
+from app.main import app
+from app.services import shared_reads
+from app.services.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_load():
+    flight = SingleFlight("test")
+    loads = []
+
+    async def loader():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return ("row",)
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.do(7, loader) for _ in range(50)))
+        # после завершения следующий вызов снова идёт в БД
+        await flight.do(7, loader)
+        return results
+
+    results = asyncio.run(scenario())
+    assert all(r is results[0] for r in results)
+    assert len(loads) == 2
+    assert flight.stats()["coalesced"] == 49
+
+
+def test_errors_propagate_to_all_waiters_and_are_not_cached():
+    flight = SingleFlight("test")
+
+    async def failing():
+        await asyncio.sleep(0)
+        raise RuntimeError("db down")
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("k", failing) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+@pytest.fixture
+def tiny_pool(monkeypatch):
+    """Пул на одно соединение: запрос не должен держать его, пока ждёт общую загрузку."""
+    tiny = create_async_engine(
+        engine.url, poolclass=AsyncAdaptedQueuePool, pool_size=1, max_overflow=0, pool_timeout=2
+    )
+    sessions = async_sessionmaker(tiny, expire_on_commit=False, class_=AsyncSession)
+
+    async def get_tiny_db():
+        async with sessions() as session:
+            yield session
+
+    monkeypatch.setattr(shared_reads, "AsyncSessionLocal", sessions)
+    app.dependency_overrides[get_db] = get_tiny_db
+    yield tiny
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.mark.anyio
+async def test_concurrent_lesson_lists_fit_in_one_connection(client, factory, tiny_pool):
+    teacher = await factory.user(teacher=True)
+    course = await factory.course_tree(teacher, lessons=2, tasks_per_lesson=1)
+    students = [await factory.user() for _ in range(5)]
+
+    responses = await asyncio.gather(
+        *(
+            client.get("/lessons/", params={"course_id": course.id}, headers=factory.headers(s))
+            for s in students
+        )
+    )
+    assert [r.status_code for r in responses] == [200] * 5
+    assert all(len(r.json()) == 2 for r in responses)
+    await tiny_pool.dispose()
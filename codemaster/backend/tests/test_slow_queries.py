@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import pytest
+
+from app.core.config import get_settings
+from app.db.database import slow_query_log
+from app.db.slow_queries import fingerprint, normalize_sql, param_shape
+
+pytestmark = pytest.mark.anyio
+
+
+def test_normalize_sql_folds_literals_and_lists():
+    a = normalize_sql("SELECT * FROM tasks WHERE id IN (?, ?, ?) AND title = 'x'")
+    b = normalize_sql("SELECT *\n  FROM tasks WHERE id IN ($1, $2) AND title = 'it''s'")
+    assert a == b == "SELECT * FROM tasks WHERE id IN (?...) AND title = ?"
+    assert fingerprint(a) == fingerprint(b)
+    assert normalize_sql("INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?)") == (
+        "INSERT INTO t (a, b) VALUES (?...), ..."
+    )
+    assert normalize_sql("SELECT x::int FROM t2 WHERE y = :y_1") == "SELECT x::int FROM t2 WHERE y = ?"
+
+
+def test_param_shape_hides_values():
+    assert param_shape((1, "secret", None), False) == "int, str, null"
+    assert param_shape(tuple(range(20)), False) == "int x 20"
+    assert param_shape([(1, "a"), (2, "b")], True) == "2 x (int, str)"
+
+
+@pytest.fixture
+def log_everything(monkeypatch):
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 0.0)
+    monkeypatch.setattr(get_settings(), "SLOW_QUERY_METRICS_ENABLED", True)
+    slow_query_log.reset()
+    yield slow_query_log
+    slow_query_log.reset()
+
+
+async def test_slow_statements_are_aggregated_with_route_and_plan(client, factory, log_everything):
+    teacher = await factory.user(teacher=True)
+    course = await factory.course_tree(teacher, lessons=1, tasks_per_lesson=1)
+    headers = factory.headers(teacher)
+
+    for _ in range(2):
+        assert (await client.get(f"/teacher/courses/{course.id}/lessons", headers=headers)).status_code == 200
+
+    res = await client.get("/metrics/slow-queries", headers=headers)
+    assert res.status_code == 200
+    body = res.json()
+    assert body["threshold_ms"] == 0.0
+    lessons = [
+        s for s in body["statements"] if "FROM lessons WHERE lessons.course_id" in s["statement"]
+    ]
+    assert len(lessons) == 1
+    entry = lessons[0]
+    assert entry["count"] == 2
+    assert entry["routes"] == {"GET /teacher/courses/{course_id}/lessons": 2}
+    assert entry["plan"] and any("lessons" in line for line in entry["plan"])
+    assert str(course.id) not in entry["statement"].split("WHERE", 1)[-1]
+
+
+async def test_slow_query_metrics_are_disabled_by_default(client, factory):
+    teacher = await factory.user(teacher=True)
+    res = await client.get("/metrics/slow-queries", headers=factory.headers(teacher))
+    assert res.status_code == 404